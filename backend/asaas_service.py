@@ -1,33 +1,76 @@
-import requests
 import os
+from typing import Optional
+
+import httpx
+
+from http_client import CircuitBreaker, create_pooled_client, send_with_retries
 
 ASAAS_API_KEY = os.getenv("ASAAS_API_KEY")
 BASE_URL = os.getenv("ASAAS_BASE_URL")
 
-HEADERS = {
-    "Content-Type": "application/json",
-    "access_token": ASAAS_API_KEY
-}
+def create_asaas_client(base_url: Optional[str] = None, api_key: Optional[str] = None) -> httpx.AsyncClient:
+    """Pooled client for the Asaas API. Create one per process and close it on shutdown."""
+    return create_pooled_client(
+        "asaas",
+        base_url=base_url or BASE_URL or "",
+        headers={
+            "Content-Type": "application/json",
+            "access_token": api_key or ASAAS_API_KEY or ""
+        }
+    )
 
 class AsaasService:
+    """Asaas payment gateway calls over a shared ``httpx.AsyncClient``.
+
+    Every call goes through one circuit breaker, so a degraded gateway is
+    answered with CircuitOpenError at once instead of tying up requests until
+    their timeouts. Lookups are retried with jittered backoff; creations only
+    when the connection was never made, so nothing is created twice.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        breaker: Optional[CircuitBreaker] = None,
+        retries: int = 2,
+        backoff_base: float = 0.2
+    ):
+        self.client = client
+        self.breaker = breaker or CircuitBreaker(
+            "asaas",
+            failure_threshold=int(os.environ.get("ASAAS_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.environ.get("ASAAS_BREAKER_RESET", "30")),
+        )
+        self.retries = retries
+        self.backoff_base = backoff_base
+
+    async def _call(self, method: str, path: str, idempotent: bool, **kwargs) -> dict:
+        response = await send_with_retries(
+            self.client, method, path,
+            breaker=self.breaker, idempotent=idempotent,
+            retries=self.retries, backoff_base=self.backoff_base,
+            **kwargs
+        )
+        response.raise_for_status()
+        return response.json()
 
-    @staticmethod
-    def create_customer(business):
+    async def create_customer(self, business) -> dict:
         payload = {
             "name": business.name,
             "email": business.email,
             "externalReference": str(business.id)
         }
-        response = requests.post(
-            f"{BASE_URL}/customers",
-            json=payload,
-            headers=HEADERS
+        return await self._call("POST", "/customers", idempotent=False, json=payload)
+
+    async def find_customer(self, external_reference: str) -> Optional[dict]:
+        """The customer created for ``external_reference``, if any."""
+        result = await self._call(
+            "GET", "/customers", idempotent=True, params={"externalReference": external_reference}
         )
-        response.raise_for_status()
-        return response.json()
+        customers = result.get("data") or []
+        return customers[0] if customers else None
 
-    @staticmethod
-    def create_subscription(customer_id, plan):
+    async def create_subscription(self, customer_id: str, plan) -> dict:
         payload = {
             "customer": customer_id,
             "billingType": "CREDIT_CARD",
@@ -35,10 +78,10 @@ class AsaasService:
             "value": plan.price,
             "description": f"Corella {plan.name} Plan"
         }
-        response = requests.post(
-            f"{BASE_URL}/subscriptions",
-            json=payload,
-            headers=HEADERS
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._call("POST", "/subscriptions", idempotent=False, json=payload)
+
+    async def get_subscription(self, subscription_id: str) -> dict:
+        return await self._call("GET", f"/subscriptions/{subscription_id}", idempotent=True)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
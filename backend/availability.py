@@ -0,0 +1,101 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort busy intervals and merge the ones that overlap or touch."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def free_windows(window_start: datetime, window_end: datetime, busy: Iterable[Interval]) -> List[Interval]:
+    """Return the gaps of ``[window_start, window_end)`` not covered by ``busy``."""
+    windows: List[Interval] = []
+    cursor = window_start
+    for start, end in merge_intervals(busy):
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            windows.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        windows.append((cursor, window_end))
+    return windows
+
+def generate_slots(
+    window_start: datetime,
+    window_end: datetime,
+    busy: Iterable[Interval],
+    duration: timedelta,
+    step: timedelta = timedelta(minutes=30)
+) -> List[datetime]:
+    """Start times on the ``step`` grid anchored at ``window_start`` where a
+    service of ``duration`` fits entirely inside a free window.
+
+    Busy intervals are sorted by start and walked once alongside the grid;
+    a blocked candidate jumps straight to the first grid point after the
+    furthest busy end seen so far instead of stepping through every point.
+    """
+    slots: List[datetime] = []
+    intervals = sorted(busy, key=itemgetter(0))
+    count = len(intervals)
+    index = 0
+    # Furthest end among the intervals starting before the current slot ends
+    reach = window_start
+    current = window_start
+    while current + duration <= window_end:
+        slot_end = current + duration
+        while index < count and intervals[index][0] < slot_end:
+            start, end = intervals[index]
+            index += 1
+            if end > reach and end > start:
+                reach = end
+        if reach > current:
+            current = window_start + -(-(reach - window_start) // step) * step
+            continue
+        slots.append(current)
+        current += step
+    return slots
+
+def find_overlaps(
+    candidates: Iterable[Tuple[datetime, datetime, Hashable]],
+    busy: Iterable[Interval]
+) -> Dict[Hashable, Optional[Hashable]]:
+    """Reject candidate ``(start, end, key)`` intervals that cannot all be booked.
+
+    Candidates are taken in start order (ties keep input order); one is
+    rejected when it overlaps ``busy`` or a candidate accepted before it.
+    Returns ``{rejected key: blocking candidate key}``, with ``None`` as the
+    blocker when the overlap is with ``busy``. One sort and a bisect per
+    candidate, instead of a query per candidate.
+    """
+    merged = merge_intervals(busy)
+    busy_starts = [start for start, _ in merged]
+    rejected: Dict[Hashable, Optional[Hashable]] = {}
+    last_end: Optional[datetime] = None
+    last_key: Optional[Hashable] = None
+
+    for start, end, key in sorted(candidates, key=lambda candidate: candidate[0]):
+        if last_end is not None and start < last_end:
+            rejected[key] = last_key
+            continue
+        # Busy intervals are disjoint and sorted: only the last one starting
+        # before ``end`` can overlap
+        index = bisect_left(busy_starts, end) - 1
+        if index >= 0 and merged[index][1] > start:
+            rejected[key] = None
+            continue
+        last_end, last_key = end, key
+    return rejected
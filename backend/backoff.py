@@ -0,0 +1,8 @@
+import random
+
+# Retry delays shared by outbound HTTP calls (http_client) and background
+# jobs (jobs), which back off the same way at very different scales.
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 5.0) -> float:
+    """Full-jitter exponential backoff for retry number ``attempt`` (from 0)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,211 @@
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import asyncio
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Gateway webhooks are ingested through a durable queue, the billing_events
+# collection, one document per gateway event id:
+#   {event_id, event, subscription_id, customer_id, payload,
+#    status: "pending" | "processing" | "processed" | "ignored" | "failed",
+#    attempts, received_at, batch_id, lease_until, processed_at}
+# The webhook only inserts; the unique index on event_id drops redeliveries.
+# BillingEventProcessor claims pending events in batches and applies the
+# resulting status transitions to the billing documents carrying the
+# matching asaas_subscription_id (or asaas_customer_id) with one bulk write.
+
+BATCH_SIZE = int(os.environ.get("BILLING_EVENTS_BATCH_SIZE", "100"))
+POLL_INTERVAL = float(os.environ.get("BILLING_EVENTS_POLL_INTERVAL", "5"))
+MAX_ATTEMPTS = 5
+# A batch not finished within the lease (crashed worker) is claimed again
+LEASE = timedelta(minutes=5)
+GRACE_PERIOD = timedelta(days=int(os.environ.get("BILLING_GRACE_DAYS", "7")))
+
+ACTIVE_EVENTS = {"PAYMENT_CONFIRMED", "PAYMENT_RECEIVED"}
+OVERDUE_EVENTS = {"PAYMENT_OVERDUE"}
+CANCELED_EVENTS = {
+    "PAYMENT_REFUNDED", "PAYMENT_CHARGEBACK_REQUESTED", "SUBSCRIPTION_DELETED", "SUBSCRIPTION_INACTIVATED"
+}
+
+def event_targets(payload: dict) -> tuple:
+    """``(subscription_id, customer_id)`` an event refers to, either may be None."""
+    payment = payload.get("payment") or {}
+    subscription = payload.get("subscription") or {}
+    subscription_id = payment.get("subscription") or subscription.get("id")
+    customer_id = payment.get("customer") or subscription.get("customer")
+    return subscription_id, customer_id
+
+async def enqueue_event(db, payload: dict, now: Optional[datetime] = None) -> bool:
+    """Append a validated webhook payload to the queue.
+
+    Returns False when an event with the same id was already received.
+    """
+    subscription_id, customer_id = event_targets(payload)
+    try:
+        await db.billing_events.insert_one({
+            "event_id": payload["id"],
+            "event": payload["event"],
+            "subscription_id": subscription_id,
+            "customer_id": customer_id,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "received_at": now or datetime.now(timezone.utc)
+        })
+    except DuplicateKeyError:
+        return False
+    return True
+
+def billing_transition(event: dict) -> Optional[dict]:
+    """Fields to set on the billing document for ``event``, None when it changes nothing."""
+    name = event["event"]
+    if name in ACTIVE_EVENTS:
+        return {"status": "active", "grace_period_end": None}
+    if name in OVERDUE_EVENTS:
+        return {"status": "past_due", "grace_period_end": event["received_at"] + GRACE_PERIOD}
+    if name in CANCELED_EVENTS:
+        return {"status": "canceled", "grace_period_end": None}
+    return None
+
+async def claim_batch(db, limit: int = BATCH_SIZE, now: Optional[datetime] = None) -> list:
+    """Claim up to ``limit`` pending events, oldest first, for one worker.
+
+    Events are marked as processing under a fresh batch id, so concurrent
+    workers (one per server process) never apply the same event.
+    """
+    now = now or datetime.now(timezone.utc)
+    claimable = {
+        "attempts": {"$lt": MAX_ATTEMPTS},
+        "$or": [{"status": "pending"}, {"status": "processing", "lease_until": {"$lt": now}}]
+    }
+    cursor = db.billing_events.find(claimable, {"_id": 0, "event_id": 1}).sort("received_at", 1).limit(limit)
+    event_ids = [event["event_id"] async for event in cursor]
+    if not event_ids:
+        return []
+
+    batch_id = uuid.uuid4().hex
+    await db.billing_events.update_many(
+        {"event_id": {"$in": event_ids}, **claimable},
+        {"$set": {"status": "processing", "batch_id": batch_id, "lease_until": now + LEASE}}
+    )
+    cursor = db.billing_events.find({"batch_id": batch_id, "status": "processing"}, {"_id": 0})
+    return await cursor.sort("received_at", 1).to_list(limit)
+
+async def apply_batch(db, events: list, now: Optional[datetime] = None) -> None:
+    """Apply the transitions of a claimed batch and mark its events done.
+
+    Only the latest transition per subscription (or customer) is written,
+    and never over one from a later event, so redelivered or reordered
+    batches cannot roll a billing document back.
+    """
+    now = now or datetime.now(timezone.utc)
+    latest = {}
+    ignored = []
+    for event in events:
+        transition = billing_transition(event)
+        if event["subscription_id"]:
+            target = ("asaas_subscription_id", event["subscription_id"])
+        elif event["customer_id"]:
+            target = ("asaas_customer_id", event["customer_id"])
+        else:
+            target = None
+        if transition is None or target is None:
+            ignored.append(event["event_id"])
+            continue
+        latest[target] = (event, transition)
+
+    operations = [
+        UpdateOne(
+            {field: value, "status_event_at": {"$not": {"$gt": event["received_at"]}}},
+            {"$set": {**transition, "status_event_at": event["received_at"], "updated_at": now}}
+        )
+        for (field, value), (event, transition) in latest.items()
+    ]
+    if operations:
+        await db.billing.bulk_write(operations, ordered=False)
+
+    batch_id = events[0]["batch_id"]
+    done = {"batch_id": batch_id, "status": "processing"}
+    if ignored:
+        await db.billing_events.update_many(
+            {**done, "event_id": {"$in": ignored}},
+            {"$set": {"status": "ignored", "processed_at": now}, "$unset": {"lease_until": ""}}
+        )
+    await db.billing_events.update_many(
+        done, {"$set": {"status": "processed", "processed_at": now}, "$unset": {"lease_until": ""}}
+    )
+
+async def process_batch(db, limit: int = BATCH_SIZE) -> int:
+    """Claim and apply one batch. Returns the number of events claimed."""
+    events = await claim_batch(db, limit)
+    if not events:
+        return 0
+    try:
+        await apply_batch(db, events)
+    except Exception:
+        logger.exception("Could not apply billing events batch %s", events[0]["batch_id"])
+        await _release_batch(db, events[0]["batch_id"])
+    return len(events)
+
+async def _release_batch(db, batch_id: str) -> None:
+    # Back to the queue for another attempt; events out of attempts stay failed
+    await db.billing_events.update_many(
+        {"batch_id": batch_id, "status": "processing"},
+        {"$inc": {"attempts": 1}, "$set": {"status": "pending"}, "$unset": {"lease_until": ""}}
+    )
+    await db.billing_events.update_many(
+        {"batch_id": batch_id, "status": "pending", "attempts": {"$gte": MAX_ATTEMPTS}},
+        {"$set": {"status": "failed"}}
+    )
+
+class BillingEventProcessor:
+    """Background task draining the billing_events queue.
+
+    Runs batch after batch while the queue is full, then waits for
+    ``notify()`` from the webhook or ``poll_interval`` seconds, whichever
+    comes first. Started and stopped by the application lifespan.
+    """
+
+    def __init__(self, db, batch_size: int = BATCH_SIZE, poll_interval: float = POLL_INTERVAL):
+        self.db = db
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                claimed = await process_batch(self.db, self.batch_size)
+            except Exception:
+                logger.exception("Billing events worker failed, retrying")
+                claimed = 0
+            if claimed == self.batch_size:
+                # More are likely waiting; yield so requests are served in between
+                await asyncio.sleep(0)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,254 @@
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+import asyncio
+import os
+
+# business_counters holds one document per business and UTC day or month:
+#   {business_id, period: "day" | "month", key: "2030-01-07" | "2030-01",
+#    scheduled, completed, canceled, created}
+# Status counts are bucketed by the appointment's start_time; "created" is
+# only kept on month buckets and counts appointments by creation month, for
+# the monthly plan quota. Routes keep them current with $inc, and claim
+# "created" with claim_created before creating anything; rebuild_counters
+# recomputes them from the appointments and appointment_series collections
+# (queued once for existing data by migrations.py, or: python counters.py).
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def day_key(value: datetime) -> str:
+    return _as_utc(value).strftime("%Y-%m-%d")
+
+def month_key(value: datetime) -> str:
+    return _as_utc(value).strftime("%Y-%m")
+
+async def record_appointment_change(
+    db,
+    business_id: str,
+    before: Optional[Tuple[datetime, str]] = None,
+    after: Optional[Tuple[datetime, str]] = None,
+    created_at: Optional[datetime] = None
+) -> None:
+    """Apply an appointment transition to the counters.
+
+    ``before`` and ``after`` are ``(start_time, status)`` pairs; leave
+    ``before`` empty for a new appointment. ``created_at`` counts a new
+    appointment in its creation month without any limit; routes enforcing
+    the plan quota count it with ``claim_created`` instead.
+    """
+    await record_appointment_changes(db, business_id, [(before, after, created_at)])
+
+async def record_appointment_changes(db, business_id: str, changes: Iterable[tuple]) -> None:
+    """Apply many ``(before, after, created_at)`` transitions in one bulk write."""
+    increments = defaultdict(Counter)
+    for before, after, created_at in changes:
+        for state, delta in ((before, -1), (after, 1)):
+            if state:
+                start_time, status = state
+                increments[("day", day_key(start_time))][status] += delta
+                increments[("month", month_key(start_time))][status] += delta
+        if created_at:
+            increments[("month", month_key(created_at))]["created"] += 1
+
+    operations = []
+    for (period, key), fields in increments.items():
+        deltas = {field: delta for field, delta in fields.items() if delta}
+        if deltas:
+            operations.append(UpdateOne(
+                {"business_id": business_id, "period": period, "key": key},
+                {"$inc": deltas},
+                upsert=True
+            ))
+    if operations:
+        await db.business_counters.bulk_write(operations, ordered=False)
+
+async def claim_created(
+    db,
+    business_id: str,
+    count: int = 1,
+    limit: Optional[int] = None,
+    when: Optional[datetime] = None
+) -> Optional[int]:
+    """Count ``count`` creations in the month of ``when`` (now), up to ``limit``.
+
+    The check and the increment are one conditional upsert on the month
+    bucket: the filter only matches while the new total stays within
+    ``limit``, and when it does not match the upsert collides with the unique
+    index. Returns the new total, or None, counting nothing, when ``limit``
+    would be exceeded.
+    """
+    query = {
+        "business_id": business_id,
+        "period": "month",
+        "key": month_key(when or datetime.now(timezone.utc))
+    }
+    if limit is not None:
+        if count > limit:
+            return None
+        # Also matches buckets without a "created" field yet
+        query["created"] = {"$not": {"$gt": limit - count}}
+
+    # As in reservations._claim_day, a DuplicateKeyError is a lost creation
+    # race the first time and a full quota once the bucket exists
+    for attempt in range(2):
+        try:
+            bucket = await db.business_counters.find_one_and_update(
+                query,
+                {"$inc": {"created": count}},
+                # No projection: mongomock returns None for a projected
+                # find_one_and_update returning the updated document
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return bucket["created"]
+        except DuplicateKeyError:
+            continue
+    return None
+
+async def release_created(db, business_id: str, count: int = 1, when: Optional[datetime] = None) -> None:
+    """Give back creations claimed with ``claim_created`` that did not happen."""
+    if count:
+        await db.business_counters.update_one(
+            {"business_id": business_id, "period": "month", "key": month_key(when or datetime.now(timezone.utc))},
+            {"$inc": {"created": -count}}
+        )
+
+async def load_counters(db, business_id: str, day_from: str, month_from: str) -> list:
+    """Day buckets from ``day_from`` and month buckets from ``month_from`` on."""
+    return await db.business_counters.find(
+        {
+            "business_id": business_id,
+            "$or": [
+                {"period": "day", "key": {"$gte": day_from}},
+                {"period": "month", "key": {"$gte": month_from}}
+            ]
+        },
+        {"_id": 0}
+    ).to_list(None)
+
+def sum_counters(
+    buckets: list,
+    period: str,
+    statuses: tuple,
+    key_from: str,
+    key_to: Optional[str] = None
+) -> int:
+    """Sum ``statuses`` over the buckets of ``period`` with ``key_from <= key <= key_to``."""
+    return sum(
+        bucket.get(status, 0)
+        for bucket in buckets
+        if bucket["period"] == period
+        and bucket["key"] >= key_from
+        and (key_to is None or bucket["key"] <= key_to)
+        for status in statuses
+    )
+
+async def rebuild_counters(db, business_id: Optional[str] = None) -> int:
+    """Recompute the counters of one business (or all) from ``appointments``.
+
+    Each bucket is replaced in place (upserted) and buckets left without
+    appointments are deleted, so the counters are never missing while it
+    runs and a bucket created meanwhile by a booking is kept. Increments
+    landing on a bucket between its aggregation and its replacement can
+    still be overwritten, so it is the repair path for counters that
+    drifted, not a hot path. Returns the number of bucket documents written.
+    """
+    match = {"business_id": business_id} if business_id else {}
+    existing = {
+        (bucket["business_id"], bucket["period"], bucket["key"])
+        async for bucket in db.business_counters.find(
+            match, {"_id": 0, "business_id": 1, "period": 1, "key": 1}
+        )
+    }
+    by_start = db.appointments.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "business_id": "$business_id",
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$start_time"}},
+                "status": "$status"
+            },
+            "count": {"$sum": 1}
+        }}
+    ])
+    # A recurring series counts once against the quota, like an appointment
+    by_creation = [
+        collection.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "business_id": "$business_id",
+                    "month": {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}}
+                },
+                "count": {"$sum": 1}
+            }}
+        ])
+        for collection in (db.appointments, db.appointment_series)
+    ]
+
+    buckets = defaultdict(Counter)
+    async for row in by_start:
+        group = row["_id"]
+        buckets[(group["business_id"], "day", group["day"])][group["status"]] += row["count"]
+        buckets[(group["business_id"], "month", group["day"][:7])][group["status"]] += row["count"]
+    for rows in by_creation:
+        async for row in rows:
+            group = row["_id"]
+            if group["month"]:
+                buckets[(group["business_id"], "month", group["month"])]["created"] += row["count"]
+
+    operations = [
+        ReplaceOne(
+            {"business_id": biz, "period": period, "key": key},
+            {"business_id": biz, "period": period, "key": key, **counts},
+            upsert=True
+        )
+        for (biz, period, key), counts in buckets.items()
+    ]
+    for start in range(0, len(operations), 1000):
+        await _bulk_upsert(db, operations[start:start + 1000])
+
+    stale = [
+        DeleteOne({"business_id": biz, "period": period, "key": key})
+        for biz, period, key in existing - buckets.keys()
+    ]
+    for start in range(0, len(stale), 1000):
+        await db.business_counters.bulk_write(stale[start:start + 1000], ordered=False)
+    return len(operations)
+
+async def _bulk_upsert(db, operations: list) -> None:
+    # An upsert racing a booking's $inc upsert on a new bucket loses on the
+    # unique index; by then the bucket exists and the retry replaces it
+    try:
+        await db.business_counters.bulk_write(operations, ordered=False)
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        if any(error["code"] != 11000 for error in errors):
+            raise
+        await db.business_counters.bulk_write(
+            [operations[error["index"]] for error in errors], ordered=False
+        )
+
+async def _rebuild_from_env(business_id: Optional[str]) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        return await rebuild_counters(client[os.environ['DB_NAME']], business_id)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    # python counters.py [business_id]
+    import sys
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).parent / '.env')
+    written = asyncio.run(_rebuild_from_env(sys.argv[1] if len(sys.argv) > 1 else None))
+    print(f"Rebuilt {written} counter buckets")
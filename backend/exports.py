@@ -0,0 +1,112 @@
+import csv
+import io
+import re
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, List
+
+from cache import TTLCache
+from streaming import NDJSON_CHUNK_SIZE, ndjson_line
+
+# Exports read a Motor cursor in chunks and encode each chunk as it
+# arrives, so memory is bounded by the chunk size and the lookup caches,
+# never by the number of rows exported.
+
+APPOINTMENT_COLUMNS = [
+    "appointment_id", "start_time", "end_time", "status",
+    "client_id", "client_name", "service_id", "service_name", "service_price",
+    "staff_id", "notes", "created_at"
+]
+CLIENT_COLUMNS = ["client_id", "name", "email", "phone", "notes", "created_at"]
+# Client names remembered while joining one appointment export
+CLIENT_LOOKUP_SIZE = 5000
+
+# Spreadsheet apps evaluate cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+_NUMBER_LIKE = re.compile(r"[+-]?[\d\s().-]+")
+
+async def chunked(cursor, size: int = NDJSON_CHUNK_SIZE) -> AsyncIterator[List[dict]]:
+    chunk = []
+    async for document in cursor:
+        chunk.append(document)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def merge_sorted(chunks: AsyncIterator[List[dict]], documents: List[dict], key) -> AsyncIterator[List[dict]]:
+    """Interleave ``documents`` into a stream of chunks, both sorted by ``key``."""
+    position = 0
+    async for chunk in chunks:
+        merged = []
+        for document in chunk:
+            while position < len(documents) and key(documents[position]) < key(document):
+                merged.append(documents[position])
+                position += 1
+            merged.append(document)
+        yield merged
+    if position < len(documents):
+        yield documents[position:]
+
+async def join_appointments(db, business_id: str, chunks: AsyncIterator[List[dict]]) -> AsyncIterator[List[dict]]:
+    """Add client name and service name and price to chunks of appointments.
+
+    Services are read once; client names are looked up with one query per
+    chunk for the ids not already cached.
+    """
+    services = {
+        service["service_id"]: service
+        async for service in db.services.find(
+            {"business_id": business_id},
+            {"_id": 0, "service_id": 1, "name": 1, "price": 1}
+        )
+    }
+    client_names = TTLCache(maxsize=CLIENT_LOOKUP_SIZE, ttl=3600)
+
+    async for chunk in chunks:
+        missing = list({
+            apt["client_id"] for apt in chunk
+            if client_names.get(apt["client_id"]) is None
+        })
+        if missing:
+            async for client in db.clients.find(
+                {"business_id": business_id, "client_id": {"$in": missing}},
+                {"_id": 0, "client_id": 1, "name": 1}
+            ):
+                client_names.set(client["client_id"], client.get("name") or "")
+
+        for apt in chunk:
+            service = services.get(apt.get("service_id"), {})
+            apt["client_name"] = client_names.get(apt["client_id"])
+            apt["service_name"] = service.get("name")
+            apt["service_price"] = service.get("price")
+        yield chunk
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES) and not _NUMBER_LIKE.fullmatch(value):
+        return "'" + value
+    return value
+
+async def csv_stream(chunks: AsyncIterator[List[dict]], columns: Iterable[str]) -> AsyncIterator[str]:
+    """Encode chunks of documents as CSV, one string per chunk after the header."""
+    columns = list(columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    async for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_cell(document.get(column)) for column in columns] for document in chunk)
+        yield buffer.getvalue()
+
+async def ndjson_chunks(chunks: AsyncIterator[List[dict]], columns: Iterable[str]) -> AsyncIterator[str]:
+    """Encode chunks of documents as NDJSON, keeping only ``columns``."""
+    columns = list(columns)
+    async for chunk in chunks:
+        yield "".join(ndjson_line({column: document.get(column) for column in columns}) for document in chunk)
@@ -0,0 +1,38 @@
+from typing import Iterable, List, Optional
+
+# Sparse fieldsets: ``?fields=name,start_time`` on a list endpoint becomes an
+# inclusion projection, so Mongo decodes and ships only those fields. Each
+# endpoint whitelists what may be asked for and names the fields it always
+# needs itself (ids, sort keys).
+
+def parse_fields(
+    fields: Optional[str],
+    allowed: Iterable[str],
+    required: Iterable[str] = ()
+) -> Optional[List[str]]:
+    """Requested fields plus ``required``, or None when every field is wanted.
+
+    Raises ValueError naming the fields that are not in ``allowed``.
+    """
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    if not requested:
+        return None
+    allowed = set(allowed)
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*required, *requested]))
+
+def fields_projection(fields: Optional[List[str]], default: dict) -> dict:
+    """Inclusion projection for ``fields``, or ``default`` when there are none."""
+    if fields is None:
+        return default
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+def pick(document: dict, fields: Optional[List[str]]) -> dict:
+    """``document`` narrowed to ``fields``, for documents not read through a projection."""
+    if fields is None:
+        return document
+    return {field: document[field] for field in fields if field in document}
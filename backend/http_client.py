@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+import httpx
+
+from backoff import backoff_delay
+
+try:
+    import h2  # noqa: F401  (lets httpx negotiate HTTP/2)
+except ImportError:
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
+
+logger = logging.getLogger(__name__)
+
+# Outbound HTTP calls share long-lived httpx.AsyncClients created in the
+# application lifespan, so connections are pooled and kept alive instead of
+# being opened per request, and every call has a bounded timeout.
+
+DEFAULT_TIMEOUT = httpx.Timeout(
+    float(os.environ.get("HTTP_CLIENT_TIMEOUT", "10")),
+    connect=float(os.environ.get("HTTP_CLIENT_CONNECT_TIMEOUT", "3")),
+)
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=int(os.environ.get("HTTP_CLIENT_MAX_CONNECTIONS", "50")),
+    max_keepalive_connections=int(os.environ.get("HTTP_CLIENT_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.environ.get("HTTP_CLIENT_KEEPALIVE_EXPIRY", "60")),
+)
+# Gateway answers worth another attempt
+RETRY_STATUSES = {429, 502, 503, 504}
+# Failures where the request never reached the server, safe to retry for any method
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class PoolMetrics:
+    """Request and connection counters of one pooled client.
+
+    Fed by httpcore trace events, so ``connections_opened`` and
+    ``tls_handshakes`` count the handshakes the pool actually performed:
+    with keep-alive working they stay far below ``requests``.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.failures = 0
+
+    async def on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+        elif event.endswith(".failed"):
+            self.failures += 1
+
+    def snapshot(self, client: Optional[httpx.AsyncClient] = None) -> dict:
+        stats = {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "failures": self.failures,
+        }
+        # httpx has no public pool API; read httpcore's pool when it is there
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            stats["pool_connections"] = len(connections)
+            stats["pool_idle"] = sum(1 for connection in connections if connection.is_idle())
+        return stats
+
+def create_pooled_client(name: str, http2: bool = True, **kwargs) -> httpx.AsyncClient:
+    """Long-lived client with keep-alive pooling, bounded timeouts and ``client.metrics``.
+
+    HTTP/2 is negotiated when ``h2`` is installed. Create clients in the
+    application lifespan and close them on shutdown.
+    """
+    metrics = PoolMetrics(name)
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    kwargs.setdefault("limits", DEFAULT_LIMITS)
+    client = httpx.AsyncClient(
+        http2=http2 and HTTP2_AVAILABLE,
+        event_hooks={"request": [metrics.on_request]},
+        **kwargs
+    )
+    client.metrics = metrics
+    return client
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose circuit breaker is open."""
+
+class CircuitBreaker:
+    """Fail fast while a remote service keeps failing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused for ``reset_timeout`` seconds. Then a single trial call
+    is let through: success closes the circuit, failure opens it again.
+    Used from the event loop only, so no locking is done.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        state = self.state
+        if state == "open" or (state == "half-open" and self._trial_running):
+            raise CircuitOpenError(f"{self.name} is unavailable")
+        if state == "half-open":
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_running or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning("Circuit for %s opened after %d failures", self.name, self._failures)
+            self._opened_at = self._clock()
+        self._trial_running = False
+
+    def record_abandoned(self) -> None:
+        """A call ended without an answer either way (cancelled, or a local error).
+
+        Says nothing about the service's health, but frees the trial slot so
+        a half-open circuit lets the next call through.
+        """
+        self._trial_running = False
+
+async def send_with_retries(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    *,
+    breaker: Optional[CircuitBreaker] = None,
+    idempotent: bool = False,
+    retries: int = 2,
+    backoff_base: float = 0.2,
+    **kwargs
+) -> httpx.Response:
+    """Send a request through ``breaker``, retrying what is safe to retry.
+
+    Idempotent calls are retried on timeouts, transport errors and
+    ``RETRY_STATUSES``; others only when the connection was never made.
+    Returns the last response, whatever its status; raises the last
+    transport error, or CircuitOpenError without calling out.
+    """
+    attempt = 0
+    while True:
+        if breaker:
+            breaker.before_call()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            if breaker:
+                breaker.record_failure()
+            retryable = idempotent or isinstance(exc, _NOT_SENT)
+            if not retryable or attempt >= retries:
+                raise
+        except BaseException:
+            if breaker:
+                breaker.record_abandoned()
+            raise
+        else:
+            failed = response.status_code >= 500 or response.status_code == 429
+            if breaker:
+                if failed:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if not (idempotent and response.status_code in RETRY_STATUSES) or attempt >= retries:
+                return response
+        await asyncio.sleep(backoff_delay(attempt, backoff_base))
+        attempt += 1
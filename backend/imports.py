@@ -0,0 +1,160 @@
+import asyncio
+import io
+import csv
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from itertools import islice
+from typing import AsyncIterator, BinaryIO, Iterator
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from search import client_search_keys, normalize_email
+
+logger = logging.getLogger(__name__)
+
+# Client imports read the upload a batch at a time and write each batch
+# before reading the next, so memory stays flat however large the file is.
+# Emails are normalized (see search.normalize_email), and duplicates are
+# found with one $in query per batch on (business_id, email), served by the
+# business_email index; rows of earlier batches are in the collection by
+# then, so duplicates inside the file are caught the same way.
+
+IMPORT_BATCH_SIZE = int(os.environ.get("CLIENT_IMPORT_BATCH_SIZE", "1000"))
+
+def _normalize_header(value) -> str:
+    return str(value or "").strip().lower()
+
+def _cell(value) -> str:
+    return "" if value is None else str(value).strip()
+
+def read_csv_rows(fileobj: BinaryIO) -> Iterator[tuple]:
+    """``(row number, record)`` pairs of a CSV file, decoded incrementally."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.reader(text)
+    try:
+        header = [_normalize_header(value) for value in next(reader, [])]
+        for values in reader:
+            if any(value.strip() for value in values):
+                yield reader.line_num, {key: _cell(value) for key, value in zip(header, values) if key}
+    except csv.Error as exc:
+        raise ValueError(f"Invalid CSV at line {reader.line_num}: {exc}")
+
+def read_xlsx_rows(fileobj: BinaryIO) -> Iterator[tuple]:
+    """``(row number, record)`` pairs of the first sheet of an XLSX workbook."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import needs openpyxl installed; upload a CSV instead")
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as exc:
+        # BadZipFile, InvalidFileException or a KeyError for a missing part,
+        # depending on how the file is broken
+        raise ValueError("Not a valid XLSX workbook") from exc
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(value) for value in next(rows, ())]
+        for number, values in enumerate(rows, start=2):
+            if any(_cell(value) for value in values):
+                yield number, {key: _cell(value) for key, value in zip(header, values) if key}
+    finally:
+        workbook.close()
+
+def _take(rows: Iterator[tuple], count: int) -> list:
+    return list(islice(rows, count))
+
+async def _write_batch(db, business_id: str, batch: list) -> AsyncIterator[dict]:
+    """Insert a batch, yielding a result per duplicate or unsaved row."""
+    emails = [client["email"] for _, client in batch if client["email"]]
+    existing = set()
+    if emails:
+        existing = {
+            client["email"]
+            async for client in db.clients.find(
+                {"business_id": business_id, "email": {"$in": emails}},
+                {"_id": 0, "email": 1}
+            )
+        }
+    new_clients = []
+    for number, client in batch:
+        if client["email"] in existing:
+            yield {"row": number, "status": "duplicate"}
+            continue
+        if client["email"]:
+            existing.add(client["email"])
+        new_clients.append((number, client))
+    if not new_clients:
+        return
+
+    try:
+        await db.clients.insert_many([client for _, client in new_clients], ordered=False)
+    except BulkWriteError as exc:
+        # Unordered: every other client of the batch was still inserted
+        for error in exc.details.get("writeErrors", []):
+            number = new_clients[error["index"]][0]
+            yield {"row": number, "status": "error", "error": "could not be saved"}
+
+async def import_clients(
+    db,
+    business_id: str,
+    rows: Iterator[tuple],
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> AsyncIterator[dict]:
+    """Create clients from ``(row number, record)`` pairs.
+
+    Yields one result per rejected or duplicate row as each batch is
+    written, then a summary. A file that cannot be read or a database
+    failure ends the stream with a ``failed`` summary of what was written.
+    """
+    created = duplicates = errors = 0
+    try:
+        while True:
+            # Decoding the file is blocking CPU work; read each batch in a thread
+            chunk = await asyncio.to_thread(_take, rows, batch_size)
+            if not chunk:
+                break
+
+            batch = []
+            for number, record in chunk:
+                name = record.get("name", "")
+                if not name:
+                    errors += 1
+                    yield {"row": number, "status": "error", "error": "name is required"}
+                    continue
+
+                email = normalize_email(record.get("email"))
+                batch.append((number, {
+                    "client_id": f"client_{uuid.uuid4().hex[:12]}",
+                    "business_id": business_id,
+                    "name": name,
+                    "email": email,
+                    "phone": record.get("phone") or None,
+                    "notes": record.get("notes") or None,
+                    "search_keys": client_search_keys(name, email, record.get("phone")),
+                    "created_at": datetime.now(timezone.utc)
+                }))
+
+            rejected = 0
+            async for result in _write_batch(db, business_id, batch):
+                if result["status"] == "duplicate":
+                    duplicates += 1
+                else:
+                    errors += 1
+                rejected += 1
+                yield result
+            created += len(batch) - rejected
+    except Exception as exc:
+        # The response has started streaming, so whatever went wrong is
+        # reported as the last line instead of an error status
+        if isinstance(exc, ValueError):
+            error = str(exc)
+        else:
+            logger.exception("Client import for %s stopped", business_id)
+            error = "database error, import stopped" if isinstance(exc, PyMongoError) else "import stopped"
+        yield {"status": "failed", "error": error, "created": created, "duplicates": duplicates, "errors": errors}
+        return
+
+    yield {"status": "done", "created": created, "duplicates": duplicates, "errors": errors}
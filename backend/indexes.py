@@ -0,0 +1,214 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from datetime import datetime, timezone
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Index registry, ensured at startup. Key order follows the query shapes in
+# routes/agenda.py: equality fields first, then sort, then range fields.
+INDEXES = {
+    "users": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email"),
+    ],
+    "user_sessions": [
+        IndexModel([("session_token", ASCENDING)], name="session_token_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Mongo removes sessions once expires_at has passed.
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "businesses": [
+        IndexModel([("business_id", ASCENDING)], name="business_id_unique", unique=True),
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("owner_id", ASCENDING), ("business_id", ASCENDING)], name="owner_business"),
+    ],
+    "staff": [
+        IndexModel([("business_id", ASCENDING), ("is_active", ASCENDING)], name="business_active"),
+    ],
+    "services": [
+        IndexModel([("service_id", ASCENDING)], name="service_id_unique", unique=True),
+        IndexModel([("business_id", ASCENDING), ("is_active", ASCENDING)], name="business_active"),
+    ],
+    "clients": [
+        IndexModel([("business_id", ASCENDING), ("client_id", ASCENDING)], name="business_client_unique", unique=True),
+        IndexModel([("business_id", ASCENDING), ("email", ASCENDING)], name="business_email"),
+        # Prefix search over the normalized keys, see search.py
+        IndexModel([("business_id", ASCENDING), ("search_keys", ASCENDING)], name="business_search_keys"),
+        # Keyset pagination and streaming in (name, client_id) order.
+        IndexModel(
+            [("business_id", ASCENDING), ("name", ASCENDING), ("client_id", ASCENDING)],
+            name="business_name_client",
+        ),
+    ],
+    "appointments": [
+        IndexModel([("appointment_id", ASCENDING)], name="appointment_id_unique", unique=True),
+        # Available slots.
+        IndexModel(
+            [("business_id", ASCENDING), ("staff_id", ASCENDING), ("status", ASCENDING),
+             ("start_time", ASCENDING), ("end_time", ASCENDING)],
+            name="business_staff_status_start",
+        ),
+        # Calendar listing (optionally filtered by status) and dashboard lists.
+        IndexModel([("business_id", ASCENDING), ("start_time", ASCENDING)], name="business_start"),
+        # Listings filtered by status.
+        IndexModel(
+            [("business_id", ASCENDING), ("status", ASCENDING), ("start_time", ASCENDING)],
+            name="business_status_start",
+        ),
+        # Client history, newest first.
+        IndexModel(
+            [("business_id", ASCENDING), ("client_id", ASCENDING), ("start_time", DESCENDING)],
+            name="business_client_start",
+        ),
+        # Pending and batched reminders only, see reminders.py
+        IndexModel([("remind_at", ASCENDING)], name="remind_at", sparse=True),
+        IndexModel([("reminder_batch", ASCENDING)], name="reminder_batch", sparse=True),
+    ],
+    # Recurring series, selected by range; see recurrence.py
+    "appointment_series": [
+        IndexModel([("series_id", ASCENDING)], name="series_id_unique", unique=True),
+        IndexModel([("business_id", ASCENDING), ("first_start", ASCENDING)], name="business_first_start"),
+        IndexModel(
+            [("business_id", ASCENDING), ("staff_id", ASCENDING), ("first_start", ASCENDING)],
+            name="business_staff_first_start",
+        ),
+        # Client history
+        IndexModel([("business_id", ASCENDING), ("client_id", ASCENDING)], name="business_client"),
+    ],
+    # Per staff-day booking guards, see reservations.py
+    "slot_reservations": [
+        IndexModel(
+            [("business_id", ASCENDING), ("staff_id", ASCENDING), ("day", ASCENDING)],
+            name="business_staff_day_unique", unique=True,
+        ),
+    ],
+    # Per day/month appointment counts, see counters.py
+    "business_counters": [
+        IndexModel(
+            [("business_id", ASCENDING), ("period", ASCENDING), ("key", ASCENDING)],
+            name="business_period_key_unique", unique=True,
+        ),
+    ],
+    "billing": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Targets of gateway webhook transitions, see billing_events.py
+        IndexModel([("asaas_subscription_id", ASCENDING)], name="asaas_subscription_id", sparse=True),
+        IndexModel([("asaas_customer_id", ASCENDING)], name="asaas_customer_id", sparse=True),
+    ],
+    # Webhook queue, see billing_events.py
+    "billing_events": [
+        IndexModel([("event_id", ASCENDING)], name="event_id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("received_at", ASCENDING)], name="status_received"),
+        IndexModel([("batch_id", ASCENDING)], name="batch_id", sparse=True),
+        # Processed events are kept a month to drop late redeliveries.
+        IndexModel([("processed_at", ASCENDING)], name="processed_at_ttl", expireAfterSeconds=30 * 24 * 3600),
+    ],
+    # One-time migrations already queued, see migrations.py
+    "migrations": [
+        IndexModel([("migration_id", ASCENDING)], name="migration_id_unique", unique=True),
+    ],
+    # Background jobs, see jobs.py
+    "jobs": [
+        IndexModel([("job_id", ASCENDING)], name="job_id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+        IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)], name="status_lease_until"),
+        # Finished jobs are kept a week for inspection.
+        IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ],
+}
+
+_PROBE_TIME = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+# (label, collection, filter, sort) mirroring the hot queries of the routes.
+QUERY_PROBES = [
+    ("session lookup", "user_sessions", {"session_token": "probe"}, None),
+    ("user lookup", "users", {"user_id": "probe"}, None),
+    ("business ownership", "businesses", {"business_id": "probe", "owner_id": "probe"}, None),
+    ("business by slug", "businesses", {"slug": "probe"}, None),
+    ("staff list", "staff", {"business_id": "probe", "is_active": True}, None),
+    ("service list", "services", {"business_id": "probe", "is_active": True}, None),
+    ("client list", "clients", {"business_id": "probe"}, None),
+    ("client page", "clients",
+     {"business_id": "probe", "$or": [{"name": {"$gt": "probe"}}, {"name": "probe", "client_id": {"$gt": "probe"}}]},
+     [("name", 1), ("client_id", 1)]),
+    ("client search", "clients",
+     {"business_id": "probe", "$and": [{"search_keys": re.compile("^probe")}]}, None),
+    ("client by email", "clients", {"business_id": "probe", "email": "probe"}, None),
+    ("appointment list", "appointments",
+     {"business_id": "probe", "start_time": {"$gte": _PROBE_TIME}}, [("start_time", 1)]),
+    ("series in range", "appointment_series",
+     {"business_id": "probe", "staff_id": {"$in": ["probe"]}, "first_start": {"$lt": _PROBE_TIME},
+      "$or": [{"last_end": None}, {"last_end": {"$gt": _PROBE_TIME}}]}, None),
+    ("client series", "appointment_series", {"business_id": "probe", "client_id": "probe"}, None),
+    ("slot reservation", "slot_reservations",
+     {"business_id": "probe", "staff_id": "probe", "day": "2000-01-01"}, None),
+    ("day slots", "appointments",
+     {"business_id": "probe", "staff_id": "probe", "status": "scheduled",
+      "start_time": {"$lt": _PROBE_TIME}, "end_time": {"$gt": _PROBE_TIME}}, None),
+    ("dashboard counters", "business_counters",
+     {"business_id": "probe", "$or": [{"period": "day", "key": {"$gte": "2000-01-01"}},
+                                       {"period": "month", "key": {"$gte": "2000-01"}}]}, None),
+    ("client history", "appointments",
+     {"business_id": "probe", "client_id": "probe"}, [("start_time", -1)]),
+    ("monthly quota", "business_counters",
+     {"business_id": "probe", "period": "month", "key": "2000-01"}, None),
+    ("pending billing events", "billing_events",
+     {"attempts": {"$lt": 5}, "$or": [{"status": "pending"}, {"status": "processing", "lease_until": {"$lt": _PROBE_TIME}}]},
+     [("received_at", 1)]),
+    ("due reminders", "appointments", {"remind_at": {"$lte": _PROBE_TIME}}, [("remind_at", 1)]),
+    ("reminder batch", "appointments", {"reminder_batch": "probe", "status": "scheduled"}, None),
+    ("job lease", "jobs",
+     {"kind": {"$in": ["probe"]}, "$or": [{"status": "queued", "run_at": {"$lte": _PROBE_TIME}},
+                                          {"status": "running", "lease_until": {"$lt": _PROBE_TIME}}]},
+     [("run_at", 1)]),
+    ("billing event batch", "billing_events", {"batch_id": "probe", "status": "processing"}, [("received_at", 1)]),
+]
+
+async def ensure_indexes(db) -> None:
+    """Create every registered index. Safe to run on every startup.
+
+    Indexes are created one at a time so that a single conflict (for example
+    duplicate slugs in old data) is logged without blocking the others.
+    """
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                await db[collection].create_indexes([model])
+            except OperationFailure as exc:
+                logger.error(
+                    "Could not create index %s on %s: %s",
+                    model.document["name"], collection, exc
+                )
+
+def _has_collscan(plan) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_has_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collscan(value) for value in plan)
+    return False
+
+async def report_collection_scans(db) -> list:
+    """Explain each query probe and log the ones that plan a COLLSCAN."""
+    scans = []
+    for label, collection, query, sort in QUERY_PROBES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explain = await cursor.explain()
+        except (OperationFailure, NotImplementedError) as exc:
+            logger.warning("Could not explain query '%s': %s", label, exc)
+            continue
+
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if _has_collscan(winning_plan):
+            scans.append(label)
+            logger.warning("Query '%s' on %s uses a COLLSCAN", label, collection)
+
+    if not scans:
+        logger.info("All %d probed queries use an index", len(QUERY_PROBES))
+    return scans
@@ -0,0 +1,242 @@
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from backoff import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Background jobs live in the jobs collection:
+#   {job_id, kind, payload, status: "queued" | "running" | "done" | "failed",
+#    attempts, max_attempts, run_at, lease_until, worker_id, last_error,
+#    created_at, finished_at}
+# A worker leases one job at a time with a single find_one_and_update, so
+# any number of processes can share the queue. A lease is kept alive while
+# the handler runs; a job whose lease expires (crashed or stopped worker)
+# becomes visible again and counts as a failed attempt.
+
+Handler = Callable[[object, dict], Awaitable[None]]
+
+CONCURRENCY = int(os.environ.get("JOBS_CONCURRENCY", "4"))
+POLL_INTERVAL = float(os.environ.get("JOBS_POLL_INTERVAL", "2"))
+VISIBILITY_TIMEOUT = timedelta(seconds=float(os.environ.get("JOBS_VISIBILITY_TIMEOUT", "60")))
+DRAIN_TIMEOUT = float(os.environ.get("JOBS_DRAIN_TIMEOUT", "20"))
+MAX_ATTEMPTS = 5
+RETRY_BASE = 5.0
+RETRY_CAP = 3600.0
+
+async def enqueue_job(
+    db,
+    kind: str,
+    payload: Optional[dict] = None,
+    run_at: Optional[datetime] = None,
+    max_attempts: int = MAX_ATTEMPTS,
+    job_id: Optional[str] = None
+) -> str:
+    """Queue a job of ``kind``, to run at ``run_at`` (now). Returns its id.
+
+    Passing ``job_id`` makes enqueueing idempotent: a job already queued
+    under that id is left as it is.
+    """
+    now = datetime.now(timezone.utc)
+    job_id = job_id or f"job_{uuid.uuid4().hex[:12]}"
+    try:
+        await db.jobs.insert_one({
+            "job_id": job_id,
+            "kind": kind,
+            "payload": payload or {},
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": run_at or now,
+            "lease_until": None,
+            "worker_id": None,
+            "last_error": None,
+            "created_at": now,
+            "finished_at": None
+        })
+    except DuplicateKeyError:
+        pass
+    return job_id
+
+async def lease_job(
+    db,
+    worker_id: str,
+    kinds,
+    visibility_timeout: timedelta = VISIBILITY_TIMEOUT,
+    now: Optional[datetime] = None
+) -> Optional[dict]:
+    """Lease the next due job of one of ``kinds``, or None when there is none.
+
+    Jobs whose lease expired are leased again; the ones that already used
+    up their attempts that way are marked failed instead.
+    """
+    while True:
+        current = now or datetime.now(timezone.utc)
+        job = await db.jobs.find_one_and_update(
+            {
+                "kind": {"$in": list(kinds)},
+                "$or": [
+                    {"status": "queued", "run_at": {"$lte": current}},
+                    {"status": "running", "lease_until": {"$lt": current}}
+                ]
+            },
+            {
+                "$set": {"status": "running", "worker_id": worker_id, "lease_until": current + visibility_timeout},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job is None:
+            return None
+        # Dropped here rather than projected out: mongomock returns None for
+        # a projected find_one_and_update returning the updated document
+        job.pop("_id")
+        if job["attempts"] <= job["max_attempts"]:
+            return job
+        await db.jobs.update_one(
+            {"job_id": job["job_id"], "worker_id": worker_id},
+            {"$set": {"status": "failed", "last_error": "lease expired", "lease_until": None}}
+        )
+
+async def extend_lease(
+    db, job: dict, visibility_timeout: timedelta = VISIBILITY_TIMEOUT, now: Optional[datetime] = None
+) -> bool:
+    """Push the lease of a running job forward. False when the lease was lost."""
+    current = now or datetime.now(timezone.utc)
+    result = await db.jobs.update_one(
+        {"job_id": job["job_id"], "worker_id": job["worker_id"], "status": "running"},
+        {"$set": {"lease_until": current + visibility_timeout}}
+    )
+    return result.matched_count == 1
+
+async def complete_job(db, job: dict) -> bool:
+    """Mark a leased job done. False when its lease had been taken over."""
+    now = datetime.now(timezone.utc)
+    result = await db.jobs.update_one(
+        {"job_id": job["job_id"], "worker_id": job["worker_id"], "status": "running"},
+        {"$set": {"status": "done", "lease_until": None, "finished_at": now}}
+    )
+    return result.matched_count == 1
+
+async def fail_job(db, job: dict, error: str, now: Optional[datetime] = None) -> bool:
+    """Requeue a leased job with jittered exponential backoff, or fail it for good.
+
+    False when its lease had been taken over.
+    """
+    current = now or datetime.now(timezone.utc)
+    if job["attempts"] >= job["max_attempts"]:
+        update = {"status": "failed", "lease_until": None, "last_error": error}
+    else:
+        delay = backoff_delay(job["attempts"] - 1, RETRY_BASE, RETRY_CAP)
+        update = {
+            "status": "queued",
+            "lease_until": None,
+            "last_error": error,
+            "run_at": current + timedelta(seconds=delay)
+        }
+    result = await db.jobs.update_one(
+        {"job_id": job["job_id"], "worker_id": job["worker_id"], "status": "running"},
+        {"$set": update}
+    )
+    return result.matched_count == 1
+
+class JobWorker:
+    """Pool of ``concurrency`` asyncio runners executing jobs from the queue.
+
+    ``handlers`` maps a job kind to ``async handler(db, payload)``; only
+    those kinds are leased. A handler that raises is retried with backoff up
+    to the job's ``max_attempts``. ``stop()`` lets running jobs finish for
+    up to ``drain_timeout`` seconds before cancelling them; cancelled jobs
+    run again once their lease expires.
+    """
+
+    def __init__(
+        self,
+        db,
+        handlers: Dict[str, Handler],
+        concurrency: int = CONCURRENCY,
+        poll_interval: float = POLL_INTERVAL,
+        visibility_timeout: timedelta = VISIBILITY_TIMEOUT,
+        drain_timeout: float = DRAIN_TIMEOUT
+    ):
+        self.db = db
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.drain_timeout = drain_timeout
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._runners = []
+
+    def start(self) -> None:
+        if not self.handlers:
+            return
+        self._stopping = False
+        self._runners = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    def notify(self) -> None:
+        """Wake idle runners, for jobs that are due now."""
+        self._wake.set()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        if not self._runners:
+            return
+        _, pending = await asyncio.wait(self._runners, timeout=self.drain_timeout)
+        for runner in pending:
+            runner.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if pending:
+            logger.warning("Cancelled %d running jobs on shutdown", len(pending))
+        self._runners = []
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                job = await lease_job(self.db, self.worker_id, self.handlers, self.visibility_timeout)
+            except Exception:
+                logger.exception("Could not lease a job")
+                job = None
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._execute(job)
+            except Exception:
+                # Recording the outcome failed; the lease expiring retries the job
+                logger.exception("Could not record the outcome of job %s", job["job_id"])
+
+    async def _execute(self, job: dict) -> None:
+        heartbeat = asyncio.create_task(self._keep_leased(job))
+        try:
+            await self.handlers[job["kind"]](self.db, job["payload"])
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed on attempt %d", job["job_id"], job["kind"], job["attempts"])
+            await fail_job(self.db, job, repr(exc))
+        else:
+            if not await complete_job(self.db, job):
+                logger.warning("Job %s finished after its lease was taken over", job["job_id"])
+        finally:
+            heartbeat.cancel()
+
+    async def _keep_leased(self, job: dict) -> None:
+        interval = self.visibility_timeout.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not await extend_lease(self.db, job, self.visibility_timeout):
+                return
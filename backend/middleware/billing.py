@@ -2,6 +2,9 @@ from fastapi import Request, HTTPException
 from datetime import datetime, timezone
 from functools import wraps
 
+from routes.auth import get_authenticated_user
+from counters import month_key, claim_created, release_created
+
 # Plan limits
 PLAN_LIMITS = {
     "basic": {"staff_limit": 1, "appointments_per_month": 100},
@@ -10,26 +13,27 @@ PLAN_LIMITS = {
 }
 
 async def check_billing_status(request: Request) -> dict:
-    """Check if user has active billing (trial or subscription)"""
-    db = request.app.state.db
-    
-    # Get user from session
-    session_token = request.cookies.get("session_token")
-    if not session_token:
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            session_token = auth_header.split(" ")[1]
-    
-    if not session_token:
-        return {"can_use": False, "reason": "not_authenticated"}
-    
-    session = await db.user_sessions.find_one({"session_token": session_token})
-    if not session:
-        return {"can_use": False, "reason": "invalid_session"}
-    
-    user_id = session["user_id"]
-    
-    # Get billing status
+    """Check if user has active billing (trial or subscription).
+
+    The result is memoized on ``request.state`` so a request that checks
+    several limits only resolves the session and billing document once.
+    """
+    cached = getattr(request.state, "billing_status", None)
+    if cached is not None:
+        return cached
+
+    try:
+        user = await get_authenticated_user(request)
+    except HTTPException as exc:
+        reason = "not_authenticated" if exc.detail == "Not authenticated" else "invalid_session"
+        return {"can_use": False, "reason": reason}
+
+    status = await billing_status_for_user(request.app.state.db, user["user_id"])
+    request.state.billing_status = status
+    return status
+
+async def billing_status_for_user(db, user_id: str) -> dict:
+    """Resolve the billing status of a user from the ``billing`` collection."""
     billing = await db.billing.find_one({"user_id": user_id})
     
     if not billing:
@@ -123,13 +127,12 @@ async def check_appointment_limit(request: Request, business_id: str) -> dict:
     if limits["appointments_per_month"] == -1:
         return {"allowed": True, "limit": "unlimited"}
     
-    now = datetime.now(timezone.utc)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    appointments_count = await db.appointments.count_documents({
-        "business_id": business_id,
-        "created_at": {"$gte": month_start}
-    })
+    # Read from the monthly bucket kept by counters.record_appointment_change
+    bucket = await db.business_counters.find_one(
+        {"business_id": business_id, "period": "month", "key": month_key(datetime.now(timezone.utc))},
+        {"_id": 0, "created": 1}
+    )
+    appointments_count = (bucket or {}).get("created", 0)
     
     if appointments_count >= limits["appointments_per_month"]:
         return {
@@ -141,3 +144,31 @@ async def check_appointment_limit(request: Request, business_id: str) -> dict:
         }
     
     return {"allowed": True, "current": appointments_count, "limit": limits["appointments_per_month"]}
+
+async def claim_appointment_quota(db, business_id: str, billing_status: dict, count: int = 1) -> dict:
+    """Count ``count`` new appointments against this month's plan quota.
+
+    The limit check and the increment are one conditional write (see
+    counters.claim_created), so concurrent bookings cannot overshoot the
+    limit. When not allowed nothing is counted; a claim whose appointments
+    end up not being created is given back with ``release_appointment_quota``.
+    Accounts without a plan get the basic plan's quota. A recurring series
+    is claimed as one appointment (see create_series).
+    """
+    plan_id = billing_status.get("plan_id", "basic")
+    limits = PLAN_LIMITS.get(plan_id, PLAN_LIMITS["basic"])
+    limit = limits["appointments_per_month"]
+    
+    current = await claim_created(db, business_id, count, None if limit == -1 else limit)
+    if current is None:
+        return {
+            "allowed": False,
+            "reason": "appointment_limit_reached",
+            "limit": limit,
+            "plan": plan_id
+        }
+    
+    return {"allowed": True, "current": current, "limit": "unlimited" if limit == -1 else limit}
+
+async def release_appointment_quota(db, business_id: str, count: int = 1) -> None:
+    await release_created(db, business_id, count)
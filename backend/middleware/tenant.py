@@ -0,0 +1,46 @@
+from fastapi import Request, HTTPException
+from dataclasses import dataclass
+import os
+
+from cache import TTLCache
+from routes.auth import get_authenticated_user
+from middleware.billing import check_billing_status
+
+# (user_id, business_id) pairs known to be owned. Only positive lookups are
+# cached; a missing business always goes back to Mongo.
+ownership_cache = TTLCache(
+    maxsize=int(os.environ.get("OWNERSHIP_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("OWNERSHIP_CACHE_TTL", "30")),
+)
+
+@dataclass
+class TenantContext:
+    """The authenticated user and the business they are acting on."""
+    request: Request
+    db: object
+    user: dict
+    business_id: str
+
+    async def billing_status(self) -> dict:
+        return await check_billing_status(self.request)
+
+async def get_tenant(request: Request, business_id: str) -> TenantContext:
+    """FastAPI dependency resolving user and business ownership once per request."""
+    db = request.app.state.db
+    user = await get_authenticated_user(request)
+
+    key = (user["user_id"], business_id)
+    if ownership_cache.get(key) is None:
+        business = await db.businesses.find_one(
+            {"business_id": business_id, "owner_id": user["user_id"]},
+            {"_id": 0, "business_id": 1}
+        )
+        if not business:
+            raise HTTPException(status_code=404, detail="Business not found")
+        ownership_cache.set(key, True)
+
+    return TenantContext(request=request, db=db, user=user, business_id=business_id)
+
+def invalidate_ownership(business_id: str) -> None:
+    """Forget cached ownership of a business, for every user."""
+    ownership_cache.discard_where(lambda key, value: key[1] == business_id)
@@ -0,0 +1,47 @@
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timezone
+import logging
+
+from jobs import enqueue_job
+
+logger = logging.getLogger(__name__)
+
+# One-time data migrations, queued as background jobs the first time a
+# server starts with them. The migrations collection records the ones
+# already queued, so each runs once per database however many processes
+# start; the job queue retries it until it succeeds. To run one again,
+# delete its migrations document and restart.
+#
+# (migration_id, job kind, payload)
+MIGRATIONS = [
+    # Counters for the appointments made before business_counters existed.
+    # Without it dashboard counts and the monthly quota start from zero.
+    ("counters_v1", "rebuild_counters", {}),
+    # Slot guards for the future appointments booked before reservations.py;
+    # without them a new booking could take their slot
+    ("reservations_v1", "backfill_reservations", {}),
+    # search_keys for the clients created before prefix search; without
+    # them those clients never match a search
+    ("client_search_keys_v1", "backfill_client_search_keys", {}),
+    # Client emails saved before they were stored lowercased; imports and
+    # public booking look clients up by the normalized email
+    ("client_emails_v1", "normalize_client_emails", {}),
+]
+
+async def queue_migrations(db) -> list:
+    """Queue the migrations this database has not seen. Returns their ids."""
+    queued = []
+    for migration_id, kind, payload in MIGRATIONS:
+        if await db.migrations.find_one({"migration_id": migration_id}, {"_id": 1}):
+            continue
+        # The job id makes queueing idempotent when processes start together
+        await enqueue_job(db, kind, payload, job_id=f"migration_{migration_id}")
+        try:
+            await db.migrations.insert_one(
+                {"migration_id": migration_id, "queued_at": datetime.now(timezone.utc)}
+            )
+        except DuplicateKeyError:
+            continue
+        logger.info("Queued migration %s", migration_id)
+        queued.append(migration_id)
+    return queued
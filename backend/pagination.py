@@ -0,0 +1,32 @@
+import base64
+import json
+
+# Opaque keyset cursors: the sort-key values of the last item of a page,
+# encoded as URL-safe base64 JSON.
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decode a cursor holding ``size`` values. Raises ValueError when malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Malformed cursor")
+    return values
+
+def keyset_filter(fields: list, values: list) -> dict:
+    """Filter for the items sorted (ascending) after ``values`` on ``fields``.
+
+    For fields (a, b) this is ``a > va OR (a == va AND b > vb)``.
+    """
+    clauses = []
+    for i, field in enumerate(fields):
+        clause = {prior: values[j] for j, prior in enumerate(fields[:i])}
+        clause[field] = {"$gt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
@@ -0,0 +1,224 @@
+from calendar import monthrange
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# A recurring series is stored once in appointment_series:
+#   {series_id, business_id, client_id, service_id, staff_id, notes,
+#    start_time, duration (minutes), frequency, until, count, timezone,
+#    overrides: {occurrence key: {start_time?, status?, notes?}},
+#    first_start, last_end, created_at}
+# Occurrences are expanded on demand for the range being read, and look like
+# appointments whose appointment_id is "<series_id>_<occurrence key>". An
+# override moves, skips (status "canceled") or completes one occurrence.
+# Occurrences repeat at the same wall-clock time in the business timezone
+# (stored on the series), so they follow DST changes; series stored without
+# one repeat in UTC.
+# first_start and last_end bound every occurrence, moved ones included, so
+# range reads can select series with an index; last_end is None while the
+# series is open-ended.
+
+FREQUENCIES = ("weekly", "biweekly", "monthly")
+_PERIODS = {"weekly": timedelta(weeks=1), "biweekly": timedelta(weeks=2)}
+_KEY_FORMAT = "%Y%m%dT%H%M%SZ"
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _zone(series: dict) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(series["timezone"]) if series.get("timezone") else None
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def _wall_clock(value: datetime, zone: Optional[ZoneInfo]) -> datetime:
+    """``value`` as naive local time in ``zone``; left in UTC without a zone."""
+    return value.astimezone(zone).replace(tzinfo=None) if zone else value
+
+def _from_wall_clock(value: datetime, zone: Optional[ZoneInfo]) -> datetime:
+    return value.replace(tzinfo=zone).astimezone(timezone.utc) if zone else value
+
+def occurrence_key(start: datetime) -> str:
+    """Stable key of an occurrence: its original start, in UTC."""
+    return _as_utc(start).strftime(_KEY_FORMAT)
+
+def parse_occurrence_key(key: str) -> datetime:
+    """Inverse of ``occurrence_key``. Raises ValueError when malformed."""
+    return datetime.strptime(key, _KEY_FORMAT).replace(tzinfo=timezone.utc)
+
+def occurrence_id(series_id: str, start: datetime) -> str:
+    return f"{series_id}_{occurrence_key(start)}"
+
+def split_occurrence_id(appointment_id: str) -> Optional[tuple]:
+    """``(series_id, key)`` of an occurrence id, or None for a plain appointment id."""
+    if not appointment_id.startswith("series_"):
+        return None
+    series_id, _, key = appointment_id.rpartition("_")
+    return (series_id, key) if series_id and key else None
+
+def _add_months(start: datetime, months: int) -> Optional[datetime]:
+    """``start`` moved by ``months``; None when the day does not exist that month."""
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    if start.day > monthrange(year, month)[1]:
+        return None
+    return start.replace(year=year, month=month)
+
+def _months_between(earlier: datetime, later: datetime) -> int:
+    return (later.year - earlier.year) * 12 + later.month - earlier.month
+
+def original_starts(series: dict, range_start: datetime, range_end: datetime) -> Iterator[datetime]:
+    """Unmodified occurrence starts whose interval overlaps ``[range_start, range_end)``.
+
+    Weekly series jump straight to the first occurrence in range, so reading
+    a week of a years-old series costs the same as reading its first week.
+    Monthly series skip months without the start day, like RRULE does.
+    """
+    zone = _zone(series)
+    first = _wall_clock(_as_utc(series["start_time"]), zone)
+    duration = timedelta(minutes=series["duration"])
+    until = _as_utc(series["until"]) if series.get("until") else None
+    count = series.get("count")
+    range_start, range_end = _as_utc(range_start), _as_utc(range_end)
+
+    period = _PERIODS.get(series["frequency"])
+    if period:
+        # Smallest index whose occurrence ends after range_start, one less
+        # in a zone since a DST change can shift it by an hour
+        lag = _wall_clock(range_start, zone) - duration - first
+        index = lag // period + 1 if lag >= timedelta(0) else 0
+        if zone:
+            index = max(0, index - 1)
+        while True:
+            start = _from_wall_clock(first + index * period, zone)
+            if start >= range_end or (count and index >= count) or (until and start > until):
+                return
+            if start + duration > range_start:
+                yield start
+            index += 1
+
+    # Without skipped months the n-th month is the n-th occurrence, so the
+    # months before the range can be jumped over
+    offset = 0
+    if first.day <= 28:
+        offset = max(0, _months_between(first, _wall_clock(range_start, zone) - duration) - 1)
+    produced = offset
+    while True:
+        start = _add_months(first, offset)
+        offset += 1
+        if start is None:
+            continue
+        start = _from_wall_clock(start, zone)
+        if start >= range_end or (count and produced >= count) or (until and start > until):
+            return
+        produced += 1
+        if start + duration > range_start:
+            yield start
+
+def is_occurrence(series: dict, start: datetime) -> bool:
+    """Whether ``start`` is an unmodified occurrence start of ``series``."""
+    start = _as_utc(start)
+    return start in original_starts(series, start, start + timedelta(microseconds=1))
+
+def last_occurrence_end(series: dict) -> Optional[datetime]:
+    """End of the last unmodified occurrence, or None when the series never ends."""
+    if not series.get("count") and not series.get("until"):
+        return None
+    first = _as_utc(series["start_time"])
+    horizon = _as_utc(series["until"]) if series.get("until") else None
+    if horizon is None:
+        # Even a monthly series on the 31st has count occurrences within
+        # 2 * count months
+        horizon = _add_months(first.replace(day=1), 2 * series["count"] + 1)
+    last = None
+    for last in original_starts(series, first, horizon + timedelta(seconds=1)):
+        pass
+    if last is None:
+        return first
+    return last + timedelta(minutes=series["duration"])
+
+def occurrence_bounds(series: dict) -> tuple:
+    """``(first_start, last_end)`` covering every occurrence, moved ones included."""
+    duration = timedelta(minutes=series["duration"])
+    until = _as_utc(series["until"]) if series.get("until") else None
+    first_start, last_end = _as_utc(series["start_time"]), last_occurrence_end(series)
+    for key, override in (series.get("overrides") or {}).items():
+        if not override.get("start_time") or (until and parse_occurrence_key(key) > until):
+            continue
+        start = _as_utc(override["start_time"])
+        first_start = min(first_start, start)
+        if last_end is not None:
+            last_end = max(last_end, start + duration)
+    return first_start, last_end
+
+def _occurrence(series: dict, original: datetime, override: dict) -> dict:
+    start = _as_utc(override.get("start_time") or original)
+    return {
+        "appointment_id": occurrence_id(series["series_id"], original),
+        "series_id": series["series_id"],
+        "business_id": series["business_id"],
+        "client_id": series["client_id"],
+        "service_id": series["service_id"],
+        "staff_id": series["staff_id"],
+        "start_time": start,
+        "end_time": start + timedelta(minutes=series["duration"]),
+        "status": override.get("status", "scheduled"),
+        "notes": override.get("notes", series.get("notes")),
+        "created_at": series["created_at"]
+    }
+
+def expand_series(series: dict, range_start: datetime, range_end: datetime) -> List[dict]:
+    """Occurrences of ``series`` overlapping ``[range_start, range_end)``, overrides applied."""
+    range_start, range_end = _as_utc(range_start), _as_utc(range_end)
+    duration = timedelta(minutes=series["duration"])
+    overrides = series.get("overrides") or {}
+    until = _as_utc(series["until"]) if series.get("until") else None
+
+    occurrences = [
+        _occurrence(series, start, {})
+        for start in original_starts(series, range_start, range_end)
+        if occurrence_key(start) not in overrides
+    ]
+    for key, override in overrides.items():
+        original = parse_occurrence_key(key)
+        if until and original > until:
+            continue
+        start = _as_utc(override.get("start_time") or original)
+        if start < range_end and start + duration > range_start:
+            occurrences.append(_occurrence(series, original, override))
+    return occurrences
+
+def series_filter(
+    business_id: str,
+    range_start: datetime,
+    range_end: datetime,
+    staff_ids: Optional[list] = None
+) -> dict:
+    """Filter for the series with an occurrence overlapping the range."""
+    query = {
+        "business_id": business_id,
+        "first_start": {"$lt": range_end},
+        "$or": [{"last_end": None}, {"last_end": {"$gt": range_start}}]
+    }
+    if staff_ids is not None:
+        query["staff_id"] = {"$in": staff_ids}
+    return query
+
+async def load_occurrences(
+    db,
+    business_id: str,
+    range_start: datetime,
+    range_end: datetime,
+    staff_ids: Optional[list] = None
+) -> List[dict]:
+    """Occurrences of every series of a business overlapping the range, by start time."""
+    occurrences = []
+    async for series in db.appointment_series.find(
+        series_filter(business_id, range_start, range_end, staff_ids),
+        {"_id": 0}
+    ):
+        occurrences.extend(expand_series(series, range_start, range_end))
+    occurrences.sort(key=lambda occurrence: occurrence["start_time"])
+    return occurrences
@@ -0,0 +1,308 @@
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from pathlib import Path
+from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import asyncio
+import logging
+import os
+import smtplib
+import uuid
+
+from jobs import enqueue_job
+from responses import dumps
+
+logger = logging.getLogger(__name__)
+
+# Each scheduled appointment carries ``remind_at``, the time of its next
+# reminder, set when it is booked and moved or removed whenever the booking
+# changes. The field is only present while a reminder is pending, so the
+# sparse index on it holds just those appointments and finding the due ones
+# never scans the collection. ReminderScheduler moves due appointments into
+# a batch (``reminder_batch``) and queues one send_reminders job per batch;
+# the job hands the batch to the configured sender. Each scan also queues
+# the job of any batch left without one by a process that stopped between
+# the two steps.
+
+REMINDER_LEAD = timedelta(hours=float(os.environ.get("REMINDER_LEAD_HOURS", "24")))
+SCAN_INTERVAL = float(os.environ.get("REMINDER_SCAN_INTERVAL", "60"))
+BATCH_SIZE = int(os.environ.get("REMINDER_BATCH_SIZE", "100"))
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def next_reminder_at(start_time: datetime, status: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """When to remind of an appointment, None when no reminder is due.
+
+    Bookings made inside the lead time get none: the client just booked.
+    """
+    if status != "scheduled":
+        return None
+    remind_at = _as_utc(start_time) - REMINDER_LEAD
+    if remind_at <= (now or datetime.now(timezone.utc)):
+        return None
+    return remind_at
+
+def reminder_fields(start_time: datetime, status: str, now: Optional[datetime] = None) -> dict:
+    """Fields to store on a new appointment for its reminder."""
+    remind_at = next_reminder_at(start_time, status, now)
+    return {"remind_at": remind_at} if remind_at else {}
+
+def reminder_update(start_time: datetime, status: str, now: Optional[datetime] = None) -> dict:
+    """Update operators pointing an appointment's reminder at its new time and status.
+
+    Also drops the appointment from a batch already queued, so a reminder
+    for the old time is never sent.
+    """
+    remind_at = next_reminder_at(start_time, status, now)
+    update = {"$unset": {"reminder_batch": ""}}
+    if remind_at:
+        update["$set"] = {"remind_at": remind_at}
+    else:
+        update["$unset"]["remind_at"] = ""
+    return update
+
+async def claim_due_reminders(db, limit: int = BATCH_SIZE, now: Optional[datetime] = None) -> Optional[str]:
+    """Move up to ``limit`` due reminders into a new batch and return its id.
+
+    Returns None when nothing is due. The move is conditional on
+    ``remind_at`` still being due, so concurrent schedulers (one per server
+    process) never claim the same appointment.
+    """
+    now = now or datetime.now(timezone.utc)
+    cursor = db.appointments.find(
+        {"remind_at": {"$lte": now}}, {"_id": 0, "appointment_id": 1}
+    ).sort("remind_at", 1).limit(limit)
+    appointment_ids = [appointment["appointment_id"] async for appointment in cursor]
+    if not appointment_ids:
+        return None
+
+    batch_id = f"rem_{uuid.uuid4().hex[:12]}"
+    result = await db.appointments.update_many(
+        {"appointment_id": {"$in": appointment_ids}, "remind_at": {"$lte": now}},
+        {"$set": {"reminder_batch": batch_id}, "$unset": {"remind_at": ""}}
+    )
+    return batch_id if result.modified_count else None
+
+def _job_id(batch_id: str) -> str:
+    return f"job_{batch_id}"
+
+async def requeue_stranded_batches(db) -> int:
+    """Queue the send_reminders job of every claimed batch that has none.
+
+    A process stopping between claiming a batch and queueing its job leaves
+    the batch unsent; this picks it up on the next scan. Returns the number
+    of jobs queued. Batches whose job exists, whatever its status, are left
+    alone.
+    """
+    batch_ids = await db.appointments.distinct("reminder_batch", {"reminder_batch": {"$exists": True}})
+    if not batch_ids:
+        return 0
+    queued = {
+        job["job_id"]
+        async for job in db.jobs.find(
+            {"job_id": {"$in": [_job_id(batch_id) for batch_id in batch_ids]}}, {"_id": 0, "job_id": 1}
+        )
+    }
+    stranded = [batch_id for batch_id in batch_ids if _job_id(batch_id) not in queued]
+    for batch_id in stranded:
+        logger.warning("Queueing stranded reminder batch %s", batch_id)
+        # Idempotent on the job id, in case another process queues it too
+        await enqueue_job(db, "send_reminders", {"batch_id": batch_id}, job_id=_job_id(batch_id))
+    return len(stranded)
+
+def _local_time(start_time: datetime, tz_name: Optional[str]) -> datetime:
+    try:
+        return _as_utc(start_time).astimezone(ZoneInfo(tz_name or "UTC"))
+    except (ZoneInfoNotFoundError, ValueError):
+        return _as_utc(start_time)
+
+async def load_batch(db, batch_id: str) -> List[dict]:
+    """Reminders of a batch, joined with their client, business and service."""
+    appointments = await db.appointments.find(
+        {"reminder_batch": batch_id, "status": "scheduled"},
+        {"_id": 0, "appointment_id": 1, "business_id": 1, "client_id": 1, "service_id": 1, "start_time": 1}
+    ).to_list(None)
+    if not appointments:
+        return []
+
+    business_ids = list({apt["business_id"] for apt in appointments})
+    clients, businesses, services = await asyncio.gather(
+        db.clients.find(
+            {"business_id": {"$in": business_ids}, "client_id": {"$in": list({apt["client_id"] for apt in appointments})}},
+            {"_id": 0, "business_id": 1, "client_id": 1, "name": 1, "email": 1}
+        ).to_list(None),
+        db.businesses.find(
+            {"business_id": {"$in": business_ids}}, {"_id": 0, "business_id": 1, "name": 1, "timezone": 1}
+        ).to_list(None),
+        db.services.find(
+            {"service_id": {"$in": list({apt["service_id"] for apt in appointments})}},
+            {"_id": 0, "service_id": 1, "name": 1}
+        ).to_list(None)
+    )
+    clients = {(client["business_id"], client["client_id"]): client for client in clients}
+    businesses = {business["business_id"]: business for business in businesses}
+    services = {service["service_id"]: service for service in services}
+
+    reminders = []
+    for apt in appointments:
+        client = clients.get((apt["business_id"], apt["client_id"]))
+        if not client or not client.get("email"):
+            continue
+        business = businesses.get(apt["business_id"], {})
+        reminders.append({
+            "appointment_id": apt["appointment_id"],
+            "to": client["email"],
+            "client_name": client.get("name", ""),
+            "business_name": business.get("name", ""),
+            "service_name": services.get(apt["service_id"], {}).get("name", ""),
+            "start_time": _local_time(apt["start_time"], business.get("timezone"))
+        })
+    return reminders
+
+async def send_reminders(db, payload: dict, sender) -> None:
+    """Job handler: send one batch through ``sender`` and mark it sent.
+
+    Appointments rescheduled or canceled since the batch was claimed have
+    left it and are skipped. If the sender raises, the job is retried.
+    """
+    batch_id = payload["batch_id"]
+    reminders = await load_batch(db, batch_id)
+    if reminders:
+        await sender.send_batch(reminders)
+    await db.appointments.update_many(
+        {"reminder_batch": batch_id},
+        {"$set": {"reminder_sent_at": datetime.now(timezone.utc)}, "$unset": {"reminder_batch": ""}}
+    )
+
+def reminder_text(reminder: dict) -> str:
+    when = reminder["start_time"].strftime("%A, %B %d at %H:%M")
+    return (
+        f"Hi {reminder['client_name']},\n\n"
+        f"This is a reminder of your {reminder['service_name']} appointment "
+        f"at {reminder['business_name']} on {when}.\n"
+    )
+
+class LogSender:
+    """Logs reminders instead of sending them; the default until a sender is configured."""
+
+    async def send_batch(self, reminders: List[dict]) -> None:
+        for reminder in reminders:
+            logger.info("Reminder for %s to %s", reminder["appointment_id"], reminder["to"])
+
+class FileSender:
+    """Appends each reminder as a JSON line to ``path``. For development and tests."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    async def send_batch(self, reminders: List[dict]) -> None:
+        lines = b"".join(dumps(reminder) + b"\n" for reminder in reminders)
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines: bytes) -> None:
+        with self.path.open("ab") as sink:
+            sink.write(lines)
+
+class SmtpSender:
+    """Sends a batch as emails over a single SMTP connection."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        sender: str = "no-reply@corella.app",
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True
+    ):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+
+    async def send_batch(self, reminders: List[dict]) -> None:
+        await asyncio.to_thread(self._send, reminders)
+
+    def _send(self, reminders: List[dict]) -> None:
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            for reminder in reminders:
+                message = EmailMessage()
+                message["From"] = self.sender
+                message["To"] = reminder["to"]
+                message["Subject"] = f"Reminder: {reminder['service_name']} at {reminder['business_name']}"
+                message.set_content(reminder_text(reminder))
+                smtp.send_message(message)
+
+def create_sender():
+    """Reminder sender selected by REMINDER_SENDER: "log" (default), "file" or "smtp"."""
+    kind = os.environ.get("REMINDER_SENDER", "log")
+    if kind == "file":
+        return FileSender(os.environ.get("REMINDER_FILE", "reminders.jsonl"))
+    if kind == "smtp":
+        return SmtpSender(
+            os.environ["SMTP_HOST"],
+            int(os.environ.get("SMTP_PORT", "587")),
+            os.environ.get("SMTP_FROM", "no-reply@corella.app"),
+            os.environ.get("SMTP_USERNAME"),
+            os.environ.get("SMTP_PASSWORD"),
+            os.environ.get("SMTP_STARTTLS", "true").lower() == "true"
+        )
+    return LogSender()
+
+class ReminderScheduler:
+    """Background task queueing a send_reminders job for every batch of due reminders.
+
+    Scans every ``interval`` seconds through the sparse remind_at index,
+    claiming batch after batch until nothing is due. Started and
+    stopped by the application lifespan, next to the JobWorker running the
+    jobs it queues.
+    """
+
+    def __init__(self, db, jobs=None, interval: float = SCAN_INTERVAL, batch_size: int = BATCH_SIZE):
+        self.db = db
+        self.jobs = jobs
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def schedule_due(self, now: Optional[datetime] = None) -> int:
+        """Queue jobs for everything due at ``now``. Returns the number of batches queued."""
+        batches = await requeue_stranded_batches(self.db)
+        while True:
+            batch_id = await claim_due_reminders(self.db, self.batch_size, now)
+            if batch_id is None:
+                break
+            await enqueue_job(self.db, "send_reminders", {"batch_id": batch_id}, job_id=_job_id(batch_id))
+            batches += 1
+        if batches and self.jobs:
+            self.jobs.notify()
+        return batches
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.schedule_due()
+            except Exception:
+                logger.exception("Could not schedule reminders")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,225 @@
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# One guard document per (business, staff member, UTC day) holds the
+# intervals booked that day. Claiming an interval is a single conditional
+# upsert: the filter only matches when no stored interval overlaps, and when
+# it does not match the upsert collides with the unique index. The conflict
+# check and the write are therefore one atomic operation, and bookings for
+# different staff members or days never contend.
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def reservation_days(start: datetime, end: datetime) -> list:
+    """UTC day keys touched by ``[start, end)``."""
+    first = _as_utc(start).date()
+    last = (_as_utc(end) - timedelta(microseconds=1)).date()
+    days = []
+    while first <= last:
+        days.append(first.isoformat())
+        first += timedelta(days=1)
+    return days
+
+async def reserve_slot(
+    db,
+    business_id: str,
+    staff_id: str,
+    appointment_id: str,
+    start: datetime,
+    end: datetime
+) -> bool:
+    """Atomically claim ``[start, end)`` for a staff member.
+
+    Returns False, leaving nothing claimed, when the interval overlaps one
+    held by another appointment.
+    """
+    interval = {"appointment_id": appointment_id, "start": start, "end": end}
+    overlapping = {
+        "appointment_id": {"$ne": appointment_id},
+        "start": {"$lt": end},
+        "end": {"$gt": start}
+    }
+
+    claimed = []
+    for day in reservation_days(start, end):
+        if not await _claim_day(db, business_id, staff_id, day, interval, overlapping):
+            if claimed:
+                await release_slot(db, business_id, staff_id, appointment_id, start, end, days=claimed)
+            return False
+        claimed.append(day)
+    return True
+
+async def _claim_day(db, business_id, staff_id, day, interval, overlapping) -> bool:
+    # Two bookings creating the same guard document race on the upsert and
+    # the loser gets a DuplicateKeyError, so that case is retried once. Once
+    # the document exists, a DuplicateKeyError means the filter excluded it.
+    for attempt in range(2):
+        try:
+            await db.slot_reservations.update_one(
+                {
+                    "business_id": business_id,
+                    "staff_id": staff_id,
+                    "day": day,
+                    "intervals": {"$not": {"$elemMatch": overlapping}}
+                },
+                {"$push": {"intervals": interval}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            continue
+    return False
+
+async def reserve_many(db, business_id: str, appointments: list) -> set:
+    """Claim the intervals of many appointments, none overlapping another.
+
+    Single-day appointments are claimed with one conditional upsert per
+    staff member and day; a day whose batch collides with a booking made
+    meanwhile falls back to claiming its appointments one by one, as do
+    appointments spanning midnight. Returns the ids that could not be
+    reserved.
+    """
+    groups = defaultdict(list)
+    one_by_one = []
+    for apt in appointments:
+        days = reservation_days(apt["start_time"], apt["end_time"])
+        if len(days) == 1:
+            groups[(apt["staff_id"], days[0])].append(apt)
+        else:
+            one_by_one.append(apt)
+
+    keys = list(groups)
+    operations = []
+    for staff_id, day in keys:
+        intervals = [
+            {"appointment_id": apt["appointment_id"], "start": apt["start_time"], "end": apt["end_time"]}
+            for apt in groups[(staff_id, day)]
+        ]
+        overlapping = [
+            {"start": {"$lt": interval["end"]}, "end": {"$gt": interval["start"]}}
+            for interval in intervals
+        ]
+        operations.append(UpdateOne(
+            {
+                "business_id": business_id,
+                "staff_id": staff_id,
+                "day": day,
+                "intervals": {"$not": {"$elemMatch": {"$or": overlapping}}}
+            },
+            {"$push": {"intervals": {"$each": intervals}}},
+            upsert=True
+        ))
+
+    if operations:
+        try:
+            await db.slot_reservations.bulk_write(operations, ordered=False)
+        except BulkWriteError as exc:
+            for error in exc.details["writeErrors"]:
+                one_by_one.extend(groups[keys[error["index"]]])
+
+    rejected = set()
+    for apt in one_by_one:
+        if not await reserve_slot(
+            db, business_id, apt["staff_id"], apt["appointment_id"], apt["start_time"], apt["end_time"]
+        ):
+            rejected.add(apt["appointment_id"])
+    return rejected
+
+async def release_slot(
+    db,
+    business_id: str,
+    staff_id: str,
+    appointment_id: str,
+    start: datetime,
+    end: datetime,
+    days: Optional[list] = None
+) -> None:
+    """Release the interval ``[start, end)`` claimed by an appointment."""
+    await db.slot_reservations.update_many(
+        {
+            "business_id": business_id,
+            "staff_id": staff_id,
+            "day": {"$in": days or reservation_days(start, end)}
+        },
+        {"$pull": {"intervals": {"appointment_id": appointment_id, "start": start, "end": end}}}
+    )
+
+async def reserved_intervals(db, business_id: str, staff_id: str, start: datetime, end: datetime) -> list:
+    """``(start, end)`` of the intervals held for a staff member that overlap ``[start, end)``."""
+    start, end = _as_utc(start), _as_utc(end)
+    first, last = start.date(), (end - timedelta(microseconds=1)).date()
+    intervals = []
+    async for guard in db.slot_reservations.find(
+        {
+            "business_id": business_id,
+            "staff_id": staff_id,
+            "day": {"$gte": first.isoformat(), "$lte": last.isoformat()}
+        },
+        {"_id": 0, "intervals": 1}
+    ):
+        for interval in guard["intervals"]:
+            held = (_as_utc(interval["start"]), _as_utc(interval["end"]))
+            if held[0] < end and held[1] > start:
+                intervals.append(held)
+    return intervals
+
+async def backfill_reservations(db, batch_size: int = 500) -> int:
+    """Claim the intervals of scheduled future appointments.
+
+    Covers appointments created before the guard documents existed; run
+    once by the reservations_v1 migration. Each batch is checked again
+    after it is written, and the interval of an appointment canceled or
+    moved since it was read is released. A change landing after that
+    check releases the interval itself, so no guard is left without an
+    appointment.
+    """
+    cursor = db.appointments.find(
+        {"status": "scheduled", "end_time": {"$gt": datetime.now(timezone.utc)}},
+        {"_id": 0, "appointment_id": 1, "business_id": 1, "staff_id": 1, "start_time": 1, "end_time": 1}
+    )
+
+    batch = []
+    count = 0
+    async for apt in cursor:
+        batch.append(apt)
+        count += 1
+        if len(batch) >= batch_size:
+            await _backfill_batch(db, batch)
+            batch = []
+    if batch:
+        await _backfill_batch(db, batch)
+    return count
+
+async def _backfill_batch(db, appointments: list) -> None:
+    operations = []
+    for apt in appointments:
+        interval = {"appointment_id": apt["appointment_id"], "start": apt["start_time"], "end": apt["end_time"]}
+        for day in reservation_days(apt["start_time"], apt["end_time"]):
+            operations.append(UpdateOne(
+                {"business_id": apt["business_id"], "staff_id": apt["staff_id"], "day": day},
+                {"$addToSet": {"intervals": interval}},
+                upsert=True
+            ))
+    await db.slot_reservations.bulk_write(operations, ordered=False)
+
+    fields = ("status", "staff_id", "start_time", "end_time")
+    current = {
+        apt["appointment_id"]: apt
+        async for apt in db.appointments.find(
+            {"appointment_id": {"$in": [apt["appointment_id"] for apt in appointments]}},
+            {"_id": 0, "appointment_id": 1, **{field: 1 for field in fields}}
+        )
+    }
+    for apt in appointments:
+        latest = current.get(apt["appointment_id"])
+        if latest and latest["status"] == "scheduled" and all(latest[field] == apt[field] for field in fields[1:]):
+            continue
+        await release_slot(
+            db, apt["business_id"], apt["staff_id"], apt["appointment_id"], apt["start_time"], apt["end_time"]
+        )
@@ -0,0 +1,39 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# orjson encodes datetimes, dates and UUIDs natively, in the same ISO 8601
+# form jsonable_encoder produces, and is several times faster than the
+# stdlib encoder on datetime-heavy lists.
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        return float(value)
+    # ObjectId and anything else orjson does not know
+    return str(value)
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; the application default.
+
+    Handlers that return one directly also skip FastAPI's jsonable_encoder
+    pass, which is where most of the time of a large list goes.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def model_response(model: type, document: dict, status_code: int = 200) -> FastJSONResponse:
+    """Respond with ``document`` shaped as ``model`` without validating it again.
+
+    For documents the handler has just built and written, where validating
+    them against ``response_model`` would only repeat work.
+    """
+    return FastJSONResponse(model.model_construct(**document).model_dump(), status_code=status_code)
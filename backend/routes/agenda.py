@@ -1,16 +1,158 @@
-from fastapi import APIRouter, HTTPException, Request, Query
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pydantic import BaseModel, Field, ValidationError
 from datetime import datetime, timezone, timedelta, date, time
 from typing import Optional, List
+import asyncio
+import json
+import os
+import tempfile
 import uuid
+from bisect import bisect_right
+from cache import TTLCache
+from responses import FastJSONResponse, model_response
 from .auth import get_authenticated_user
+from middleware.tenant import TenantContext, get_tenant, invalidate_ownership
+from middleware.billing import billing_status_for_user, claim_appointment_quota, release_appointment_quota
+from availability import find_overlaps, generate_slots, merge_intervals
+from reservations import reserve_many, reserve_slot, release_slot, reserved_intervals
+from pagination import encode_cursor, decode_cursor, keyset_filter
+from fieldsets import parse_fields, fields_projection, pick
+from streaming import ndjson_line, ndjson_stream
+from imports import import_clients, read_csv_rows, read_xlsx_rows
+from exports import (
+    APPOINTMENT_COLUMNS, CLIENT_COLUMNS,
+    chunked, csv_stream, join_appointments, merge_sorted, ndjson_chunks
+)
+from search import client_search_keys, normalize_email, query_terms, search_filter, rank
+from counters import (
+    day_key, month_key, load_counters, sum_counters,
+    record_appointment_change, record_appointment_changes
+)
+from reminders import reminder_fields, reminder_update
+from recurrence import (
+    FREQUENCIES, expand_series, is_occurrence, load_occurrences, occurrence_bounds,
+    original_starts, parse_occurrence_key, split_occurrence_id
+)
 
 router = APIRouter(prefix="/agenda", tags=["agenda"])
 
+# Public booking slots start on this grid
+SLOT_STEP = timedelta(minutes=30)
+# Longest range served by the public availability endpoint
+MAX_AVAILABILITY_DAYS = 31
+# Keyset pagination
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+CLIENT_SORT_KEYS = ["name", "client_id"]
+# Client documents as returned by the API
+CLIENT_PROJECTION = {"_id": 0, "search_keys": 0}
+# Matches read before ranking in client search
+SEARCH_CANDIDATES = 200
+# Rows accepted by one bulk import request
+MAX_IMPORT_ROWS = 5000
+# Uploads larger than this are spooled to disk
+UPLOAD_SPOOL_SIZE = 1024 * 1024
+# Occurrences listed when a date range is open-ended
+SERIES_LIST_HORIZON = timedelta(days=90)
+# How far ahead a new series is checked for conflicts
+SERIES_CONFLICT_HORIZON = timedelta(days=366)
+# Public booking page: browser/CDN freshness and the per-slug payload cache
+PUBLIC_PAGE_MAX_AGE = int(os.environ.get("PUBLIC_PAGE_MAX_AGE", "60"))
+public_page_cache = TTLCache(
+    maxsize=int(os.environ.get("PUBLIC_PAGE_CACHE_SIZE", "2000")),
+    ttl=float(os.environ.get("PUBLIC_PAGE_CACHE_TTL", "30")),
+)
+
 # Helper
 def get_db(request: Request):
     return request.app.state.db
 
+def _forget_public_page(business_id: str) -> None:
+    public_page_cache.discard_where(lambda slug, page: page["business_id"] == business_id)
+
+async def _bump_version(db, business_id: str) -> None:
+    """Mark the public page of a business as changed."""
+    await db.businesses.update_one({"business_id": business_id}, {"$inc": {"version": 1}})
+    _forget_public_page(business_id)
+
+def _public_etag(business: dict) -> str:
+    return f'"{business["business_id"]}-{business.get("version", 0)}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def _fieldset(fields: Optional[str], allowed: set, required: list) -> Optional[list]:
+    """Parse a ``fields=`` query parameter, or fail with a 400."""
+    try:
+        return parse_fields(fields, allowed, required)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+def _as_utc(value: datetime) -> datetime:
+    # Mongo returns naive datetimes that are stored as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+async def _reserve_or_conflict(db, appointment: dict, detail: str) -> None:
+    """Claim the appointment's interval or fail with a 400."""
+    reserved = await reserve_slot(
+        db,
+        appointment["business_id"],
+        appointment["staff_id"],
+        appointment["appointment_id"],
+        appointment["start_time"],
+        appointment["end_time"]
+    )
+    if not reserved:
+        raise HTTPException(status_code=400, detail=detail)
+    
+    # Series occurrences hold no reservation, so they are checked separately
+    if await _series_overlap(
+        db, appointment["business_id"], appointment["staff_id"],
+        appointment["start_time"], appointment["end_time"]
+    ):
+        await _release_reserved(db, appointment)
+        raise HTTPException(status_code=400, detail=detail)
+
+async def _series_overlap(
+    db,
+    business_id: str,
+    staff_id: str,
+    start: datetime,
+    end: datetime,
+    ignore_id: Optional[str] = None
+) -> bool:
+    """Whether a scheduled series occurrence of the staff member overlaps ``[start, end)``."""
+    occurrences = await load_occurrences(db, business_id, start, end, [staff_id])
+    return any(
+        occurrence["status"] == "scheduled" and occurrence["appointment_id"] != ignore_id
+        for occurrence in occurrences
+    )
+
+async def _claim_quota(db, business_id: str, billing_status: dict, count: int = 1) -> None:
+    """Count new appointments against the monthly plan quota or fail with a 403."""
+    quota = await claim_appointment_quota(db, business_id, billing_status, count)
+    if not quota["allowed"]:
+        raise HTTPException(status_code=403, detail="Monthly appointment limit reached for this plan")
+
+async def _release_reserved(db, appointment: dict) -> None:
+    """Give back the interval claimed by ``_reserve_or_conflict``."""
+    await release_slot(
+        db,
+        appointment["business_id"],
+        appointment["staff_id"],
+        appointment["appointment_id"],
+        appointment["start_time"],
+        appointment["end_time"]
+    )
+
 # ==================== MODELS ====================
 
 class BusinessCreate(BaseModel):
@@ -110,11 +252,34 @@ class AppointmentCreate(BaseModel):
     start_time: datetime
     notes: Optional[str] = None
 
+class AppointmentImport(AppointmentCreate):
+    status: str = "scheduled"  # scheduled, completed, canceled
+
 class AppointmentUpdate(BaseModel):
     start_time: Optional[datetime] = None
     status: Optional[str] = None  # scheduled, completed, canceled
     notes: Optional[str] = None
 
+class AppointmentSeriesCreate(AppointmentCreate):
+    frequency: str  # weekly, biweekly, monthly
+    until: Optional[datetime] = None
+    count: Optional[int] = Field(None, ge=1)
+
+class AppointmentSeries(BaseModel):
+    series_id: str
+    business_id: str
+    client_id: str
+    service_id: str
+    staff_id: str
+    start_time: datetime
+    duration: int
+    frequency: str
+    until: Optional[datetime] = None
+    count: Optional[int] = None
+    notes: Optional[str] = None
+    overrides: dict = Field(default_factory=dict)
+    created_at: datetime
+
 class Appointment(BaseModel):
     appointment_id: str
     business_id: str
@@ -135,6 +300,13 @@ class PublicBookingCreate(BaseModel):
     staff_id: str
     start_time: datetime
 
+# Fields the list endpoints can be narrowed to with ``fields=``
+APPOINTMENT_FIELDS = set(Appointment.model_fields) | {"series_id", "updated_at"}
+CLIENT_FIELDS = set(Client.model_fields) | {"updated_at"}
+SERVICE_FIELDS = set(Service.model_fields) | {"updated_at"}
+STAFF_FIELDS = set(Staff.model_fields)
+FIELDS_DESCRIPTION = "Comma-separated fields to return; all fields when omitted"
+
 # ==================== BUSINESS ROUTES ====================
 
 @router.get("/businesses")
@@ -175,7 +347,11 @@ async def create_business(request: Request, data: BusinessCreate):
         "created_at": datetime.now(timezone.utc)
     }
     
-    await db.businesses.insert_one(business)
+    # Requests racing past the check above meet the unique slug index
+    try:
+        await db.businesses.insert_one(business)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Business slug already exists")
     
     # Create owner as staff member
     staff = {
@@ -190,16 +366,16 @@ async def create_business(request: Request, data: BusinessCreate):
     }
     await db.staff.insert_one(staff)
     
-    return Business(**business)
+    # Built just above, so skip validating it against response_model again
+    return model_response(Business, business)
 
 @router.get("/businesses/{business_id}")
-async def get_business(request: Request, business_id: str):
+async def get_business(business_id: str, tenant: TenantContext = Depends(get_tenant)):
     """Get business details."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
+    db = tenant.db
     
     business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]},
+        {"business_id": business_id},
         {"_id": 0}
     )
     
@@ -209,61 +385,53 @@ async def get_business(request: Request, business_id: str):
     return business
 
 @router.put("/businesses/{business_id}")
-async def update_business(request: Request, business_id: str, data: BusinessUpdate):
+async def update_business(
+    business_id: str,
+    data: BusinessUpdate,
+    tenant: TenantContext = Depends(get_tenant)
+):
     """Update business settings."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
     
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     update_data["updated_at"] = datetime.now(timezone.utc)
     
     await db.businesses.update_one(
         {"business_id": business_id},
-        {"$set": update_data}
+        {"$set": update_data, "$inc": {"version": 1}}
     )
+    invalidate_ownership(business_id)
+    _forget_public_page(business_id)
     
     return {"message": "Business updated"}
 
 # ==================== STAFF ROUTES ====================
 
 @router.get("/businesses/{business_id}/staff")
-async def list_staff(request: Request, business_id: str):
+async def list_staff(
+    business_id: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    tenant: TenantContext = Depends(get_tenant)
+):
     """List all staff for a business."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    # Verify ownership
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
+    fields = _fieldset(fields, STAFF_FIELDS, ["staff_id"])
     
     staff = await db.staff.find(
         {"business_id": business_id},
-        {"_id": 0}
+        fields_projection(fields, {"_id": 0})
     ).to_list(100)
     
     return staff
 
 @router.post("/businesses/{business_id}/staff")
-async def add_staff(request: Request, business_id: str, data: StaffCreate):
+async def add_staff(
+    business_id: str,
+    data: StaffCreate,
+    tenant: TenantContext = Depends(get_tenant)
+):
     """Add a staff member."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
     
     staff = {
         "staff_id": f"staff_{uuid.uuid4().hex[:12]}",
@@ -277,90 +445,207 @@ async def add_staff(request: Request, business_id: str, data: StaffCreate):
     }
     
     await db.staff.insert_one(staff)
+    await _bump_version(db, business_id)
     return Staff(**staff)
 
 # ==================== CLIENT ROUTES ====================
 
 @router.get("/businesses/{business_id}/clients")
-async def list_clients(request: Request, business_id: str):
-    """List all clients for a business."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+async def list_clients(
+    business_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """List clients for a business.
+    
+    With ``limit`` the clients are paginated by (name, client_id) and the
+    response is ``{"items": [...], "next_cursor": ...}``; pass ``next_cursor``
+    back as ``after`` for the next page. Without it the legacy plain list
+    is returned.
+    """
+    db = tenant.db
+    # The sort keys are always read, to build the cursor
+    fields = _fieldset(fields, CLIENT_FIELDS, CLIENT_SORT_KEYS)
+    projection = fields_projection(fields, CLIENT_PROJECTION)
+    
+    if limit is None and after is None:
+        clients = await db.clients.find(
+            {"business_id": business_id},
+            projection
+        ).to_list(1000)
+        return FastJSONResponse(clients)
+    
+    limit = limit or DEFAULT_PAGE_SIZE
+    query = {"business_id": business_id}
+    if after:
+        try:
+            query.update(keyset_filter(CLIENT_SORT_KEYS, decode_cursor(after, len(CLIENT_SORT_KEYS))))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     
+    # Fetch one extra document to know whether another page exists
     clients = await db.clients.find(
+        query,
+        projection
+    ).sort([(key, 1) for key in CLIENT_SORT_KEYS]).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(clients) > limit:
+        clients = clients[:limit]
+        next_cursor = encode_cursor([clients[-1][key] for key in CLIENT_SORT_KEYS])
+    
+    return FastJSONResponse({"items": clients, "next_cursor": next_cursor})
+
+@router.get("/businesses/{business_id}/clients/stream")
+async def stream_clients(business_id: str, tenant: TenantContext = Depends(get_tenant)):
+    """Stream every client of a business as NDJSON, one document per line."""
+    cursor = tenant.db.clients.find(
         {"business_id": business_id},
-        {"_id": 0}
-    ).to_list(1000)
+        CLIENT_PROJECTION
+    ).sort([(key, 1) for key in CLIENT_SORT_KEYS]).batch_size(500)
     
-    return clients
+    return StreamingResponse(ndjson_stream(cursor), media_type="application/x-ndjson")
+
+@router.get("/businesses/{business_id}/clients/export")
+async def export_clients(
+    business_id: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Stream every client of a business as CSV or NDJSON."""
+    cursor = tenant.db.clients.find(
+        {"business_id": business_id},
+        CLIENT_PROJECTION
+    ).sort([(key, 1) for key in CLIENT_SORT_KEYS]).batch_size(500)
+    
+    return _export_response(chunked(cursor), CLIENT_COLUMNS, format, "clients")
+
+@router.get("/businesses/{business_id}/clients/search")
+async def search_clients(
+    business_id: str,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Search clients by name, email or phone prefix, best matches first."""
+    terms = query_terms(q)
+    if not terms:
+        return []
+    
+    # Rank a bounded candidate set read through the search_keys index
+    candidates = await tenant.db.clients.find(
+        search_filter(business_id, terms),
+        CLIENT_PROJECTION
+    ).limit(SEARCH_CANDIDATES).to_list(SEARCH_CANDIDATES)
+    
+    candidates.sort(key=lambda client: rank(client, terms))
+    return FastJSONResponse(candidates[:limit])
 
 @router.post("/businesses/{business_id}/clients")
-async def create_client(request: Request, business_id: str, data: ClientCreate):
+async def create_client(
+    business_id: str,
+    data: ClientCreate,
+    tenant: TenantContext = Depends(get_tenant)
+):
     """Create a new client."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
     
     client = {
         "client_id": f"client_{uuid.uuid4().hex[:12]}",
         "business_id": business_id,
         "name": data.name,
-        "email": data.email,
+        "email": normalize_email(data.email),
         "phone": data.phone,
         "notes": data.notes,
+        "search_keys": client_search_keys(data.name, data.email, data.phone),
         "created_at": datetime.now(timezone.utc)
     }
     
     await db.clients.insert_one(client)
     return Client(**client)
 
+@router.post("/businesses/{business_id}/clients/import")
+async def import_clients_file(
+    business_id: str,
+    file: UploadFile = File(...),
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Import clients from a CSV or XLSX upload with name, email, phone and notes columns.
+    
+    Streams NDJSON back: one line per duplicate or rejected row, then a
+    summary. Rows sharing an email with an existing client are skipped.
+    """
+    filename = (file.filename or "").lower()
+    if filename.endswith(".xlsx"):
+        read_rows = read_xlsx_rows
+    elif filename.endswith(".csv") or file.content_type == "text/csv":
+        read_rows = read_csv_rows
+    else:
+        raise HTTPException(status_code=415, detail="Upload a .csv or .xlsx file")
+    
+    # The upload is closed once this handler returns, before the response
+    # body streams, so copy it to a spooled file the stream owns
+    upload = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+    while chunk := await file.read(UPLOAD_SPOOL_SIZE):
+        upload.write(chunk)
+    upload.seek(0)
+    
+    async def results():
+        # import_clients ends with a done or failed summary line either way
+        try:
+            async for result in import_clients(tenant.db, business_id, read_rows(upload)):
+                yield ndjson_line(result)
+        finally:
+            upload.close()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @router.put("/businesses/{business_id}/clients/{client_id}")
-async def update_client(request: Request, business_id: str, client_id: str, data: ClientUpdate):
+async def update_client(
+    business_id: str,
+    client_id: str,
+    data: ClientUpdate,
+    tenant: TenantContext = Depends(get_tenant)
+):
     """Update a client."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
     
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+    if "email" in update_data:
+        update_data["email"] = normalize_email(update_data["email"])
     update_data["updated_at"] = datetime.now(timezone.utc)
     
-    result = await db.clients.update_one(
+    client = await db.clients.find_one_and_update(
         {"client_id": client_id, "business_id": business_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0, "name": 1, "email": 1, "phone": 1},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
+    # Keep the search keys in step with the searchable fields
+    if {"name", "email", "phone"} & update_data.keys():
+        await db.clients.update_one(
+            {"client_id": client_id, "business_id": business_id},
+            {"$set": {"search_keys": client_search_keys(
+                client.get("name"), client.get("email"), client.get("phone")
+            )}}
+        )
+    
     return {"message": "Client updated"}
 
 @router.delete("/businesses/{business_id}/clients/{client_id}")
-async def delete_client(request: Request, business_id: str, client_id: str):
+async def delete_client(
+    business_id: str,
+    client_id: str,
+    tenant: TenantContext = Depends(get_tenant)
+):
     """Delete a client."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
     
     result = await db.clients.delete_one(
         {"client_id": client_id, "business_id": business_id}
@@ -372,56 +657,68 @@ async def delete_client(request: Request, business_id: str, client_id: str):
     return {"message": "Client deleted"}
 
 @router.get("/businesses/{business_id}/clients/{client_id}/history")
-async def get_client_history(request: Request, business_id: str, client_id: str):
-    """Get client appointment history."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+async def get_client_history(
+    business_id: str,
+    client_id: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Get client appointment history, the latest 100 appointments first.
     
-    appointments = await db.appointments.find(
-        {"business_id": business_id, "client_id": client_id},
-        {"_id": 0}
-    ).sort("start_time", -1).to_list(100)
+    Occurrences of the client's series are included; a series without an
+    end only up to ``SERIES_LIST_HORIZON`` past now or its start.
+    """
+    db = tenant.db
+    # start_time is always read, to merge in the occurrences
+    fields = _fieldset(fields, APPOINTMENT_FIELDS, ["appointment_id", "start_time"])
     
-    return appointments
+    now = datetime.now(timezone.utc)
+    appointments, series_list = await asyncio.gather(
+        db.appointments.find(
+            {"business_id": business_id, "client_id": client_id},
+            fields_projection(fields, {"_id": 0})
+        ).sort("start_time", -1).to_list(100),
+        db.appointment_series.find(
+            {"business_id": business_id, "client_id": client_id}, {"_id": 0}
+        ).to_list(None)
+    )
+    for series in series_list:
+        first_start = _as_utc(series["first_start"])
+        last_end = series["last_end"] or max(now, first_start) + SERIES_LIST_HORIZON
+        appointments.extend(
+            pick(occurrence, fields) for occurrence in expand_series(series, first_start, last_end)
+        )
+    appointments.sort(key=lambda apt: _as_utc(apt["start_time"]), reverse=True)
+    
+    return FastJSONResponse(appointments[:100])
 
 # ==================== SERVICE ROUTES ====================
 
 @router.get("/businesses/{business_id}/services")
-async def list_services(request: Request, business_id: str):
+async def list_services(
+    business_id: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    tenant: TenantContext = Depends(get_tenant)
+):
     """List all services for a business."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
+    fields = _fieldset(fields, SERVICE_FIELDS, ["service_id"])
     
     services = await db.services.find(
         {"business_id": business_id},
-        {"_id": 0}
+        fields_projection(fields, {"_id": 0})
     ).to_list(100)
     
     return services
 
 @router.post("/businesses/{business_id}/services")
-async def create_service(request: Request, business_id: str, data: ServiceCreate):
+async def create_service(
+    business_id: str,
+    data: ServiceCreate,
+    tenant: TenantContext = Depends(get_tenant)
+):
     """Create a new service."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
     
     service = {
         "service_id": f"svc_{uuid.uuid4().hex[:12]}",
@@ -435,19 +732,18 @@ async def create_service(request: Request, business_id: str, data: ServiceCreate
     }
     
     await db.services.insert_one(service)
+    await _bump_version(db, business_id)
     return Service(**service)
 
 @router.put("/businesses/{business_id}/services/{service_id}")
-async def update_service(request: Request, business_id: str, service_id: str, data: ServiceUpdate):
+async def update_service(
+    business_id: str,
+    service_id: str,
+    data: ServiceUpdate,
+    tenant: TenantContext = Depends(get_tenant)
+):
     """Update a service."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
     
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     update_data["updated_at"] = datetime.now(timezone.utc)
@@ -460,58 +756,197 @@ async def update_service(request: Request, business_id: str, service_id: str, da
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Service not found")
     
+    await _bump_version(db, business_id)
     return {"message": "Service updated"}
 
 # ==================== APPOINTMENT ROUTES ====================
 
+def _date_range(start_date: Optional[str], end_date: Optional[str]) -> tuple:
+    try:
+        return (
+            datetime.fromisoformat(start_date) if start_date else None,
+            datetime.fromisoformat(end_date) if end_date else None
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be ISO 8601")
+
+def _statuses(status: Optional[str]) -> list:
+    return [value.strip() for value in (status or "").split(",") if value.strip()]
+
+def _appointment_query(
+    business_id: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    status: Optional[str]
+) -> dict:
+    """Filter for the appointment list and export query parameters."""
+    query = {"business_id": business_id}
+    
+    range_start, range_end = _date_range(start_date, end_date)
+    if range_start:
+        query["start_time"] = {"$gte": range_start}
+    if range_end:
+        query.setdefault("start_time", {})["$lte"] = range_end
+    statuses = _statuses(status)
+    if statuses:
+        query["status"] = statuses[0] if len(statuses) == 1 else {"$in": statuses}
+    
+    return query
+
+def _export_response(rows, columns: list, format: str, name: str) -> StreamingResponse:
+    if format == "ndjson":
+        body, media_type = ndjson_chunks(rows, columns), "application/x-ndjson"
+    else:
+        body, media_type = csv_stream(rows, columns), "text/csv; charset=utf-8"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'}
+    )
+
 @router.get("/businesses/{business_id}/appointments")
 async def list_appointments(
-    request: Request,
     business_id: str,
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
-    status: Optional[str] = Query(None)
+    status: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    tenant: TenantContext = Depends(get_tenant)
 ):
-    """List appointments for a business."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
+    """List appointments for a business, the first 500 by start time.
+    
+    Occurrences of recurring series are expanded into the list; an open-ended
+    range only expands them for ``SERIES_LIST_HORIZON`` (from now without a
+    start date). Page through longer ranges with ``start_date``.
+    """
+    # start_time is always read, to merge in the occurrences
+    fields = _fieldset(fields, APPOINTMENT_FIELDS, ["appointment_id", "start_time"])
+    return FastJSONResponse(
+        await _find_appointments(tenant.db, business_id, start_date, end_date, status, fields)
+    )
+
+async def _find_occurrences(
+    db,
+    business_id: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    status: Optional[str]
+) -> list:
+    """Series occurrences matching the appointment list and export parameters, by start time.
+    
+    Open-ended ranges are cut at ``SERIES_LIST_HORIZON``, starting from now
+    when there is no start date.
+    """
+    range_start, range_end = _date_range(start_date, end_date)
+    if range_start is None:
+        range_start = range_end - SERIES_LIST_HORIZON if range_end else datetime.now(timezone.utc)
+    if range_end is None:
+        range_end = range_start + SERIES_LIST_HORIZON
+    range_start, range_end = _as_utc(range_start), _as_utc(range_end)
+    statuses = _statuses(status)
+    
+    occurrences = await load_occurrences(db, business_id, range_start, range_end + timedelta(microseconds=1))
+    return [
+        occurrence for occurrence in occurrences
+        if range_start <= occurrence["start_time"] <= range_end
+        and (not statuses or occurrence["status"] in statuses)
+    ]
+
+async def _find_appointments(
+    db,
+    business_id: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    status: Optional[str],
+    fields: Optional[list] = None
+) -> list:
+    appointments, occurrences = await asyncio.gather(
+        db.appointments.find(
+            _appointment_query(business_id, start_date, end_date, status),
+            fields_projection(fields, {"_id": 0})
+        ).sort("start_time", 1).to_list(500),
+        _find_occurrences(db, business_id, start_date, end_date, status)
+    )
+    # With 500 appointments read there may be more after the last one, so
+    # occurrences past it would leave a gap; the list stays a prefix
+    if len(appointments) == 500:
+        last_start = _as_utc(appointments[-1]["start_time"])
+        occurrences = [occurrence for occurrence in occurrences if occurrence["start_time"] <= last_start]
+    appointments.extend(pick(occurrence, fields) for occurrence in occurrences)
+    appointments.sort(key=lambda apt: _as_utc(apt["start_time"]))
+    
+    return appointments[:500]
+
+@router.get("/businesses/{business_id}/calendar")
+async def get_calendar(
+    business_id: str,
+    start: Optional[str] = Query(None),
+    end: Optional[str] = Query(None),
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Everything the calendar view needs for a range, in one request.
+    
+    Appointments as in ``list_appointments``, the services and staff, and
+    only the clients those appointments reference.
+    """
+    db = tenant.db
+    
+    async def appointments_and_clients():
+        appointments = await _find_appointments(db, business_id, start, end, None)
+        client_ids = list({apt["client_id"] for apt in appointments})
+        if not client_ids:
+            return appointments, []
+        clients = await db.clients.find(
+            {"business_id": business_id, "client_id": {"$in": client_ids}},
+            CLIENT_PROJECTION
+        ).to_list(None)
+        return appointments, clients
+    
+    # Services and staff load while the appointments and their clients do
+    (appointments, clients), services, staff = await asyncio.gather(
+        appointments_and_clients(),
+        db.services.find({"business_id": business_id}, {"_id": 0}).to_list(100),
+        db.staff.find({"business_id": business_id}, {"_id": 0}).to_list(100)
     )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
-    
-    query = {"business_id": business_id}
     
-    if start_date:
-        query["start_time"] = {"$gte": datetime.fromisoformat(start_date)}
-    if end_date:
-        if "start_time" in query:
-            query["start_time"]["$lte"] = datetime.fromisoformat(end_date)
-        else:
-            query["start_time"] = {"$lte": datetime.fromisoformat(end_date)}
-    if status:
-        query["status"] = status
+    return FastJSONResponse({
+        "appointments": appointments,
+        "clients": clients,
+        "services": services,
+        "staff": staff
+    })
+
+@router.get("/businesses/{business_id}/appointments/export")
+async def export_appointments(
+    business_id: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="One status, or several separated by commas"),
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Stream appointments as CSV or NDJSON, with client and service names joined in.
     
-    appointments = await db.appointments.find(
-        query,
+    Series occurrences are merged in by start time, as in ``list_appointments``.
+    """
+    cursor = tenant.db.appointments.find(
+        _appointment_query(business_id, start_date, end_date, status),
         {"_id": 0}
-    ).sort("start_time", 1).to_list(500)
+    ).sort("start_time", 1).batch_size(500)
+    occurrences = await _find_occurrences(tenant.db, business_id, start_date, end_date, status)
     
-    return appointments
+    chunks = merge_sorted(chunked(cursor), occurrences, key=lambda apt: _as_utc(apt["start_time"]))
+    rows = join_appointments(tenant.db, business_id, chunks)
+    return _export_response(rows, APPOINTMENT_COLUMNS, format, "appointments")
 
 @router.post("/businesses/{business_id}/appointments")
-async def create_appointment(request: Request, business_id: str, data: AppointmentCreate):
+async def create_appointment(
+    business_id: str,
+    data: AppointmentCreate,
+    tenant: TenantContext = Depends(get_tenant)
+):
     """Create a new appointment."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
     
     # Get service to calculate end time
     service = await db.services.find_one(
@@ -522,21 +957,6 @@ async def create_appointment(request: Request, business_id: str, data: Appointme
     
     end_time = data.start_time + timedelta(minutes=service["duration"])
     
-    # Check for double booking
-    conflict = await db.appointments.find_one({
-        "business_id": business_id,
-        "staff_id": data.staff_id,
-        "status": "scheduled",
-        "$or": [
-            {"start_time": {"$lt": end_time, "$gte": data.start_time}},
-            {"end_time": {"$gt": data.start_time, "$lte": end_time}},
-            {"start_time": {"$lte": data.start_time}, "end_time": {"$gte": end_time}}
-        ]
-    })
-    
-    if conflict:
-        raise HTTPException(status_code=400, detail="Time slot not available")
-    
     appointment = {
         "appointment_id": f"apt_{uuid.uuid4().hex[:12]}",
         "business_id": business_id,
@@ -547,28 +967,244 @@ async def create_appointment(request: Request, business_id: str, data: Appointme
         "end_time": end_time,
         "status": "scheduled",
         "notes": data.notes,
-        "created_at": datetime.now(timezone.utc)
+        "created_at": datetime.now(timezone.utc),
+        **reminder_fields(data.start_time, "scheduled")
     }
     
-    await db.appointments.insert_one(appointment)
+    # Claim the quota and then the slot atomically, so concurrent bookings
+    # can neither both succeed nor overshoot the plan limit
+    await _claim_quota(db, business_id, await tenant.billing_status())
+    try:
+        await _reserve_or_conflict(db, appointment, "Time slot not available")
+    except HTTPException:
+        await release_appointment_quota(db, business_id)
+        raise
+    
+    try:
+        await db.appointments.insert_one(appointment)
+    except Exception:
+        await _release_reserved(db, appointment)
+        await release_appointment_quota(db, business_id)
+        raise
+    
+    await record_appointment_change(db, business_id, after=(appointment["start_time"], "scheduled"))
     return Appointment(**appointment)
 
+async def _read_import_rows(request: Request) -> list:
+    """Rows of a bulk import body: a JSON array, or NDJSON when so declared.
+    
+    NDJSON lines that are not valid JSON are kept as ``ValueError`` rows so
+    they can be reported with the rest.
+    """
+    if "ndjson" not in request.headers.get("content-type", ""):
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array")
+        if len(rows) > MAX_IMPORT_ROWS:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_IMPORT_ROWS} rows per import")
+        return rows
+    
+    rows = []
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                try:
+                    rows.append(json.loads(line))
+                except ValueError as exc:
+                    rows.append(ValueError(f"Invalid JSON: {exc}"))
+        if len(rows) > MAX_IMPORT_ROWS:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_IMPORT_ROWS} rows per import")
+    if buffer.strip():
+        try:
+            rows.append(json.loads(buffer))
+        except ValueError as exc:
+            rows.append(ValueError(f"Invalid JSON: {exc}"))
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_IMPORT_ROWS} rows per import")
+    return rows
+
+def _validation_message(exc: ValidationError) -> str:
+    error = exc.errors()[0]
+    location = ".".join(str(part) for part in error["loc"])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+@router.post("/businesses/{business_id}/appointments/bulk")
+async def import_appointments(
+    request: Request,
+    business_id: str,
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Create many appointments from a JSON array or an NDJSON body.
+    
+    Services are fetched once and conflicts, within the batch and with
+    existing appointments, are found in memory per staff member. Rows are
+    independent: the response reports each row as created or with its error.
+    """
+    db = tenant.db
+    raw_rows = await _read_import_rows(request)
+    results = [None] * len(raw_rows)
+    
+    parsed = {}
+    for row, raw in enumerate(raw_rows):
+        if isinstance(raw, ValueError):
+            results[row] = {"row": row, "status": "error", "error": str(raw)}
+            continue
+        try:
+            data = AppointmentImport.model_validate(raw)
+        except ValidationError as exc:
+            results[row] = {"row": row, "status": "error", "error": _validation_message(exc)}
+            continue
+        if data.status not in ("scheduled", "completed", "canceled"):
+            results[row] = {"row": row, "status": "error", "error": f"Invalid status: {data.status}"}
+            continue
+        parsed[row] = data
+    
+    service_ids = list({data.service_id for data in parsed.values()})
+    services = {
+        service["service_id"]: service
+        for service in await db.services.find(
+            {"business_id": business_id, "service_id": {"$in": service_ids}},
+            {"_id": 0, "service_id": 1, "duration": 1}
+        ).to_list(None)
+    }
+    
+    now = datetime.now(timezone.utc)
+    appointments = {}
+    for row, data in parsed.items():
+        service = services.get(data.service_id)
+        if not service:
+            results[row] = {"row": row, "status": "error", "error": "Service not found"}
+            continue
+        start_time = _as_utc(data.start_time)
+        appointments[row] = {
+            "appointment_id": f"apt_{uuid.uuid4().hex[:12]}",
+            "business_id": business_id,
+            "client_id": data.client_id,
+            "service_id": data.service_id,
+            "staff_id": data.staff_id,
+            "start_time": start_time,
+            "end_time": start_time + timedelta(minutes=service["duration"]),
+            "status": data.status,
+            "notes": data.notes,
+            "created_at": now,
+            **reminder_fields(start_time, data.status, now)
+        }
+    
+    # The quota is claimed for every valid row up front; rows that fail
+    # later give their share back below
+    claimed = len(appointments)
+    if claimed:
+        quota = await claim_appointment_quota(db, business_id, await tenant.billing_status(), claimed)
+        if not quota["allowed"]:
+            for row in appointments:
+                results[row] = {"row": row, "status": "error", "error": "Monthly appointment limit reached for this plan"}
+            appointments, claimed = {}, 0
+    
+    # Only scheduled appointments hold their slot
+    scheduled = {row: apt for row, apt in appointments.items() if apt["status"] == "scheduled"}
+    if scheduled:
+        staff_ids = list({apt["staff_id"] for apt in scheduled.values()})
+        busy = await _load_busy_intervals(
+            db, business_id, staff_ids,
+            min(apt["start_time"] for apt in scheduled.values()),
+            max(apt["end_time"] for apt in scheduled.values())
+        )
+        for staff_id in staff_ids:
+            overlaps = find_overlaps(
+                [
+                    (apt["start_time"], apt["end_time"], row)
+                    for row, apt in scheduled.items() if apt["staff_id"] == staff_id
+                ],
+                busy[staff_id]
+            )
+            for row, blocker in overlaps.items():
+                error = "Overlaps an existing appointment" if blocker is None else f"Overlaps row {blocker}"
+                results[row] = {"row": row, "status": "error", "error": error}
+                del appointments[row]
+                del scheduled[row]
+        
+        # Appointments booked since the read above lose their slot here
+        rejected = await reserve_many(db, business_id, list(scheduled.values()))
+        for row, apt in list(scheduled.items()):
+            if apt["appointment_id"] in rejected:
+                results[row] = {"row": row, "status": "error", "error": "Time slot not available"}
+                del appointments[row]
+                del scheduled[row]
+        
+        # Series occurrences hold no reservation, so series created since
+        # the read above are checked again now the slots are held, as in
+        # _reserve_or_conflict
+        if scheduled:
+            occurrences = await load_occurrences(
+                db, business_id,
+                min(apt["start_time"] for apt in scheduled.values()),
+                max(apt["end_time"] for apt in scheduled.values()),
+                staff_ids
+            )
+            for staff_id in staff_ids:
+                overlaps = find_overlaps(
+                    [
+                        (apt["start_time"], apt["end_time"], row)
+                        for row, apt in scheduled.items() if apt["staff_id"] == staff_id
+                    ],
+                    [
+                        (occurrence["start_time"], occurrence["end_time"]) for occurrence in occurrences
+                        if occurrence["staff_id"] == staff_id and occurrence["status"] == "scheduled"
+                    ]
+                )
+                for row in overlaps:
+                    await _release_reserved(db, scheduled[row])
+                    results[row] = {"row": row, "status": "error", "error": "Time slot not available"}
+                    del appointments[row]
+                    del scheduled[row]
+    
+    rows = list(appointments)
+    if rows:
+        failed = {}
+        try:
+            await db.appointments.insert_many([appointments[row] for row in rows], ordered=False)
+        except BulkWriteError as exc:
+            failed = {rows[error["index"]]: error["errmsg"] for error in exc.details["writeErrors"]}
+        for row, message in failed.items():
+            if row in scheduled:
+                await _release_reserved(db, scheduled[row])
+            results[row] = {"row": row, "status": "error", "error": message}
+            del appointments[row]
+    
+    await release_appointment_quota(db, business_id, claimed - len(appointments))
+    await record_appointment_changes(db, business_id, [
+        (None, (apt["start_time"], apt["status"]), None)
+        for apt in appointments.values()
+    ])
+    for row, apt in appointments.items():
+        results[row] = {"row": row, "status": "created", "appointment_id": apt["appointment_id"]}
+    
+    return {
+        "created": len(appointments),
+        "failed": len(results) - len(appointments),
+        "results": results
+    }
+
 @router.put("/businesses/{business_id}/appointments/{appointment_id}")
 async def update_appointment(
-    request: Request,
     business_id: str,
     appointment_id: str,
-    data: AppointmentUpdate
+    data: AppointmentUpdate,
+    tenant: TenantContext = Depends(get_tenant)
 ):
-    """Update an appointment."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
+    """Update an appointment, or one occurrence of a recurring series."""
+    db = tenant.db
     
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    occurrence = split_occurrence_id(appointment_id)
+    if occurrence:
+        await _override_occurrence(db, business_id, *occurrence, data)
+        return {"message": "Appointment updated"}
     
     appointment = await db.appointments.find_one(
         {"appointment_id": appointment_id, "business_id": business_id}
@@ -578,72 +1214,304 @@ async def update_appointment(
     
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     
-    # If rescheduling, recalculate end time and check conflicts
+    old_start, old_end = appointment["start_time"], appointment["end_time"]
+    was_scheduled = appointment["status"] == "scheduled"
+    start_time, end_time = old_start, old_end
+    
+    # If rescheduling, recalculate end time
     if data.start_time:
         service = await db.services.find_one({"service_id": appointment["service_id"]})
+        start_time = data.start_time
         end_time = data.start_time + timedelta(minutes=service["duration"])
         update_data["end_time"] = end_time
-        
-        # Check conflicts
-        conflict = await db.appointments.find_one({
-            "business_id": business_id,
-            "staff_id": appointment["staff_id"],
-            "appointment_id": {"$ne": appointment_id},
-            "status": "scheduled",
-            "$or": [
-                {"start_time": {"$lt": end_time, "$gte": data.start_time}},
-                {"end_time": {"$gt": data.start_time, "$lte": end_time}},
-                {"start_time": {"$lte": data.start_time}, "end_time": {"$gte": end_time}}
-            ]
-        })
-        
-        if conflict:
+    
+    moved = _as_utc(start_time) != _as_utc(old_start) or _as_utc(end_time) != _as_utc(old_end)
+    new_status = data.status or appointment["status"]
+    # Only a booking that stays (or becomes) scheduled holds its slot; edits
+    # to a canceled or completed appointment never touch the guards
+    if new_status != "scheduled":
+        if was_scheduled:
+            await release_slot(
+                db, business_id, appointment["staff_id"], appointment_id, old_start, old_end
+            )
+    elif moved or not was_scheduled:
+        # Claim the new interval before releasing the old one
+        reserved = await reserve_slot(
+            db, business_id, appointment["staff_id"], appointment_id, start_time, end_time
+        )
+        if not reserved:
+            raise HTTPException(status_code=400, detail="Time slot not available")
+        if await _series_overlap(db, business_id, appointment["staff_id"], start_time, end_time):
+            await release_slot(
+                db, business_id, appointment["staff_id"], appointment_id, start_time, end_time
+            )
             raise HTTPException(status_code=400, detail="Time slot not available")
+        if was_scheduled:
+            await release_slot(
+                db, business_id, appointment["staff_id"], appointment_id, old_start, old_end
+            )
     
     update_data["updated_at"] = datetime.now(timezone.utc)
+    update = {"$set": update_data}
     
-    await db.appointments.update_one(
-        {"appointment_id": appointment_id},
-        {"$set": update_data}
-    )
+    changed = moved or new_status != appointment["status"]
+    if changed:
+        # Move the pending reminder along with the booking
+        reminders = reminder_update(start_time, new_status)
+        update["$set"].update(reminders.get("$set", {}))
+        update["$unset"] = reminders["$unset"]
+    
+    await db.appointments.update_one({"appointment_id": appointment_id}, update)
+    
+    if changed:
+        await record_appointment_change(
+            db, business_id,
+            before=(old_start, appointment["status"]),
+            after=(start_time, new_status)
+        )
     
     return {"message": "Appointment updated"}
 
 @router.delete("/businesses/{business_id}/appointments/{appointment_id}")
-async def cancel_appointment(request: Request, business_id: str, appointment_id: str):
-    """Cancel an appointment."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
+async def cancel_appointment(
+    business_id: str,
+    appointment_id: str,
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Cancel an appointment, or skip one occurrence of a recurring series."""
+    db = tenant.db
     
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    occurrence = split_occurrence_id(appointment_id)
+    if occurrence:
+        await _override_occurrence(db, business_id, *occurrence, AppointmentUpdate(status="canceled"))
+        return {"message": "Appointment canceled"}
     
-    result = await db.appointments.update_one(
+    appointment = await db.appointments.find_one_and_update(
         {"appointment_id": appointment_id, "business_id": business_id},
-        {"$set": {"status": "canceled", "updated_at": datetime.now(timezone.utc)}}
+        {
+            "$set": {"status": "canceled", "updated_at": datetime.now(timezone.utc)},
+            "$unset": {"remind_at": "", "reminder_batch": ""}
+        },
+        projection={"_id": 0, "staff_id": 1, "status": 1, "start_time": 1, "end_time": 1}
     )
     
-    if result.matched_count == 0:
+    if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
+    if appointment["status"] == "scheduled":
+        await release_slot(
+            db, business_id, appointment["staff_id"], appointment_id,
+            appointment["start_time"], appointment["end_time"]
+        )
+    if appointment["status"] != "canceled":
+        await record_appointment_change(
+            db, business_id,
+            before=(appointment["start_time"], appointment["status"]),
+            after=(appointment["start_time"], "canceled")
+        )
+    
     return {"message": "Appointment canceled"}
 
+# ==================== RECURRING SERIES ROUTES ====================
+
+@router.get("/businesses/{business_id}/series")
+async def list_series(business_id: str, tenant: TenantContext = Depends(get_tenant)):
+    """List the recurring appointment series of a business."""
+    series = await tenant.db.appointment_series.find(
+        {"business_id": business_id},
+        {"_id": 0, "first_start": 0, "last_end": 0}
+    ).sort("first_start", 1).to_list(1000)
+    
+    return series
+
+@router.post("/businesses/{business_id}/series")
+async def create_series(
+    business_id: str,
+    data: AppointmentSeriesCreate,
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Create a recurring series, stored once and expanded when read.
+    
+    Occurrences up to ``SERIES_CONFLICT_HORIZON`` ahead are checked against
+    the staff member's appointments, slot reservations and other series in
+    one pass. Later occurrences are not checked against appointments that
+    already exist; appointments booked later are checked against the series.
+    """
+    db = tenant.db
+    
+    if data.frequency not in FREQUENCIES:
+        raise HTTPException(status_code=400, detail=f"frequency must be one of {', '.join(FREQUENCIES)}")
+    start_time = _as_utc(data.start_time)
+    if data.until and _as_utc(data.until) < start_time:
+        raise HTTPException(status_code=400, detail="'until' must not be before start_time")
+    
+    service, business = await asyncio.gather(
+        db.services.find_one({"service_id": data.service_id, "business_id": business_id}),
+        db.businesses.find_one({"business_id": business_id}, {"_id": 0, "timezone": 1})
+    )
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    
+    series = {
+        "series_id": f"series_{uuid.uuid4().hex[:12]}",
+        "business_id": business_id,
+        "client_id": data.client_id,
+        "service_id": data.service_id,
+        "staff_id": data.staff_id,
+        "start_time": start_time,
+        "duration": service["duration"],
+        "frequency": data.frequency,
+        "until": data.until,
+        "count": data.count,
+        # Occurrences keep their local time across DST changes
+        "timezone": (business or {}).get("timezone"),
+        "notes": data.notes,
+        "overrides": {},
+        "created_at": datetime.now(timezone.utc)
+    }
+    series["first_start"], series["last_end"] = occurrence_bounds(series)
+    
+    # Decision: a series counts once against the monthly quota, in the month
+    # it is created, however many occurrences it expands to. The quota
+    # limits bookings made, and a recurring booking is made once; charging
+    # occurrences per month would also need refunds for skipped occurrences
+    # and ended series, and cannot cover open-ended series. Occurrences are
+    # not counted when they are read.
+    await _claim_quota(db, business_id, await tenant.billing_status())
+    try:
+        await db.appointment_series.insert_one(series)
+    except Exception:
+        await release_appointment_quota(db, business_id)
+        raise
+    
+    # Checked once the series is stored: a one-off booking reserves its slot
+    # and then looks for series occurrences, so of two concurrent writers
+    # the later one always sees the earlier and they cannot both succeed
+    check_end = start_time + SERIES_CONFLICT_HORIZON
+    if series["last_end"]:
+        check_end = min(check_end, series["last_end"])
+    busy, reserved = await asyncio.gather(
+        _load_busy_intervals(db, business_id, [data.staff_id], start_time, check_end, series["series_id"]),
+        reserved_intervals(db, business_id, data.staff_id, start_time, check_end)
+    )
+    duration = timedelta(minutes=service["duration"])
+    conflicts = find_overlaps(
+        [(start, start + duration, start) for start in original_starts(series, start_time, check_end)],
+        busy[data.staff_id] + reserved
+    )
+    if conflicts:
+        await db.appointment_series.delete_one({"series_id": series["series_id"]})
+        await release_appointment_quota(db, business_id)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Time slot not available on {min(conflicts).strftime('%Y-%m-%d')}"
+        )
+    return AppointmentSeries(**series)
+
+async def _override_occurrence(
+    db,
+    business_id: str,
+    series_id: str,
+    key: str,
+    data: AppointmentUpdate
+) -> None:
+    """Move, skip (status canceled) or complete a single occurrence."""
+    series = await db.appointment_series.find_one(
+        {"series_id": series_id, "business_id": business_id},
+        {"_id": 0}
+    )
+    if not series:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    
+    overrides = series.get("overrides") or {}
+    try:
+        original = parse_occurrence_key(key)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    if key not in overrides and not is_occurrence(series, original):
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    if data.status and data.status not in ("scheduled", "completed", "canceled"):
+        raise HTTPException(status_code=400, detail=f"Invalid status: {data.status}")
+    
+    previous = overrides.get(key)
+    override = {**(previous or {}), **{k: v for k, v in data.model_dump().items() if v is not None}}
+    update = {"$set": {f"overrides.{key}": override, "updated_at": datetime.now(timezone.utc)}}
+    
+    if data.start_time:
+        override["start_time"] = _as_utc(data.start_time)
+    start_time = _as_utc(override.get("start_time") or original)
+    end_time = start_time + timedelta(minutes=series["duration"])
+    if data.start_time:
+        # Keep the range bounds covering the moved occurrence
+        update["$min"] = {"first_start": start_time}
+        if series.get("last_end") is not None:
+            update["$max"] = {"last_end": end_time}
+    
+    await db.appointment_series.update_one({"series_id": series_id}, update)
+    
+    # An occurrence that is moved, or scheduled again after a skip, is
+    # checked once the override is stored, as in create_series
+    was_scheduled = (previous or {}).get("status", "scheduled") == "scheduled"
+    if override.get("status", "scheduled") == "scheduled" and (data.start_time or not was_scheduled):
+        if await reserved_intervals(
+            db, business_id, series["staff_id"], start_time, end_time
+        ) or await _series_overlap(
+            db, business_id, series["staff_id"], start_time, end_time, ignore_id=f"{series_id}_{key}"
+        ):
+            restore = {"$set": {f"overrides.{key}": previous}} if previous else {"$unset": {f"overrides.{key}": ""}}
+            await db.appointment_series.update_one({"series_id": series_id}, restore)
+            raise HTTPException(status_code=400, detail="Time slot not available")
+
+@router.put("/businesses/{business_id}/series/{series_id}/occurrences/{occurrence}")
+async def update_occurrence(
+    business_id: str,
+    series_id: str,
+    occurrence: str,
+    data: AppointmentUpdate,
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """Override one occurrence, keyed by its original start (``20300107T100000Z``)."""
+    await _override_occurrence(tenant.db, business_id, series_id, occurrence, data)
+    return {"message": "Occurrence updated"}
+
+@router.delete("/businesses/{business_id}/series/{series_id}")
+async def end_series(
+    business_id: str,
+    series_id: str,
+    tenant: TenantContext = Depends(get_tenant)
+):
+    """End a series now: past occurrences stay, later ones are dropped."""
+    db = tenant.db
+    
+    series = await db.appointment_series.find_one(
+        {"series_id": series_id, "business_id": business_id},
+        {"_id": 0}
+    )
+    if not series:
+        raise HTTPException(status_code=404, detail="Series not found")
+    
+    now = datetime.now(timezone.utc)
+    if not series.get("until") or _as_utc(series["until"]) > now:
+        series["until"] = now
+    first_start, last_end = occurrence_bounds(series)
+    await db.appointment_series.update_one(
+        {"series_id": series_id},
+        {"$set": {
+            "until": series["until"],
+            "first_start": first_start,
+            "last_end": last_end,
+            "updated_at": now
+        }}
+    )
+    
+    return {"message": "Series ended"}
+
 # ==================== DASHBOARD STATS ====================
 
 @router.get("/businesses/{business_id}/dashboard")
-async def get_dashboard_stats(request: Request, business_id: str):
+async def get_dashboard_stats(business_id: str, tenant: TenantContext = Depends(get_tenant)):
     """Get dashboard statistics."""
-    db = get_db(request)
-    user = await get_authenticated_user(request)
-    
-    business = await db.businesses.find_one(
-        {"business_id": business_id, "owner_id": user["user_id"]}
-    )
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    db = tenant.db
     
     now = datetime.now(timezone.utc)
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -651,100 +1519,225 @@ async def get_dashboard_stats(request: Request, business_id: str):
     week_start = today_start - timedelta(days=today_start.weekday())
     month_start = today_start.replace(day=1)
     
-    # Today's appointments
-    today_count = await db.appointments.count_documents({
-        "business_id": business_id,
-        "start_time": {"$gte": today_start, "$lt": today_end},
-        "status": "scheduled"
-    })
-    
-    # This week's appointments
-    week_count = await db.appointments.count_documents({
-        "business_id": business_id,
-        "start_time": {"$gte": week_start},
-        "status": {"$in": ["scheduled", "completed"]}
-    })
-    
-    # This month's appointments
-    month_count = await db.appointments.count_documents({
-        "business_id": business_id,
-        "start_time": {"$gte": month_start},
-        "status": {"$in": ["scheduled", "completed"]}
-    })
-    
-    # Today's appointments list
-    today_appointments = await db.appointments.find(
-        {
+    # Counts come from the business_counters buckets, the lists from one
+    # aggregation whose facets share an indexed $match on the 7-day window.
+    pipeline = [
+        {"$match": {
             "business_id": business_id,
-            "start_time": {"$gte": today_start, "$lt": today_end}
-        },
-        {"_id": 0}
-    ).sort("start_time", 1).to_list(50)
+            "start_time": {"$gte": today_start, "$lt": now + timedelta(days=7)}
+        }},
+        {"$facet": {
+            # Today's appointments list
+            "today_appointments": [
+                {"$match": {"start_time": {"$gte": today_start, "$lt": today_end}}},
+                {"$sort": {"start_time": 1}},
+                {"$limit": 50},
+                {"$project": {"_id": 0}}
+            ],
+            # Upcoming appointments (next 7 days)
+            "upcoming": [
+                {"$match": {"start_time": {"$gte": now, "$lt": now + timedelta(days=7)}, "status": "scheduled"}},
+                {"$sort": {"start_time": 1}},
+                {"$limit": 20},
+                {"$project": {"_id": 0}}
+            ]
+        }}
+    ]
+    
+    # Series occurrences are not counted in the buckets; they are expanded
+    # for the window the stats and lists cover and added in
+    window_start = min(week_start, month_start)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    window_end = max(week_start + timedelta(days=7), next_month, now + timedelta(days=7))
+    
+    buckets, facets, total_clients, occurrences = await asyncio.gather(
+        load_counters(db, business_id, day_key(week_start), month_key(month_start)),
+        db.appointments.aggregate(pipeline).to_list(1),
+        db.clients.count_documents({"business_id": business_id}),
+        load_occurrences(db, business_id, window_start, window_end)
+    )
+    facets = facets[0]
+    active = ("scheduled", "completed")
     
-    # Upcoming appointments (next 7 days)
-    upcoming = await db.appointments.find(
-        {
-            "business_id": business_id,
-            "start_time": {"$gte": now, "$lt": now + timedelta(days=7)},
-            "status": "scheduled"
-        },
-        {"_id": 0}
-    ).sort("start_time", 1).to_list(20)
+    def occurring(start, end, statuses=active):
+        return [
+            occurrence for occurrence in occurrences
+            if start <= occurrence["start_time"] < end and occurrence["status"] in statuses
+        ]
+    
+    def merged(listed, extra, limit):
+        return sorted(listed + extra, key=lambda apt: _as_utc(apt["start_time"]))[:limit]
     
-    # Total clients
-    total_clients = await db.clients.count_documents({"business_id": business_id})
+    today_occurrences = [
+        occurrence for occurrence in occurrences
+        if today_start <= occurrence["start_time"] < today_end
+    ]
+    upcoming = occurring(now, now + timedelta(days=7), ("scheduled",))
     
     return {
         "stats": {
-            "today": today_count,
-            "this_week": week_count,
-            "this_month": month_count,
+            "today": sum_counters(buckets, "day", ("scheduled",), day_key(today_start), day_key(today_start))
+                + len(occurring(today_start, today_end, ("scheduled",))),
+            "this_week": sum_counters(buckets, "day", active, day_key(week_start))
+                + len(occurring(week_start, week_start + timedelta(days=7))),
+            "this_month": sum_counters(buckets, "month", active, month_key(month_start))
+                + len(occurring(month_start, next_month)),
             "total_clients": total_clients
         },
-        "today_appointments": today_appointments,
-        "upcoming_appointments": upcoming
+        "today_appointments": merged(facets["today_appointments"], today_occurrences, 50),
+        "upcoming_appointments": merged(facets["upcoming"], upcoming, 20)
     }
 
 # ==================== PUBLIC BOOKING ROUTES ====================
 
 @router.get("/public/{slug}")
-async def get_public_business(request: Request, slug: str):
-    """Get business info for public booking page."""
-    db = get_db(request)
+async def get_public_business(request: Request, response: Response, slug: str):
+    """Get business info for public booking page.
+    
+    The payload is versioned by the business ``version`` counter, which every
+    change to the business, its services or its staff bumps. Repeat visitors
+    revalidate with If-None-Match and get a 304; within a worker the payload
+    is served from ``public_page_cache`` without touching Mongo.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    headers = {"Cache-Control": f"public, max-age={PUBLIC_PAGE_MAX_AGE}"}
+    
+    page = public_page_cache.get(slug)
+    if page is None:
+        db = get_db(request)
+        business = await db.businesses.find_one(
+            {"slug": slug},
+            {"_id": 0, "owner_id": 0}
+        )
+        
+        if not business:
+            raise HTTPException(status_code=404, detail="Business not found")
+        
+        etag = _public_etag(business)
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={**headers, "ETag": etag})
+        business.pop("version", None)
+        
+        services, staff = await asyncio.gather(
+            db.services.find(
+                {"business_id": business["business_id"], "is_active": True},
+                {"_id": 0}
+            ).to_list(100),
+            db.staff.find(
+                {"business_id": business["business_id"], "is_active": True},
+                {"_id": 0, "user_id": 0}
+            ).to_list(100)
+        )
+        
+        page = {
+            "business_id": business["business_id"],
+            "etag": etag,
+            "payload": {
+                "business": business,
+                "services": services,
+                "staff": staff
+            }
+        }
+        public_page_cache.set(slug, page)
     
-    business = await db.businesses.find_one(
-        {"slug": slug},
-        {"_id": 0, "owner_id": 0}
-    )
+    if _etag_matches(if_none_match, page["etag"]):
+        return Response(status_code=304, headers={**headers, "ETag": page["etag"]})
     
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
+    response.headers.update({**headers, "ETag": page["etag"]})
+    return page["payload"]
+
+def _day_slots(business: dict, day: datetime, busy: list, duration: timedelta) -> list:
+    """Bookable slots of one day, given the busy intervals of the staff member."""
+    day_name = day.strftime("%A").lower()
     
-    services = await db.services.find(
-        {"business_id": business["business_id"], "is_active": True},
-        {"_id": 0}
-    ).to_list(100)
+    # Get working hours
+    working_hours = business.get("working_hours", {}).get(day_name, {})
+    if not working_hours.get("enabled", False):
+        return []
+    
+    start_hour, start_min = map(int, working_hours["start"].split(":"))
+    end_hour, end_min = map(int, working_hours["end"].split(":"))
+    open_time = day.replace(hour=start_hour, minute=start_min, tzinfo=timezone.utc)
+    close_time = day.replace(hour=end_hour, minute=end_min, tzinfo=timezone.utc)
+    
+    return [
+        {"time": slot.strftime("%H:%M"), "datetime": slot.isoformat()}
+        for slot in generate_slots(open_time, close_time, busy, duration=duration, step=SLOT_STEP)
+    ]
+
+def _any_staff_day_slots(
+    business: dict,
+    day: datetime,
+    busy_by_staff: dict,
+    duration: timedelta
+) -> list:
+    """Union of the slots of several staff members, annotated with who is free."""
+    by_time = {}
+    for staff_id, busy in busy_by_staff.items():
+        for slot in _day_slots(business, day, busy, duration):
+            entry = by_time.setdefault(slot["datetime"], {**slot, "staff_ids": []})
+            entry["staff_ids"].append(staff_id)
+    return sorted(by_time.values(), key=lambda slot: slot["datetime"])
+
+async def _resolve_staff_ids(db, business_id: str, staff_id: Optional[str]) -> list:
+    """The requested staff member, or every active one when none is given."""
+    if staff_id:
+        return [staff_id]
     
     staff = await db.staff.find(
-        {"business_id": business["business_id"], "is_active": True},
-        {"_id": 0, "user_id": 0}
-    ).to_list(100)
+        {"business_id": business_id, "is_active": True},
+        {"_id": 0, "staff_id": 1}
+    ).to_list(None)
+    return [member["staff_id"] for member in staff]
+
+async def _load_busy_intervals(
+    db,
+    business_id: str,
+    staff_ids: list,
+    range_start: datetime,
+    range_end: datetime,
+    ignore_series_id: Optional[str] = None
+) -> dict:
+    """Merged busy intervals overlapping ``[range_start, range_end)``, per staff member.
+    
+    All staff members are loaded with a single query, plus one for the
+    recurring series, whose occurrences are expanded for the range only.
+    """
+    existing, occurrences = await asyncio.gather(
+        db.appointments.find(
+            {
+                "business_id": business_id,
+                "staff_id": {"$in": staff_ids},
+                "status": "scheduled",
+                "start_time": {"$lt": range_end},
+                "end_time": {"$gt": range_start}
+            },
+            {"_id": 0, "staff_id": 1, "start_time": 1, "end_time": 1}
+        ).to_list(None),
+        load_occurrences(db, business_id, range_start, range_end, staff_ids)
+    )
     
-    return {
-        "business": business,
-        "services": services,
-        "staff": staff
-    }
+    intervals = {staff_id: [] for staff_id in staff_ids}
+    for apt in existing:
+        intervals[apt["staff_id"]].append((_as_utc(apt["start_time"]), _as_utc(apt["end_time"])))
+    for occurrence in occurrences:
+        if occurrence["status"] == "scheduled" and occurrence["series_id"] != ignore_series_id:
+            intervals[occurrence["staff_id"]].append((occurrence["start_time"], occurrence["end_time"]))
+    return {staff_id: merge_intervals(busy) for staff_id, busy in intervals.items()}
 
 @router.get("/public/{slug}/available-slots")
 async def get_available_slots(
     request: Request,
     slug: str,
-    staff_id: str,
     service_id: str,
-    booking_date_str: str = Query(..., alias="date")
+    booking_date_str: str = Query(..., alias="date"),
+    staff_id: Optional[str] = Query(None)
 ):
-    """Get available time slots for a date."""
+    """Get available time slots for a date.
+    
+    Without ``staff_id`` the slots of all active staff are merged and each
+    slot lists the ``staff_ids`` that can take it.
+    """
     db = get_db(request)
     
     business = await db.businesses.find_one({"slug": slug})
@@ -757,96 +1750,98 @@ async def get_available_slots(
     
     # Parse date
     booking_date = datetime.strptime(booking_date_str, "%Y-%m-%d")
-    day_name = booking_date.strftime("%A").lower()
-    
-    # Get working hours
-    working_hours = business.get("working_hours", {}).get(day_name, {})
-    if not working_hours.get("enabled", False):
-        return {"slots": []}
-    
-    start_hour, start_min = map(int, working_hours["start"].split(":"))
-    end_hour, end_min = map(int, working_hours["end"].split(":"))
-    
-    # Get existing appointments
-    day_start = booking_date.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
-    day_end = day_start + timedelta(days=1)
+    day_start = booking_date.replace(tzinfo=timezone.utc)
     
-    existing = await db.appointments.find({
-        "business_id": business["business_id"],
-        "staff_id": staff_id,
-        "start_time": {"$gte": day_start, "$lt": day_end},
-        "status": "scheduled"
-    }).to_list(100)
-    
-    # Generate slots
-    slots = []
-    current_time = booking_date.replace(hour=start_hour, minute=start_min, tzinfo=timezone.utc)
-    end_time = booking_date.replace(hour=end_hour, minute=end_min, tzinfo=timezone.utc)
-    slot_duration = timedelta(minutes=30)  # 30-minute slots
-    
-    while current_time + timedelta(minutes=service["duration"]) <= end_time:
-        slot_end = current_time + timedelta(minutes=service["duration"])
-        
-        # Check if slot conflicts with existing appointments
-        is_available = True
-        for apt in existing:
-            apt_start = apt["start_time"]
-            apt_end = apt["end_time"]
-            if apt_start.tzinfo is None:
-                apt_start = apt_start.replace(tzinfo=timezone.utc)
-                apt_end = apt_end.replace(tzinfo=timezone.utc)
-            
-            if not (slot_end <= apt_start or current_time >= apt_end):
-                is_available = False
-                break
-        
-        if is_available:
-            slots.append({
-                "time": current_time.strftime("%H:%M"),
-                "datetime": current_time.isoformat()
-            })
-        
-        current_time += slot_duration
+    staff_ids = await _resolve_staff_ids(db, business["business_id"], staff_id)
+    busy_by_staff = await _load_busy_intervals(
+        db, business["business_id"], staff_ids, day_start, day_start + timedelta(days=1)
+    )
+    duration = timedelta(minutes=service["duration"])
     
+    if staff_id:
+        slots = _day_slots(business, booking_date, busy_by_staff[staff_id], duration)
+    else:
+        slots = _any_staff_day_slots(business, booking_date, busy_by_staff, duration)
     return {"slots": slots}
 
-@router.post("/public/{slug}/book")
-async def create_public_booking(request: Request, slug: str, data: PublicBookingCreate):
-    """Create a booking from public page."""
+@router.get("/public/{slug}/availability")
+async def get_availability(
+    request: Request,
+    slug: str,
+    service_id: str,
+    from_date_str: str = Query(..., alias="from"),
+    to_date_str: str = Query(..., alias="to"),
+    staff_id: Optional[str] = Query(None)
+):
+    """Get available time slots for every day of a date range (inclusive).
+    
+    ``staff_id`` is optional, as in ``get_available_slots``.
+    """
     db = get_db(request)
     
+    try:
+        from_date = datetime.strptime(from_date_str, "%Y-%m-%d")
+        to_date = datetime.strptime(to_date_str, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must use the YYYY-MM-DD format")
+    
+    day_count = (to_date - from_date).days + 1
+    if day_count < 1:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if day_count > MAX_AVAILABILITY_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {MAX_AVAILABILITY_DAYS} days"
+        )
+    
     business = await db.businesses.find_one({"slug": slug})
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
     
-    service = await db.services.find_one({
-        "service_id": data.service_id,
-        "business_id": business["business_id"]
-    })
+    service = await db.services.find_one({"service_id": service_id})
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    end_time = data.start_time + timedelta(minutes=service["duration"])
-    
-    # Check for conflicts
-    conflict = await db.appointments.find_one({
-        "business_id": business["business_id"],
-        "staff_id": data.staff_id,
-        "status": "scheduled",
-        "$or": [
-            {"start_time": {"$lt": end_time, "$gte": data.start_time}},
-            {"end_time": {"$gt": data.start_time, "$lte": end_time}},
-            {"start_time": {"$lte": data.start_time}, "end_time": {"$gte": end_time}}
-        ]
-    })
+    # One query for the whole range, merged once and walked day by day
+    range_start = from_date.replace(tzinfo=timezone.utc)
+    range_end = range_start + timedelta(days=day_count)
+    staff_ids = await _resolve_staff_ids(db, business["business_id"], staff_id)
+    busy_by_staff = await _load_busy_intervals(
+        db, business["business_id"], staff_ids, range_start, range_end
+    )
+    ends_by_staff = {
+        member: [end for _, end in busy] for member, busy in busy_by_staff.items()
+    }
+    duration = timedelta(minutes=service["duration"])
     
-    if conflict:
-        raise HTTPException(status_code=400, detail="Time slot no longer available")
+    days = {}
+    for offset in range(day_count):
+        day = from_date + timedelta(days=offset)
+        day_start = range_start + timedelta(days=offset)
+        day_end = day_start + timedelta(days=1)
+        
+        day_busy = {}
+        for member, busy in busy_by_staff.items():
+            first = bisect_right(ends_by_staff[member], day_start)
+            last = first
+            while last < len(busy) and busy[last][0] < day_end:
+                last += 1
+            day_busy[member] = busy[first:last]
+        
+        if staff_id:
+            slots = _day_slots(business, day, day_busy[staff_id], duration)
+        else:
+            slots = _any_staff_day_slots(business, day, day_busy, duration)
+        days[day.strftime("%Y-%m-%d")] = slots
     
+    return {"days": days}
+
+async def _book_reserved_slot(db, business: dict, data: PublicBookingCreate, slot: dict) -> dict:
+    """Find or create the client and insert the appointment for a reserved slot."""
     # Find or create client
     client = await db.clients.find_one({
         "business_id": business["business_id"],
-        "email": data.client_email
+        "email": normalize_email(data.client_email)
     })
     
     if not client:
@@ -854,9 +1849,10 @@ async def create_public_booking(request: Request, slug: str, data: PublicBooking
             "client_id": f"client_{uuid.uuid4().hex[:12]}",
             "business_id": business["business_id"],
             "name": data.client_name,
-            "email": data.client_email,
+            "email": normalize_email(data.client_email),
             "phone": data.client_phone,
             "notes": None,
+            "search_keys": client_search_keys(data.client_name, data.client_email, data.client_phone),
             "created_at": datetime.now(timezone.utc)
         }
         await db.clients.insert_one(client)
@@ -873,19 +1869,69 @@ async def create_public_booking(request: Request, slug: str, data: PublicBooking
     
     # Create appointment
     appointment = {
-        "appointment_id": f"apt_{uuid.uuid4().hex[:12]}",
+        "appointment_id": slot["appointment_id"],
         "business_id": business["business_id"],
         "client_id": client["client_id"],
         "service_id": data.service_id,
         "staff_id": data.staff_id,
         "start_time": data.start_time,
-        "end_time": end_time,
+        "end_time": slot["end_time"],
         "status": "scheduled",
         "notes": None,
-        "created_at": datetime.now(timezone.utc)
+        "created_at": datetime.now(timezone.utc),
+        **reminder_fields(data.start_time, "scheduled")
     }
     
     await db.appointments.insert_one(appointment)
+    return appointment
+
+@router.post("/public/{slug}/book")
+async def create_public_booking(request: Request, slug: str, data: PublicBookingCreate):
+    """Create a booking from public page."""
+    db = get_db(request)
+    
+    business = await db.businesses.find_one({"slug": slug})
+    if not business:
+        raise HTTPException(status_code=404, detail="Business not found")
+    
+    service = await db.services.find_one({
+        "service_id": data.service_id,
+        "business_id": business["business_id"]
+    })
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    
+    end_time = data.start_time + timedelta(minutes=service["duration"])
+    
+    slot = {
+        "appointment_id": f"apt_{uuid.uuid4().hex[:12]}",
+        "business_id": business["business_id"],
+        "staff_id": data.staff_id,
+        "start_time": data.start_time,
+        "end_time": end_time
+    }
+    
+    # Claim the quota and then the slot atomically, so concurrent bookings
+    # can neither both succeed nor overshoot the plan limit
+    billing_status = await billing_status_for_user(db, business["owner_id"])
+    await _claim_quota(db, business["business_id"], billing_status)
+    try:
+        await _reserve_or_conflict(db, slot, "Time slot no longer available")
+    except HTTPException:
+        await release_appointment_quota(db, business["business_id"])
+        raise
+    
+    try:
+        appointment = await _book_reserved_slot(db, business, data, slot)
+    except Exception:
+        await _release_reserved(db, slot)
+        await release_appointment_quota(db, business["business_id"])
+        raise
+    
+    await record_appointment_change(
+        db, business["business_id"],
+        after=(appointment["start_time"], "scheduled")
+    )
     
     return {
         "message": "Booking confirmed!",
@@ -2,10 +2,20 @@ from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from datetime import datetime, timezone, timedelta
 import httpx
+import os
 import uuid
 
+from cache import TTLCache
+
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# session_token -> (user_doc, expires_at). Kept short-lived because logout in
+# one worker cannot evict the entry held by another.
+session_cache = TTLCache(
+    maxsize=int(os.environ.get("SESSION_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("SESSION_CACHE_TTL", "60")),
+)
+
 # Pydantic models
 class SessionRequest(BaseModel):
     session_id: str
@@ -23,6 +33,22 @@ class UserWithSession(User):
 def get_db(request: Request):
     return request.app.state.db
 
+def get_session_token(request: Request) -> str | None:
+    """Read the session token from the cookie, then the Authorization header."""
+    session_token = request.cookies.get("session_token")
+    if not session_token:
+        auth_header = request.headers.get("Authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            session_token = auth_header.split(" ")[1]
+    return session_token
+
+def _parse_expiry(expires_at) -> datetime:
+    if isinstance(expires_at, str):
+        expires_at = datetime.fromisoformat(expires_at)
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at
+
 @router.post("/session")
 async def exchange_session(request: Request, response: Response, session_req: SessionRequest):
     """
@@ -31,17 +57,20 @@ async def exchange_session(request: Request, response: Response, session_req: Se
     """
     db = get_db(request)
     
-    # Exchange session_id with Emergent Auth
-    async with httpx.AsyncClient() as client:
-        auth_response = await client.get(
+    # Exchange session_id with Emergent Auth, over the pooled client kept by
+    # the lifespan so logins reuse warm connections
+    try:
+        auth_response = await request.app.state.http.get(
             "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
             headers={"X-Session-ID": session_req.session_id}
         )
-        
-        if auth_response.status_code != 200:
-            raise HTTPException(status_code=401, detail="Invalid session")
-        
-        auth_data = auth_response.json()
+    except httpx.TransportError:
+        raise HTTPException(status_code=503, detail="Authentication service unavailable")
+    
+    if auth_response.status_code != 200:
+        raise HTTPException(status_code=401, detail="Invalid session")
+    
+    auth_data = auth_response.json()
     
     email = auth_data["email"]
     name = auth_data.get("name", "")
@@ -72,6 +101,7 @@ async def exchange_session(request: Request, response: Response, session_req: Se
     # Store session
     expires_at = datetime.now(timezone.utc) + timedelta(days=7)
     await db.user_sessions.delete_many({"user_id": user_id})  # Remove old sessions
+    session_cache.discard_where(lambda token, entry: entry[0]["user_id"] == user_id)
     await db.user_sessions.insert_one({
         "user_id": user_id,
         "session_token": session_token,
@@ -100,45 +130,7 @@ async def exchange_session(request: Request, response: Response, session_req: Se
 @router.get("/me", response_model=User)
 async def get_current_user(request: Request):
     """Get current authenticated user."""
-    db = get_db(request)
-    
-    # Try cookie first, then Authorization header
-    session_token = request.cookies.get("session_token")
-    if not session_token:
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            session_token = auth_header.split(" ")[1]
-    
-    if not session_token:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    # Find session
-    session_doc = await db.user_sessions.find_one(
-        {"session_token": session_token},
-        {"_id": 0}
-    )
-    
-    if not session_doc:
-        raise HTTPException(status_code=401, detail="Invalid session")
-    
-    # Check expiry
-    expires_at = session_doc["expires_at"]
-    if isinstance(expires_at, str):
-        expires_at = datetime.fromisoformat(expires_at)
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
-    if expires_at < datetime.now(timezone.utc):
-        raise HTTPException(status_code=401, detail="Session expired")
-    
-    # Get user
-    user_doc = await db.users.find_one(
-        {"user_id": session_doc["user_id"]},
-        {"_id": 0}
-    )
-    
-    if not user_doc:
-        raise HTTPException(status_code=401, detail="User not found")
-    
+    user_doc = await get_authenticated_user(request)
     return User(**user_doc)
 
 @router.post("/logout")
@@ -148,6 +140,7 @@ async def logout(request: Request, response: Response):
     
     session_token = request.cookies.get("session_token")
     if session_token:
+        session_cache.pop(session_token)
         await db.user_sessions.delete_many({"session_token": session_token})
     
     response.delete_cookie(key="session_token", path="/")
@@ -155,18 +148,24 @@ async def logout(request: Request, response: Response):
 
 # Helper function to get current user (for use in other routes)
 async def get_authenticated_user(request: Request) -> dict:
-    """Helper to get authenticated user from request."""
-    db = get_db(request)
-    
-    session_token = request.cookies.get("session_token")
-    if not session_token:
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            session_token = auth_header.split(" ")[1]
-    
+    """Helper to get authenticated user from request.
+
+    Resolved sessions are cached per token for a short TTL, so most requests
+    skip both the session and the user lookup.
+    """
+    session_token = get_session_token(request)
     if not session_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    
+
+    now = datetime.now(timezone.utc)
+    cached = session_cache.get(session_token)
+    if cached is not None:
+        user_doc, expires_at = cached
+        if expires_at >= now:
+            return dict(user_doc)
+        session_cache.pop(session_token)
+
+    db = get_db(request)
     session_doc = await db.user_sessions.find_one(
         {"session_token": session_token},
         {"_id": 0}
@@ -175,12 +174,8 @@ async def get_authenticated_user(request: Request) -> dict:
     if not session_doc:
         raise HTTPException(status_code=401, detail="Invalid session")
     
-    expires_at = session_doc["expires_at"]
-    if isinstance(expires_at, str):
-        expires_at = datetime.fromisoformat(expires_at)
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
-    if expires_at < datetime.now(timezone.utc):
+    expires_at = _parse_expiry(session_doc["expires_at"])
+    if expires_at < now:
         raise HTTPException(status_code=401, detail="Session expired")
     
     user_doc = await db.users.find_one(
@@ -191,4 +186,9 @@ async def get_authenticated_user(request: Request) -> dict:
     if not user_doc:
         raise HTTPException(status_code=401, detail="User not found")
     
-    return user_doc
+    session_cache.set(
+        session_token,
+        (user_doc, expires_at),
+        ttl=(expires_at - now).total_seconds()
+    )
+    return dict(user_doc)
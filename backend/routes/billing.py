@@ -1,31 +1,113 @@
-from fastapi import APIRouter, Depends
-from backend.services.asaas_service import AsaasService
-from backend.models.subscription import Subscription
-from backend.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from pydantic import BaseModel, ConfigDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Optional
+import hmac
+import httpx
+import os
+from asaas_service import AsaasService
+from billing_events import enqueue_event
+from http_client import CircuitOpenError
+from .auth import get_authenticated_user
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
 
+# Token configured for the webhook in the Asaas dashboard, sent back in the
+# asaas-access-token header
+ASAAS_WEBHOOK_TOKEN = os.getenv("ASAAS_WEBHOOK_TOKEN")
+
+@dataclass(frozen=True)
+class Plan:
+    id: str
+    name: str
+    price: float
+
+# Monthly prices, as on the pricing page; limits are in middleware/billing.py
+PLANS = {
+    "basic": Plan("basic", "Basic", 9),
+    "pro": Plan("pro", "Pro", 19),
+    "business": Plan("business", "Business", 29),
+}
+
+class BillingWebhook(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    id: str
+    event: str
+    payment: Optional[dict] = None
+    subscription: Optional[dict] = None
+
+def get_db(request: Request):
+    return request.app.state.db
+
+def get_asaas(request: Request) -> AsaasService:
+    """The process-wide AsaasService created in the application lifespan."""
+    return request.app.state.asaas
+
+def get_plan(plan_id: str) -> Plan:
+    plan = PLANS.get(plan_id)
+    if not plan:
+        raise HTTPException(status_code=400, detail=f"Unknown plan: {plan_id}")
+    return plan
+
 @router.post("/subscribe")
-def subscribe(plan: str, db=Depends(get_db), user=Depends(get_current_user)):
-    business = user.business
+async def subscribe(
+    request: Request,
+    plan: str,
+    asaas: AsaasService = Depends(get_asaas)
+):
+    """Subscribe the signed-in user to ``plan`` with the payment gateway.
 
-    customer = AsaasService.create_customer(business)
+    The billing document only records the gateway ids and the plan here; its
+    status changes when the gateway's payment webhooks are applied.
+    """
+    db = get_db(request)
+    user = await get_authenticated_user(request)
+    selected = get_plan(plan)
+    # Billing is per user, so the user is the gateway customer
+    account = SimpleNamespace(id=user["user_id"], name=user["name"], email=user["email"])
 
-    subscription_data = AsaasService.create_subscription(
-        customer_id=customer["id"],
-        plan=get_plan(plan)
-    )
+    try:
+        customer = await asaas.find_customer(account.id) or await asaas.create_customer(account)
+        subscription_data = await asaas.create_subscription(customer_id=customer["id"], plan=selected)
+    except (CircuitOpenError, httpx.TransportError):
+        raise HTTPException(status_code=503, detail="Payment gateway unavailable, try again shortly")
 
-    subscription = Subscription(
-        id=subscription_data["id"],
-        business_id=business.id,
-        asaas_customer_id=customer["id"],
-        asaas_subscription_id=subscription_data["id"],
-        status=subscription_data["status"],
-        plan=plan
+    now = datetime.now(timezone.utc)
+    await db.billing.update_one(
+        {"user_id": user["user_id"]},
+        {
+            "$set": {
+                "plan_id": selected.id,
+                "asaas_customer_id": customer["id"],
+                "asaas_subscription_id": subscription_data["id"],
+                "updated_at": now
+            },
+            # A trial keeps running until the first payment is confirmed
+            "$setOnInsert": {"user_id": user["user_id"], "status": "pending", "created_at": now}
+        },
+        upsert=True
     )
 
-    db.add(subscription)
-    db.commit()
-
     return {"status": "ok", "subscription": subscription_data}
+
+@router.post("/webhook", status_code=202)
+async def billing_webhook(
+    request: Request,
+    event: BillingWebhook,
+    asaas_access_token: Optional[str] = Header(None)
+):
+    """Queue a gateway event; transitions are applied by BillingEventProcessor.
+
+    Only validates and appends, so bursts (month rollover) stay cheap.
+    Redelivered events are acknowledged without being queued again.
+    """
+    if ASAAS_WEBHOOK_TOKEN and not hmac.compare_digest(asaas_access_token or "", ASAAS_WEBHOOK_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid webhook token")
+
+    queued = await enqueue_event(get_db(request), event.model_dump())
+    if queued:
+        request.app.state.billing_events.notify()
+    return {"received": True, "duplicate": not queued}
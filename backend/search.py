@@ -0,0 +1,139 @@
+import asyncio
+import os
+import re
+import unicodedata
+from typing import Optional
+
+from pymongo import UpdateOne
+
+# Clients carry a ``search_keys`` array of normalized, accent-folded keys:
+# each word of the name, the whole name, the email and its local part, and
+# the phone digits. A multikey (business_id, search_keys) index turns an
+# anchored prefix regex on those keys into an index range scan, so search
+# cost does not depend on the size of the client base.
+
+_NON_WORD = re.compile(r"[^\w@.+]+")
+
+def fold(text: Optional[str]) -> str:
+    """Lowercase, strip accents and collapse whitespace: 'Zoé  Ávila' -> 'zoe avila'."""
+    if not text:
+        return ""
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """The stored form of a client email: trimmed and lowercased, None if blank.
+
+    Client emails are matched exactly (imports, public booking), so every
+    write and lookup goes through this.
+    """
+    email = (email or "").strip()
+    return email.lower() or None
+
+def digits(text: Optional[str]) -> str:
+    return "".join(ch for ch in text or "" if ch.isdigit())
+
+def client_search_keys(name: Optional[str], email: Optional[str], phone: Optional[str]) -> list:
+    keys = []
+    folded_name = fold(name)
+    if folded_name:
+        keys.append(folded_name)
+        keys.extend(folded_name.split())
+    folded_email = fold(email)
+    if folded_email:
+        keys.append(folded_email)
+        keys.append(folded_email.split("@")[0])
+    phone_digits = digits(phone)
+    if phone_digits:
+        keys.append(phone_digits)
+    return sorted(set(keys))
+
+def query_terms(q: str) -> list:
+    """Terms of a search string; a phone-like query becomes a single digit string."""
+    folded = fold(q)
+    if folded and digits(folded) and not re.search(r"[a-z@]", folded):
+        return [digits(folded)]
+    return folded.split()
+
+def search_filter(business_id: str, terms: list) -> dict:
+    """Every term must prefix-match one of the client's keys."""
+    return {
+        "business_id": business_id,
+        "$and": [{"search_keys": re.compile("^" + re.escape(term))} for term in terms]
+    }
+
+def rank(client: dict, terms: list) -> tuple:
+    """Sort key: exact name, name prefix, name-word prefix, then other matches."""
+    name = fold(client.get("name"))
+    phrase = " ".join(terms)
+    if name == phrase:
+        score = 0
+    elif name.startswith(phrase):
+        score = 1
+    elif any(word.startswith(terms[0]) for word in name.split()):
+        score = 2
+    else:
+        score = 3
+    return (score, name, client.get("client_id", ""))
+
+async def backfill_client_search_keys(db, batch_size: int = 1000) -> int:
+    """Add ``search_keys`` to clients created before search existed."""
+    cursor = db.clients.find(
+        {"search_keys": {"$exists": False}},
+        {"_id": 1, "name": 1, "email": 1, "phone": 1}
+    )
+    operations = []
+    count = 0
+    async for client in cursor:
+        operations.append(UpdateOne(
+            {"_id": client["_id"]},
+            {"$set": {"search_keys": client_search_keys(
+                client.get("name"), client.get("email"), client.get("phone")
+            )}}
+        ))
+        count += 1
+        if len(operations) >= batch_size:
+            await db.clients.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.clients.bulk_write(operations, ordered=False)
+    return count
+
+async def normalize_client_emails(db, batch_size: int = 1000) -> int:
+    """Store the emails of clients saved before normalize_email in normalized form."""
+    cursor = db.clients.find(
+        {"email": {"$regex": r"[A-Z]|^\s|\s$"}},
+        {"_id": 1, "email": 1}
+    )
+    operations = []
+    count = 0
+    async for client in cursor:
+        operations.append(UpdateOne(
+            {"_id": client["_id"]}, {"$set": {"email": normalize_email(client["email"])}}
+        ))
+        count += 1
+        if len(operations) >= batch_size:
+            await db.clients.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.clients.bulk_write(operations, ordered=False)
+    return count
+
+async def _backfill_from_env() -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        return await backfill_client_search_keys(client[os.environ['DB_NAME']])
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    # python search.py; normally run once by the client_search_keys_v1 migration
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).parent / '.env')
+    print(f"Indexed {asyncio.run(_backfill_from_env())} clients for search")
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends, Request
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -11,9 +11,20 @@ import uuid
 from datetime import datetime, timezone
 from contextlib import asynccontextmanager
 
-from routes.auth import router as auth_router
+from routes.auth import router as auth_router, get_authenticated_user
 from routes.agenda import router as agenda_router
 from routes.billing import router as billing_router
+from indexes import ensure_indexes, report_collection_scans
+from reservations import backfill_reservations
+from responses import FastJSONResponse
+from asaas_service import AsaasService, create_asaas_client
+from http_client import create_pooled_client
+from billing_events import BillingEventProcessor
+from counters import rebuild_counters
+from jobs import JobWorker
+from migrations import queue_migrations
+from reminders import ReminderScheduler, create_sender, send_reminders
+from search import backfill_client_search_keys, normalize_client_emails
 
 
 ROOT_DIR = Path(__file__).parent
@@ -24,16 +35,48 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Where appointment reminders go, see reminders.create_sender
+reminder_sender = create_sender()
+
+# Background job kinds and their ``async handler(db, payload)``, see jobs.py
+JOB_HANDLERS = {
+    "rebuild_counters": lambda db, payload: rebuild_counters(db, payload.get("business_id")),
+    "backfill_reservations": lambda db, payload: backfill_reservations(db),
+    "backfill_client_search_keys": lambda db, payload: backfill_client_search_keys(db),
+    "normalize_client_emails": lambda db, payload: normalize_client_emails(db),
+    "send_reminders": lambda db, payload: send_reminders(db, payload, reminder_sender),
+}
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Store db in app state
+    # Startup: Store db in app state and make sure indexes exist
     app.state.db = db
+    await ensure_indexes(db)
+    await report_collection_scans(db)
+    # One-time data migrations, run by the job worker below
+    await queue_migrations(db)
+    # Pooled HTTP clients, one per process: general outbound calls (the
+    # identity provider) and the payment gateway
+    app.state.http = create_pooled_client("http")
+    app.state.asaas = AsaasService(create_asaas_client())
+    # Applies queued billing webhooks in the background
+    app.state.billing_events = BillingEventProcessor(db)
+    app.state.billing_events.start()
+    app.state.jobs = JobWorker(db, JOB_HANDLERS)
+    app.state.jobs.start()
+    app.state.reminders = ReminderScheduler(db, app.state.jobs)
+    app.state.reminders.start()
     yield
-    # Shutdown: Close connection
+    # Shutdown: drain background work, then close connections
+    await app.state.reminders.stop()
+    await app.state.jobs.stop()
+    await app.state.billing_events.stop()
+    await app.state.http.aclose()
+    await app.state.asaas.aclose()
     client.close()
 
 # Create the main app with lifespan
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -65,19 +108,25 @@ async def create_status_check(input: StatusCheckCreate):
     doc['timestamp'] = doc['timestamp'].isoformat()
     
     _ = await db.status_checks.insert_one(doc)
-    return status_obj
+    return FastJSONResponse(status_obj.model_dump())
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
     # Exclude MongoDB's _id field from the query results
     status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
     
-    # Convert ISO string timestamps back to datetime objects
-    for check in status_checks:
-        if isinstance(check['timestamp'], str):
-            check['timestamp'] = datetime.fromisoformat(check['timestamp'])
-    
-    return status_checks
+    # Stored by create_status_check, so they need no validation; the ISO
+    # timestamps are already in their JSON form
+    return FastJSONResponse([StatusCheck.model_construct(**check).model_dump() for check in status_checks])
+
+@api_router.get("/metrics/http-clients")
+async def http_client_metrics(request: Request, user: dict = Depends(get_authenticated_user)):
+    """Request, handshake and pool counters of the shared HTTP clients.
+
+    Names upstream hosts and error counts, so only for signed-in users.
+    """
+    clients = [request.app.state.http, request.app.state.asaas.client]
+    return {http_client.metrics.name: http_client.metrics.snapshot(http_client) for http_client in clients}
 
 # Include routers in the api router
 api_router.include_router(auth_router)
@@ -0,0 +1,19 @@
+import orjson
+
+# Documents are flushed to the client in chunks of this many lines
+NDJSON_CHUNK_SIZE = 200
+
+def ndjson_line(document: dict) -> str:
+    # orjson encodes datetimes natively; anything else unknown becomes a string
+    return orjson.dumps(document, default=str).decode() + "\n"
+
+async def ndjson_stream(cursor):
+    """Encode documents from a Motor cursor as NDJSON without buffering them all."""
+    chunk = []
+    async for document in cursor:
+        chunk.append(ndjson_line(document))
+        if len(chunk) >= NDJSON_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
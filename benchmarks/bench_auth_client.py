@@ -0,0 +1,125 @@
+"""Session exchange latency: a new httpx client per login vs. the shared pooled client.
+
+Starts a local HTTPS mock of the identity provider with a throwaway
+self-signed certificate, so each new connection pays a real TCP and TLS
+handshake. Run from the repository root:
+
+    python -m benchmarks.bench_auth_client
+"""
+import asyncio
+import datetime
+import json
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from http_client import create_pooled_client  # noqa: E402
+
+LOGINS = int(os.environ.get("BENCH_LOGINS", "300"))
+SESSION_DATA = json.dumps({
+    "email": "owner@example.com", "name": "Owner", "picture": "", "session_token": "token"
+}).encode()
+
+
+class IdentityHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1, so the server keeps connections open like the real provider
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(SESSION_DATA)))
+        self.end_headers()
+        self.wfile.write(SESSION_DATA)
+
+    def log_message(self, *args):
+        pass
+
+
+def self_signed(directory: Path):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    return cert_path, key_path
+
+
+async def per_login_clients(url, verify):
+    # What exchange_session used to do: a fresh client, so one handshake per login
+    samples = []
+    for _ in range(LOGINS):
+        started = time.perf_counter()
+        async with httpx.AsyncClient(verify=verify) as client:
+            response = await client.get(url, headers={"X-Session-ID": "bench"})
+            response.json()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, LOGINS
+
+
+async def shared_client(url, verify):
+    client = create_pooled_client("bench", verify=verify)
+    samples = []
+    try:
+        for _ in range(LOGINS):
+            started = time.perf_counter()
+            response = await client.get(url, headers={"X-Session-ID": "bench"})
+            response.json()
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples, client.metrics.tls_handshakes
+    finally:
+        await client.aclose()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = self_signed(Path(directory))
+        server = ThreadingHTTPServer(("127.0.0.1", 0), IdentityHandler)
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert_path, key_path)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        url = f"https://localhost:{server.server_address[1]}/auth/v1/env/oauth/session-data"
+        verify = ssl.create_default_context(cafile=str(cert_path))
+        try:
+            print(f"{LOGINS} sequential session exchanges against a local HTTPS identity mock")
+            for label, run in (("client per login", per_login_clients), ("shared pooled client", shared_client)):
+                samples, handshakes = asyncio.run(run(url, verify))
+                print(
+                    f"{label:<22} median {statistics.median(samples):6.2f}ms  "
+                    f"p95 {statistics.quantiles(samples, n=20)[-1]:6.2f}ms  TLS handshakes {handshakes}"
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
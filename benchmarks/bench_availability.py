@@ -0,0 +1,70 @@
+"""Compare generate_slots with the nested loop it replaced.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_availability
+"""
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from backend.availability import generate_slots
+
+DAY = datetime(2030, 1, 7, tzinfo=timezone.utc)
+
+
+def legacy_slots(open_time, close_time, busy, duration, step):
+    # The loop get_available_slots used before backend/availability.py
+    slots = []
+    current = open_time
+    while current + duration <= close_time:
+        slot_end = current + duration
+        is_available = True
+        for apt_start, apt_end in busy:
+            if not (slot_end <= apt_start or current >= apt_end):
+                is_available = False
+                break
+        if is_available:
+            slots.append(current)
+        current += step
+    return slots
+
+
+def make_busy(count, rng):
+    # Random intervals covering roughly half of the day whatever the count,
+    # so the day never saturates and most slots stay bookable.
+    length = timedelta(days=1) / (2 * count)
+    busy = []
+    for _ in range(count):
+        start = DAY + timedelta(seconds=rng.randint(0, 24 * 3600 - 1))
+        busy.append((start, start + length))
+    return busy
+
+
+def main():
+    rng = random.Random(42)
+    open_time, close_time = DAY, DAY + timedelta(days=1)
+    duration = timedelta(minutes=5)
+    for step_minutes in (30, 5):
+        step = timedelta(minutes=step_minutes)
+        for count in (10, 100, 1000):
+            busy = make_busy(count, rng)
+            assert legacy_slots(open_time, close_time, busy, duration, step) == \
+                generate_slots(open_time, close_time, busy, duration, step)
+            number = 20
+            # Best of five runs, so a cold first run does not skew the small cases
+            legacy = min(timeit.repeat(
+                lambda: legacy_slots(open_time, close_time, busy, duration, step), repeat=5, number=number
+            )) / number
+            engine = min(timeit.repeat(
+                lambda: generate_slots(open_time, close_time, busy, duration, step), repeat=5, number=number
+            )) / number
+            print(
+                f"step={step_minutes:>2}min appointments={count:>5}  "
+                f"legacy={legacy * 1000:8.3f}ms  engine={engine * 1000:7.3f}ms  "
+                f"speedup={legacy / engine:6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
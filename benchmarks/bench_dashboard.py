@@ -0,0 +1,145 @@
+"""Dashboard latency: six sequential queries vs. the current implementation.
+
+Seeds a scratch database with one business holding 100k appointments and
+times both implementations. Needs a real mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python -m benchmarks.bench_dashboard
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("DB_NAME", "unused")
+
+from counters import rebuild_counters  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from routes.agenda import get_dashboard_stats  # noqa: E402
+
+APPOINTMENTS = int(os.environ.get("BENCH_APPOINTMENTS", "100000"))
+RUNS = int(os.environ.get("BENCH_RUNS", "30"))
+BUSINESS_ID = "biz_bench"
+
+
+async def legacy_dashboard(db, business_id):
+    # get_dashboard_stats before the $facet rewrite
+    now = datetime.now(timezone.utc)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start + timedelta(days=1)
+    week_start = today_start - timedelta(days=today_start.weekday())
+    month_start = today_start.replace(day=1)
+    today_count = await db.appointments.count_documents({
+        "business_id": business_id,
+        "start_time": {"$gte": today_start, "$lt": today_end},
+        "status": "scheduled"
+    })
+    week_count = await db.appointments.count_documents({
+        "business_id": business_id,
+        "start_time": {"$gte": week_start},
+        "status": {"$in": ["scheduled", "completed"]}
+    })
+    month_count = await db.appointments.count_documents({
+        "business_id": business_id,
+        "start_time": {"$gte": month_start},
+        "status": {"$in": ["scheduled", "completed"]}
+    })
+    today_appointments = await db.appointments.find(
+        {"business_id": business_id, "start_time": {"$gte": today_start, "$lt": today_end}},
+        {"_id": 0}
+    ).sort("start_time", 1).to_list(50)
+    upcoming = await db.appointments.find(
+        {
+            "business_id": business_id,
+            "start_time": {"$gte": now, "$lt": now + timedelta(days=7)},
+            "status": "scheduled"
+        },
+        {"_id": 0}
+    ).sort("start_time", 1).to_list(20)
+    total_clients = await db.clients.count_documents({"business_id": business_id})
+    return {
+        "stats": {
+            "today": today_count,
+            "this_week": week_count,
+            "this_month": month_count,
+            "total_clients": total_clients
+        },
+        "today_appointments": today_appointments,
+        "upcoming_appointments": upcoming
+    }
+
+
+async def seed(db):
+    rng = random.Random(1)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    # Two years of history plus a month of future bookings
+    span = timedelta(days=760).total_seconds()
+    batch = []
+    for i in range(APPOINTMENTS):
+        start = now - timedelta(days=730) + timedelta(seconds=rng.uniform(0, span))
+        batch.append({
+            "appointment_id": f"apt_{uuid.uuid4().hex[:12]}",
+            "business_id": BUSINESS_ID,
+            "client_id": f"client_{rng.randint(0, 5000)}",
+            "service_id": "svc_bench",
+            "staff_id": f"staff_{rng.randint(0, 5)}",
+            "start_time": start,
+            "end_time": start + timedelta(minutes=30),
+            "status": rng.choice(["scheduled", "completed", "completed", "canceled"]),
+            "notes": None,
+            "created_at": start - timedelta(days=3)
+        })
+        if len(batch) == 10000:
+            await db.appointments.insert_many(batch)
+            batch = []
+    if batch:
+        await db.appointments.insert_many(batch)
+    await db.clients.insert_many([
+        {"client_id": f"client_{i}", "business_id": BUSINESS_ID, "name": f"Client {i}"}
+        for i in range(5000)
+    ])
+
+
+async def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    name = f"corella_bench_{uuid.uuid4().hex[:8]}"
+    db = client[name]
+    try:
+        await ensure_indexes(db)
+        await seed(db)
+        await rebuild_counters(db, BUSINESS_ID)
+        tenant = SimpleNamespace(db=db)
+
+        legacy = await legacy_dashboard(db, BUSINESS_ID)
+        facet = await get_dashboard_stats(BUSINESS_ID, tenant)
+        assert legacy["stats"] == facet["stats"], (legacy["stats"], facet["stats"])
+
+        legacy_median, legacy_max = await timed(lambda: legacy_dashboard(db, BUSINESS_ID), RUNS)
+        facet_median, facet_max = await timed(lambda: get_dashboard_stats(BUSINESS_ID, tenant), RUNS)
+        print(f"{APPOINTMENTS} appointments, {RUNS} runs")
+        print(f"sequential queries: median {legacy_median:7.2f}ms  max {legacy_max:7.2f}ms")
+        print(f"current dashboard:  median {facet_median:7.2f}ms  max {facet_max:7.2f}ms")
+    finally:
+        await client.drop_database(name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""Serialize an appointment list the FastAPI default way and with FastJSONResponse.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialization
+"""
+import json
+import os
+import random
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.responses import FastJSONResponse
+
+APPOINTMENTS = int(os.environ.get("BENCH_APPOINTMENTS", "5000"))
+RUNS = int(os.environ.get("BENCH_RUNS", "20"))
+
+
+def make_appointments(count):
+    rng = random.Random(1)
+    start = datetime(2030, 1, 7, 9, 0, tzinfo=timezone.utc)
+    appointments = []
+    for _ in range(count):
+        begins = start + timedelta(minutes=30 * rng.randint(0, 20000))
+        appointments.append({
+            "appointment_id": f"apt_{uuid.uuid4().hex[:12]}",
+            "business_id": "biz_bench",
+            "client_id": f"client_{rng.randint(0, 5000)}",
+            "service_id": "svc_bench",
+            "staff_id": f"staff_{rng.randint(0, 5)}",
+            "start_time": begins,
+            "end_time": begins + timedelta(minutes=30),
+            "status": rng.choice(["scheduled", "completed", "canceled"]),
+            "notes": rng.choice([None, "Prefers the window seat"]),
+            "created_at": begins - timedelta(days=3, microseconds=rng.randint(0, 999999))
+        })
+    return appointments
+
+
+def default_path(content):
+    # What FastAPI does with a plain list returned by a handler
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def main():
+    appointments = make_appointments(APPOINTMENTS)
+    response = FastJSONResponse(content=None)
+    assert json.loads(default_path(appointments)) == json.loads(response.render(appointments))
+
+    print(f"{APPOINTMENTS} appointments, best of {RUNS} runs")
+    for label, fn in (
+        ("jsonable_encoder + json", lambda: default_path(appointments)),
+        ("FastJSONResponse", lambda: response.render(appointments)),
+    ):
+        best = min(timeit.repeat(fn, number=1, repeat=RUNS)) * 1000
+        print(f"{label:<24} {best:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
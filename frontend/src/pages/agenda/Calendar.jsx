@@ -20,6 +20,8 @@ const Calendar = ({ business }) => {
   const [view, setView] = useState('week');
   const [appointments, setAppointments] = useState([]);
   const [clients, setClients] = useState([]);
+  // Every client, loaded when the new appointment form first opens
+  const [clientOptions, setClientOptions] = useState(null);
   const [services, setServices] = useState([]);
   const [staff, setStaff] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -30,7 +32,9 @@ const Calendar = ({ business }) => {
     service_id: '',
     staff_id: '',
     start_time: '',
-    notes: ''
+    notes: '',
+    frequency: '',
+    count: ''
   });
   const [saving, setSaving] = useState(false);
 
@@ -46,17 +50,18 @@ const Calendar = ({ business }) => {
       const startDate = getWeekStart(currentDate).toISOString();
       const endDate = new Date(getWeekStart(currentDate).getTime() + 7 * 24 * 60 * 60 * 1000).toISOString();
 
-      const [aptsRes, clientsRes, servicesRes, staffRes] = await Promise.all([
-        fetch(`${API}/agenda/businesses/${business.business_id}/appointments?start_date=${startDate}&end_date=${endDate}`, { credentials: 'include' }),
-        fetch(`${API}/agenda/businesses/${business.business_id}/clients`, { credentials: 'include' }),
-        fetch(`${API}/agenda/businesses/${business.business_id}/services`, { credentials: 'include' }),
-        fetch(`${API}/agenda/businesses/${business.business_id}/staff`, { credentials: 'include' })
-      ]);
+      const res = await fetch(
+        `${API}/agenda/businesses/${business.business_id}/calendar?start=${encodeURIComponent(startDate)}&end=${encodeURIComponent(endDate)}`,
+        { credentials: 'include' }
+      );
 
-      if (aptsRes.ok) setAppointments(await aptsRes.json());
-      if (clientsRes.ok) setClients(await clientsRes.json());
-      if (servicesRes.ok) setServices(await servicesRes.json());
-      if (staffRes.ok) setStaff(await staffRes.json());
+      if (res.ok) {
+        const data = await res.json();
+        setAppointments(data.appointments);
+        setClients(data.clients);
+        setServices(data.services);
+        setStaff(data.staff);
+      }
     } catch (error) {
       console.error('Failed to fetch data:', error);
     } finally {
@@ -64,6 +69,21 @@ const Calendar = ({ business }) => {
     }
   };
 
+  const loadClientOptions = async () => {
+    if (clientOptions) return;
+    try {
+      const res = await fetch(`${API}/agenda/businesses/${business.business_id}/clients`, { credentials: 'include' });
+      if (res.ok) setClientOptions(await res.json());
+    } catch (error) {
+      console.error('Failed to fetch clients:', error);
+    }
+  };
+
+  const openModal = () => {
+    loadClientOptions();
+    setShowModal(true);
+  };
+
   const getWeekStart = (date) => {
     const d = new Date(date);
     const day = d.getDay();
@@ -109,9 +129,11 @@ const Calendar = ({ business }) => {
       service_id: '',
       staff_id: staff[0]?.staff_id || '',
       start_time: startTime.toISOString().slice(0, 16),
-      notes: ''
+      notes: '',
+      frequency: '',
+      count: ''
     });
-    setShowModal(true);
+    openModal();
   };
 
   const handleSubmit = async (e) => {
@@ -119,15 +141,18 @@ const Calendar = ({ business }) => {
     setSaving(true);
 
     try {
-      const res = await fetch(`${API}/agenda/businesses/${business.business_id}/appointments`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        credentials: 'include',
-        body: JSON.stringify({
-          ...formData,
-          start_time: new Date(formData.start_time).toISOString()
-        })
-      });
+      const { frequency, count, ...appointment } = formData;
+      const body = { ...appointment, start_time: new Date(formData.start_time).toISOString() };
+      // Repeating appointments are stored once as a series
+      const res = await fetch(
+        `${API}/agenda/businesses/${business.business_id}/${frequency ? 'series' : 'appointments'}`,
+        {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          credentials: 'include',
+          body: JSON.stringify(frequency ? { ...body, frequency, count: count ? Number(count) : null } : body)
+        }
+      );
 
       if (res.ok) {
         fetchData();
@@ -192,7 +217,7 @@ const Calendar = ({ business }) => {
               {getWeekStart(currentDate).toLocaleDateString('en-US', { month: 'long', year: 'numeric' })}
             </span>
           </div>
-          <button onClick={() => setShowModal(true)} className="btn-primary inline-flex items-center gap-2">
+          <button onClick={openModal} className="btn-primary inline-flex items-center gap-2">
             <Plus size={20} />
             New Appointment
           </button>
@@ -306,7 +331,7 @@ const Calendar = ({ business }) => {
                     required
                   >
                     <option value="">Select client</option>
-                    {clients.map((client) => (
+                    {(clientOptions || []).map((client) => (
                       <option key={client.client_id} value={client.client_id}>
                         {client.name}
                       </option>
@@ -362,6 +387,35 @@ const Calendar = ({ business }) => {
                   />
                 </div>
 
+                <div className="grid grid-cols-2 gap-3">
+                  <div>
+                    <label className="block text-sm font-medium text-primary-brand mb-1">Repeat</label>
+                    <select
+                      value={formData.frequency}
+                      onChange={(e) => setFormData({ ...formData, frequency: e.target.value })}
+                      className="w-full h-10 px-3 rounded-lg border border-black/10 bg-white"
+                    >
+                      <option value="">Does not repeat</option>
+                      <option value="weekly">Weekly</option>
+                      <option value="biweekly">Every 2 weeks</option>
+                      <option value="monthly">Monthly</option>
+                    </select>
+                  </div>
+                  {formData.frequency && (
+                    <div>
+                      <label className="block text-sm font-medium text-primary-brand mb-1">Occurrences</label>
+                      <Input
+                        type="number"
+                        min="1"
+                        placeholder="No end"
+                        value={formData.count}
+                        onChange={(e) => setFormData({ ...formData, count: e.target.value })}
+                        className="h-10 rounded-lg"
+                      />
+                    </div>
+                  )}
+                </div>
+
                 <div className="flex gap-3 pt-2">
                   <button type="button" onClick={() => setShowModal(false)} className="btn-secondary flex-1">
                     Cancel
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import AgendaLayout from '../../components/agenda/AgendaLayout';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Input } from '../../components/ui/input';
@@ -12,16 +12,24 @@ import {
   User,
   Mail,
   Phone,
-  Calendar
+  Calendar,
+  Upload
 } from 'lucide-react';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+const PAGE_SIZE = 100;
+
 const Clients = ({ business }) => {
   const [clients, setClients] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [search, setSearch] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
+  const [importing, setImporting] = useState(false);
+  const [importSummary, setImportSummary] = useState(null);
+  const fileInputRef = useRef(null);
   const [showModal, setShowModal] = useState(false);
   const [editingClient, setEditingClient] = useState(null);
   const [formData, setFormData] = useState({ name: '', email: '', phone: '', notes: '' });
@@ -33,13 +41,27 @@ const Clients = ({ business }) => {
     }
   }, [business]);
 
-  const fetchClients = async () => {
+  useEffect(() => {
+    if (!search.trim()) {
+      setSearchResults(null);
+      return;
+    }
+    // Debounce keystrokes before asking the server
+    const timer = setTimeout(() => searchClients(search), 250);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  const fetchClients = async (after = null) => {
     try {
-      const res = await fetch(`${API}/agenda/businesses/${business.business_id}/clients`, {
+      const params = new URLSearchParams({ limit: PAGE_SIZE });
+      if (after) params.set('after', after);
+      const res = await fetch(`${API}/agenda/businesses/${business.business_id}/clients?${params}`, {
         credentials: 'include'
       });
       if (res.ok) {
-        setClients(await res.json());
+        const data = await res.json();
+        setClients((prev) => (after ? [...prev, ...data.items] : data.items));
+        setNextCursor(data.next_cursor);
       }
     } catch (error) {
       console.error('Failed to fetch clients:', error);
@@ -48,6 +70,56 @@ const Clients = ({ business }) => {
     }
   };
 
+  const searchClients = async (query) => {
+    try {
+      const res = await fetch(
+        `${API}/agenda/businesses/${business.business_id}/clients/search?q=${encodeURIComponent(query)}`,
+        { credentials: 'include' }
+      );
+      if (res.ok) {
+        setSearchResults(await res.json());
+      }
+    } catch (error) {
+      console.error('Failed to search clients:', error);
+    }
+  };
+
+  const handleImport = async (e) => {
+    const file = e.target.files[0];
+    e.target.value = '';
+    if (!file) return;
+
+    setImporting(true);
+    setImportSummary(null);
+    try {
+      const body = new FormData();
+      body.append('file', file);
+      const res = await fetch(`${API}/agenda/businesses/${business.business_id}/clients/import`, {
+        method: 'POST',
+        credentials: 'include',
+        body
+      });
+      if (res.ok) {
+        // NDJSON: rejected rows first, the summary on the last line
+        const lines = (await res.text()).trim().split('\n').map((line) => JSON.parse(line));
+        setImportSummary(lines[lines.length - 1]);
+        refreshClients();
+      } else {
+        const error = await res.json();
+        setImportSummary({ status: 'failed', error: error.detail });
+      }
+    } catch (error) {
+      console.error('Failed to import clients:', error);
+    } finally {
+      setImporting(false);
+    }
+  };
+
+  const refreshClients = () => {
+    fetchClients();
+    if (search.trim()) searchClients(search);
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setSaving(true);
@@ -65,7 +137,7 @@ const Clients = ({ business }) => {
       });
 
       if (res.ok) {
-        fetchClients();
+        refreshClients();
         closeModal();
       }
     } catch (error) {
@@ -84,7 +156,7 @@ const Clients = ({ business }) => {
         { method: 'DELETE', credentials: 'include' }
       );
       if (res.ok) {
-        fetchClients();
+        refreshClients();
       }
     } catch (error) {
       console.error('Failed to delete client:', error);
@@ -108,11 +180,7 @@ const Clients = ({ business }) => {
     setFormData({ name: '', email: '', phone: '', notes: '' });
   };
 
-  const filteredClients = clients.filter(client =>
-    client.name.toLowerCase().includes(search.toLowerCase()) ||
-    client.email?.toLowerCase().includes(search.toLowerCase()) ||
-    client.phone?.includes(search)
-  );
+  const filteredClients = searchResults ?? clients;
 
   return (
     <AgendaLayout business={business}>
@@ -123,15 +191,40 @@ const Clients = ({ business }) => {
             <h1 className="text-2xl font-bold text-primary-brand">Clients</h1>
             <p className="text-secondary-brand">Manage your client database</p>
           </div>
-          <button
-            onClick={() => setShowModal(true)}
-            className="btn-primary inline-flex items-center gap-2"
-          >
-            <Plus size={20} />
-            Add Client
-          </button>
+          <div className="flex gap-2">
+            <input
+              ref={fileInputRef}
+              type="file"
+              accept=".csv,.xlsx"
+              onChange={handleImport}
+              className="hidden"
+            />
+            <button
+              onClick={() => fileInputRef.current?.click()}
+              disabled={importing}
+              className="btn-secondary inline-flex items-center gap-2"
+            >
+              <Upload size={20} />
+              {importing ? 'Importing...' : 'Import'}
+            </button>
+            <button
+              onClick={() => setShowModal(true)}
+              className="btn-primary inline-flex items-center gap-2"
+            >
+              <Plus size={20} />
+              Add Client
+            </button>
+          </div>
         </div>
 
+        {importSummary && (
+          <p className="text-sm text-secondary-brand">
+            {importSummary.status === 'done'
+              ? `Imported ${importSummary.created} clients, skipped ${importSummary.duplicates} duplicates and ${importSummary.errors} invalid rows.`
+              : `Import failed: ${importSummary.error}`}
+          </p>
+        )}
+
         {/* Search */}
         <div className="relative">
           <Search size={20} className="absolute left-3 top-1/2 -translate-y-1/2 text-muted-brand" />
@@ -195,6 +288,13 @@ const Clients = ({ business }) => {
                 </CardContent>
               </Card>
             ))}
+            {!searchResults && nextCursor && (
+              <div className="md:col-span-2 lg:col-span-3 flex justify-center">
+                <button onClick={() => fetchClients(nextCursor)} className="btn-secondary">
+                  Load more
+                </button>
+              </div>
+            )}
           </div>
         ) : (
           <Card className="border border-black/5">
@@ -32,6 +32,7 @@ const PublicBooking = () => {
   const [selectedDate, setSelectedDate] = useState(null);
   const [selectedSlot, setSelectedSlot] = useState(null);
   const [availableSlots, setAvailableSlots] = useState([]);
+  const [monthSlots, setMonthSlots] = useState({});
   const [loadingSlots, setLoadingSlots] = useState(false);
   const [booking, setBooking] = useState(false);
   const [booked, setBooked] = useState(null);
@@ -49,10 +50,16 @@ const PublicBooking = () => {
   }, [slug]);
 
   useEffect(() => {
-    if (selectedService && selectedStaff && selectedDate) {
-      fetchAvailableSlots();
+    if (selectedService && selectedStaff) {
+      fetchMonthAvailability();
     }
-  }, [selectedService, selectedStaff, selectedDate]);
+  }, [selectedService, selectedStaff, currentMonth]);
+
+  useEffect(() => {
+    if (selectedDate) {
+      setAvailableSlots(monthSlots[toDateKey(selectedDate)] || []);
+    }
+  }, [selectedDate, monthSlots]);
 
   const fetchBusiness = async () => {
     try {
@@ -75,16 +82,26 @@ const PublicBooking = () => {
     }
   };
 
-  const fetchAvailableSlots = async () => {
+  // Local calendar date as yyyy-MM-dd; toISOString would shift it to UTC
+  const toDateKey = (date) => [
+    date.getFullYear(),
+    String(date.getMonth() + 1).padStart(2, '0'),
+    String(date.getDate()).padStart(2, '0')
+  ].join('-');
+
+  const fetchMonthAvailability = async () => {
     setLoadingSlots(true);
     try {
-      const dateStr = selectedDate.toISOString().split('T')[0];
+      const year = currentMonth.getFullYear();
+      const month = currentMonth.getMonth();
+      const from = toDateKey(new Date(year, month, 1));
+      const to = toDateKey(new Date(year, month + 1, 0));
       const res = await fetch(
-        `${API}/agenda/public/${slug}/available-slots?staff_id=${selectedStaff.staff_id}&service_id=${selectedService.service_id}&date=${dateStr}`
+        `${API}/agenda/public/${slug}/availability?staff_id=${selectedStaff.staff_id}&service_id=${selectedService.service_id}&from=${from}&to=${to}`
       );
       if (res.ok) {
         const data = await res.json();
-        setAvailableSlots(data.slots);
+        setMonthSlots(data.days);
       }
     } catch (err) {
       console.error('Failed to fetch slots:', err);
@@ -0,0 +1,114 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Backend modules import their siblings as top-level modules (``from search
+# import ...``), the way server.py runs them
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture
+def make_db():
+    """Factory for an isolated test database.
+
+    Uses a real mongod when TEST_MONGO_URL is set, mongomock-motor otherwise.
+    Call it inside the test's event loop, since Motor binds to the running loop.
+    """
+    url = os.environ.get("TEST_MONGO_URL")
+    if not url:
+        mongomock_motor = pytest.importorskip("mongomock_motor")
+        yield lambda: mongomock_motor.AsyncMongoMockClient()["corella_test"]
+        return
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo import MongoClient
+
+    name = f"corella_test_{uuid.uuid4().hex[:8]}"
+    clients = []
+
+    def factory():
+        client = AsyncIOMotorClient(url)
+        clients.append(client)
+        return client[name]
+
+    yield factory
+
+    for client in clients:
+        client.close()
+    with MongoClient(url) as client:
+        client.drop_database(name)
+
+
+@pytest.fixture
+def anyio_backend():
+    # Motor only runs on asyncio
+    return "asyncio"
+
+
+@pytest.fixture
+async def db(make_db, anyio_backend):
+    """Test database with the indexes server.py creates, for ``pytest.mark.anyio`` tests."""
+    from indexes import ensure_indexes
+
+    database = make_db()
+    await ensure_indexes(database)
+    return database
+
+
+@pytest.fixture
+def api(make_db, monkeypatch):
+    """TestClient over the API routes server.py mounts, backed by a test database.
+
+    The client is signed in as ``user_test``, owner of business ``biz_test``
+    (slug ``test-studio``). Run coroutines against ``client.app.state.db``
+    in the client's event loop with ``client.portal.call``.
+    """
+    pytest.importorskip("fastapi")
+    from contextlib import asynccontextmanager
+    from datetime import datetime, timedelta, timezone
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    # server.py reads these at import; the test app never connects with them
+    monkeypatch.setenv("MONGO_URL", os.environ.get("TEST_MONGO_URL", "mongodb://localhost:27017"))
+    monkeypatch.setenv("DB_NAME", "corella_test")
+    from server import api_router
+    from billing_events import BillingEventProcessor
+    from indexes import ensure_indexes
+    from middleware.tenant import ownership_cache
+    from responses import FastJSONResponse
+    from routes.agenda import public_page_cache
+    from routes.auth import session_cache
+
+    for cache in (ownership_cache, public_page_cache, session_cache):
+        cache.clear()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        db = make_db()
+        app.state.db = db
+        await ensure_indexes(db)
+        now = datetime.now(timezone.utc)
+        await db.users.insert_one(
+            {"user_id": "user_test", "email": "owner@example.com", "name": "Owner", "created_at": now}
+        )
+        await db.user_sessions.insert_one(
+            {"user_id": "user_test", "session_token": "token_test", "expires_at": now + timedelta(days=1)}
+        )
+        await db.businesses.insert_one({
+            "business_id": "biz_test", "owner_id": "user_test", "name": "Test Studio", "slug": "test-studio",
+            "timezone": "UTC", "working_hours": {}, "version": 0, "created_at": now
+        })
+        app.state.billing_events = BillingEventProcessor(db, poll_interval=0.05)
+        app.state.billing_events.start()
+        yield
+        await app.state.billing_events.stop()
+
+    app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+    app.include_router(api_router)
+    with TestClient(app, headers={"Authorization": "Bearer token_test"}) as client:
+        yield client
@@ -0,0 +1,247 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+BUSINESS = "/api/agenda/businesses/biz_test"
+START = datetime(2030, 1, 7, 10, 0, tzinfo=timezone.utc)
+
+
+def seed(api):
+    """Create a staff member, a 30 minute service and a client through the API."""
+    staff = api.post(f"{BUSINESS}/staff", json={"name": "Ana", "email": "ana@example.com"}).json()
+    service = api.post(f"{BUSINESS}/services", json={"name": "Haircut", "duration": 30, "price": 20}).json()
+    client = api.post(f"{BUSINESS}/clients", json={"name": "Bruno", "email": "bruno@example.com"}).json()
+    return staff["staff_id"], service["service_id"], client["client_id"]
+
+
+def book(api, staff_id, service_id, client_id, start=START):
+    return api.post(f"{BUSINESS}/appointments", json={
+        "client_id": client_id, "service_id": service_id, "staff_id": staff_id, "start_time": start.isoformat()
+    })
+
+
+def test_notes_edit_on_canceled_appointment_keeps_slot_free(api):
+    staff_id, service_id, client_id = seed(api)
+    appointment_id = book(api, staff_id, service_id, client_id).json()["appointment_id"]
+    assert api.delete(f"{BUSINESS}/appointments/{appointment_id}").status_code == 200
+
+    # Someone else takes the freed slot
+    assert book(api, staff_id, service_id, client_id).status_code == 200
+
+    response = api.put(f"{BUSINESS}/appointments/{appointment_id}", json={"notes": "Called to apologize"})
+    assert response.status_code == 200
+    db = api.app.state.db
+    guard = api.portal.call(db.slot_reservations.find_one, {"business_id": "biz_test", "staff_id": staff_id})
+    assert all(interval["appointment_id"] != appointment_id for interval in guard["intervals"])
+
+
+def test_unauthenticated_and_foreign_businesses_are_rejected(api):
+    assert api.get(f"{BUSINESS}/staff", headers={"Authorization": ""}).status_code == 401
+    assert api.get(f"{BUSINESS}/staff", headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert api.get("/api/agenda/businesses/biz_other/staff").status_code == 404
+    assert api.get(f"{BUSINESS}/staff").status_code == 200
+    # Ownership is cached per (user, business); another user's session must not reuse it
+    db = api.app.state.db
+    expires = datetime.now(timezone.utc) + timedelta(days=1)
+    api.portal.call(db.users.insert_one, {"user_id": "user_other", "email": "other@example.com", "name": "Other"})
+    api.portal.call(
+        db.user_sessions.insert_one, {"user_id": "user_other", "session_token": "token_other", "expires_at": expires}
+    )
+    assert api.get(f"{BUSINESS}/staff", headers={"Authorization": "Bearer token_other"}).status_code == 404
+
+
+def test_public_page_revalidates_with_etag(api):
+    from routes.agenda import public_page_cache
+
+    first = api.get("/api/agenda/public/test-studio")
+    assert first.status_code == 200
+    assert first.json()["business"]["name"] == "Test Studio"
+    etag = first.headers["etag"]
+
+    # From the per-worker cache, then from Mongo once the cache is cold
+    assert api.get("/api/agenda/public/test-studio", headers={"If-None-Match": etag}).status_code == 304
+    public_page_cache.clear()
+    cold = api.get("/api/agenda/public/test-studio", headers={"If-None-Match": f'W/{etag}'})
+    assert cold.status_code == 304 and cold.headers["etag"] == etag
+
+    assert api.put(f"{BUSINESS}", json={"name": "Renamed Studio"}).status_code == 200
+    changed = api.get("/api/agenda/public/test-studio", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["business"]["name"] == "Renamed Studio"
+
+    # Adding a service changes the page too
+    seed(api)
+    assert api.get(
+        "/api/agenda/public/test-studio", headers={"If-None-Match": changed.headers["etag"]}
+    ).status_code == 200
+
+
+def test_calendar_bundle_carries_referenced_clients_only(api):
+    staff_id, service_id, client_id = seed(api)
+    api.post(f"{BUSINESS}/clients", json={"name": "Carla", "email": "carla@example.com"})
+    booked = book(api, staff_id, service_id, client_id).json()
+    book(api, staff_id, service_id, client_id, START + timedelta(days=30))
+
+    response = api.get(f"{BUSINESS}/calendar", params={
+        "start": START.date().isoformat(), "end": (START + timedelta(days=7)).date().isoformat()
+    })
+    assert response.status_code == 200
+    bundle = response.json()
+    assert [apt["appointment_id"] for apt in bundle["appointments"]] == [booked["appointment_id"]]
+    assert [client["client_id"] for client in bundle["clients"]] == [client_id]
+    assert [service["service_id"] for service in bundle["services"]] == [service_id]
+    assert [staff["staff_id"] for staff in bundle["staff"]] == [staff_id]
+
+
+def test_xlsx_import_streams_results_and_summary(api):
+    import io
+    import json
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    workbook.active.append(["Name", "Email"])
+    workbook.active.append(["Bruno", "BRUNO@example.com"])
+    workbook.active.append(["Carla", "carla@example.com"])
+    upload = io.BytesIO()
+    workbook.save(upload)
+
+    seed(api)
+    response = api.post(f"{BUSINESS}/clients/import", files={"file": ("clients.xlsx", upload.getvalue())})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {"row": 2, "status": "duplicate"},
+        {"status": "done", "created": 1, "duplicates": 1, "errors": 0},
+    ]
+
+
+def create_series(api, staff_id, service_id, client_id, **fields):
+    return api.post(f"{BUSINESS}/series", json={
+        "client_id": client_id, "service_id": service_id, "staff_id": staff_id,
+        "start_time": START.isoformat(), "frequency": "weekly", **fields
+    })
+
+
+def test_series_occurrences_show_in_export_and_history(api):
+    staff_id, service_id, client_id = seed(api)
+    booked = book(api, staff_id, service_id, client_id, START + timedelta(days=1)).json()
+    series_id = create_series(api, staff_id, service_id, client_id, count=2).json()["series_id"]
+
+    export = api.get(f"{BUSINESS}/appointments/export", params={
+        "format": "ndjson", "start_date": START.isoformat(), "end_date": (START + timedelta(days=30)).isoformat()
+    })
+    assert export.status_code == 200
+    exported = [json.loads(line)["appointment_id"] for line in export.text.splitlines()]
+    assert exported == [f"{series_id}_20300107T100000Z", booked["appointment_id"], f"{series_id}_20300114T100000Z"]
+
+    history = api.get(f"{BUSINESS}/clients/{client_id}/history", params={"fields": "status"}).json()
+    assert [apt["appointment_id"] for apt in history] == list(reversed(exported))
+    assert all(set(apt) == {"appointment_id", "start_time", "status"} for apt in history)
+
+
+def test_series_is_checked_against_reserved_slots(api):
+    from reservations import reserve_slot
+
+    staff_id, service_id, client_id = seed(api)
+    db = api.app.state.db
+    # A one-off booking that has reserved its slot but not inserted the appointment yet
+    api.portal.call(
+        reserve_slot, db, "biz_test", staff_id, "apt_pending", START + timedelta(weeks=1), START + timedelta(weeks=1, minutes=30)
+    )
+
+    response = create_series(api, staff_id, service_id, client_id, count=3)
+    assert response.status_code == 400
+    assert api.portal.call(db.appointment_series.count_documents, {}) == 0
+
+
+def test_corrupt_xlsx_import_ends_with_a_failed_summary(api):
+    response = api.post(f"{BUSINESS}/clients/import", files={"file": ("clients.xlsx", b"PK\x03\x04 not a workbook")})
+    assert response.status_code == 200
+    assert response.text.splitlines() == [
+        '{"status":"failed","error":"Not a valid XLSX workbook","created":0,"duplicates":0,"errors":0}'
+    ]
+
+
+def test_bulk_import_rechecks_series_after_reserving(api, monkeypatch):
+    import routes.agenda
+    from recurrence import occurrence_bounds
+
+    staff_id, service_id, client_id = seed(api)
+    db = api.app.state.db
+    reserve_many = routes.agenda.reserve_many
+
+    async def series_created_meanwhile(db, business_id, appointments):
+        series = {
+            "series_id": "series_meanwhile", "business_id": business_id, "client_id": client_id,
+            "service_id": service_id, "staff_id": staff_id, "start_time": START, "duration": 30,
+            "frequency": "weekly", "until": None, "count": 2, "notes": None, "overrides": {},
+            "created_at": START
+        }
+        series["first_start"], series["last_end"] = occurrence_bounds(series)
+        await db.appointment_series.insert_one(series)
+        return await reserve_many(db, business_id, appointments)
+
+    monkeypatch.setattr(routes.agenda, "reserve_many", series_created_meanwhile)
+    row = {"client_id": client_id, "service_id": service_id, "staff_id": staff_id}
+    response = api.post(f"{BUSINESS}/appointments/bulk", json=[
+        {**row, "start_time": START.isoformat()},
+        {**row, "start_time": (START + timedelta(hours=2)).isoformat()},
+    ])
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()["results"]] == ["error", "created"]
+    # The rejected row gave its slot back
+    guard = api.portal.call(db.slot_reservations.find_one, {"business_id": "biz_test", "staff_id": staff_id})
+    assert [interval["start"].hour for interval in guard["intervals"]] == [12]
+
+
+def test_occurrence_edits_are_checked_against_reserved_slots(api):
+    staff_id, service_id, client_id = seed(api)
+    series_id = create_series(api, staff_id, service_id, client_id, count=3).json()["series_id"]
+    occurrence = f"{BUSINESS}/series/{series_id}/occurrences/20300114T100000Z"
+    db = api.app.state.db
+
+    # Moving onto a booked slot fails and leaves the occurrence as it was
+    booked = book(api, staff_id, service_id, client_id, START + timedelta(days=8)).json()
+    assert api.put(occurrence, json={"start_time": booked["start_time"]}).status_code == 400
+    series = api.portal.call(db.appointment_series.find_one, {"series_id": series_id})
+    assert series["overrides"] == {}
+
+    # A skipped occurrence whose slot was taken cannot be scheduled again
+    assert api.put(occurrence, json={"status": "canceled"}).status_code == 200
+    assert book(api, staff_id, service_id, client_id, START + timedelta(weeks=1)).status_code == 200
+    assert api.put(occurrence, json={"status": "scheduled"}).status_code == 400
+    series = api.portal.call(db.appointment_series.find_one, {"series_id": series_id})
+    assert series["overrides"]["20300114T100000Z"]["status"] == "canceled"
+
+
+def test_series_claims_one_unit_of_quota(api):
+    staff_id, service_id, client_id = seed(api)
+    # More occurrences than the basic plan's 100 appointments a month
+    assert create_series(api, staff_id, service_id, client_id, count=150).status_code == 200
+    db = api.app.state.db
+    bucket = api.portal.call(db.business_counters.find_one, {"business_id": "biz_test", "period": "month"})
+    assert bucket["created"] == 1
+
+
+def test_duplicate_business_slug_is_rejected(api):
+    business = {"name": "Other Studio", "slug": "test-studio"}
+    response = api.post("/api/agenda/businesses", json=business)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Business slug already exists"
+    assert api.post("/api/agenda/businesses", json={**business, "slug": "other-studio"}).status_code == 200
+
+
+def test_slug_race_loser_gets_a_400(api, monkeypatch):
+    # As if another request inserted the slug after the pre-check ran
+    collection = type(api.app.state.db.businesses)
+    find_one = collection.find_one
+
+    async def missed_check(self, filter=None, *args, **kwargs):
+        if self.name == "businesses" and "slug" in (filter or {}):
+            return None
+        return await find_one(self, filter, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "find_one", missed_check)
+    response = api.post("/api/agenda/businesses", json={"name": "Other Studio", "slug": "test-studio"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Business slug already exists"
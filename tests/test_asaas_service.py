@@ -0,0 +1,169 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from asaas_service import AsaasService, create_asaas_client
+from http_client import CircuitBreaker, CircuitOpenError, send_with_retries
+
+
+class StubGateway:
+    """Local HTTP server answering each path from a scripted list of (status, body)."""
+
+    def __init__(self):
+        self.script = {}
+        self.hits = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _answer(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                path = self.path.split("?")[0]
+                stub.hits.append((self.command, path, self.headers.get("access_token")))
+                replies = stub.script.get((self.command, path)) or [(404, {})]
+                status, body = replies.pop(0) if len(replies) > 1 else replies[0]
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _answer
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def gateway():
+    stub = StubGateway()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def service_for(url, breaker=None):
+    return AsaasService(create_asaas_client(url, "key"), breaker=breaker, backoff_base=0)
+
+
+BUSINESS = SimpleNamespace(id="biz_1", name="Studio", email="owner@example.com")
+
+
+@pytest.mark.anyio
+async def test_lookups_are_retried_and_creations_are_not(gateway):
+    gateway.script[("GET", "/subscriptions/sub_1")] = [(503, {}), (503, {}), (200, {"id": "sub_1"})]
+    gateway.script[("POST", "/customers")] = [(503, {}), (200, {"id": "cus_1"})]
+
+    service = service_for(gateway.url)
+    try:
+        assert await service.get_subscription("sub_1") == {"id": "sub_1"}
+        with pytest.raises(httpx.HTTPStatusError):
+            await service.create_customer(BUSINESS)
+    finally:
+        await service.aclose()
+    assert [hit[:2] for hit in gateway.hits].count(("GET", "/subscriptions/sub_1")) == 3
+    assert [hit[:2] for hit in gateway.hits].count(("POST", "/customers")) == 1
+    assert all(token == "key" for _, _, token in gateway.hits)
+
+
+@pytest.mark.anyio
+async def test_breaker_fails_fast_then_lets_one_trial_through(gateway):
+    gateway.script[("POST", "/customers")] = [(500, {}), (500, {}), (200, {"id": "cus_1"})]
+    clock = FakeClock()
+    breaker = CircuitBreaker("asaas", failure_threshold=2, reset_timeout=30, clock=clock)
+
+    service = service_for(gateway.url, breaker)
+    try:
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await service.create_customer(BUSINESS)
+        with pytest.raises(CircuitOpenError):
+            await service.create_customer(BUSINESS)
+        assert len(gateway.hits) == 2
+
+        clock.now += 30
+        assert breaker.state == "half-open"
+        assert await service.create_customer(BUSINESS) == {"id": "cus_1"}
+        assert breaker.state == "closed"
+    finally:
+        await service.aclose()
+
+
+@pytest.mark.anyio
+async def test_unreachable_gateway_opens_the_breaker():
+    breaker = CircuitBreaker("asaas", failure_threshold=3, reset_timeout=30, clock=FakeClock())
+
+    # Nothing listens on port 9 (discard) here; the connection is refused
+    service = service_for("http://127.0.0.1:9", breaker)
+    try:
+        # Connection errors are retried even for a creation, since nothing was sent
+        with pytest.raises(httpx.ConnectError):
+            await service.create_customer(BUSINESS)
+        with pytest.raises(CircuitOpenError):
+            await service.find_customer("biz_1")
+    finally:
+        await service.aclose()
+    assert breaker.state == "open"
+
+
+def test_failed_trial_reopens_the_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker("svc", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 10
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+@pytest.mark.anyio
+async def test_cancelled_or_crashed_trial_frees_the_trial_slot():
+    clock = FakeClock()
+    breaker = CircuitBreaker("svc", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.before_call()
+    breaker.record_failure()
+    clock.now += 10
+    started = asyncio.Event()
+
+    async def hang(request):
+        started.set()
+        await asyncio.Event().wait()
+
+    def crash(request):
+        raise RuntimeError("bad request body")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(hang)) as client:
+        trial = asyncio.create_task(send_with_retries(client, "GET", "http://svc/", breaker=breaker))
+        await started.wait()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(crash)) as client:
+        with pytest.raises(RuntimeError):
+            await send_with_retries(client, "GET", "http://svc/", breaker=breaker)
+    assert breaker.state == "half-open"
+    breaker.before_call()  # still a trial to spend
@@ -0,0 +1,80 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from availability import find_overlaps, free_windows, generate_slots, merge_intervals
+
+DAY = datetime(2030, 1, 7, tzinfo=timezone.utc)
+
+
+def at(hour, minute=0):
+    return DAY.replace(hour=hour, minute=minute)
+
+
+def brute_force_slots(open_time, close_time, busy, duration, step):
+    slots = []
+    current = open_time
+    while current + duration <= close_time:
+        end = current + duration
+        if all(end <= start or current >= stop for start, stop in busy):
+            slots.append(current)
+        current += step
+    return slots
+
+
+def test_merge_intervals_sorts_and_merges():
+    busy = [(at(11), at(12)), (at(9), at(10)), (at(9, 30), at(10, 30)), (at(10, 30), at(10, 45))]
+    assert merge_intervals(busy) == [(at(9), at(10, 45)), (at(11), at(12))]
+
+
+def test_free_windows_clips_to_working_hours():
+    busy = [(at(8), at(9, 30)), (at(12), at(13)), (at(17, 30), at(19))]
+    assert free_windows(at(9), at(18), busy) == [(at(9, 30), at(12)), (at(13), at(17, 30))]
+
+
+def test_slots_stay_on_grid_after_busy_interval():
+    busy = [(at(9), at(9, 45))]
+    slots = generate_slots(at(9), at(11), busy, timedelta(minutes=30), timedelta(minutes=30))
+    assert slots == [at(10), at(10, 30)]
+
+
+def test_matches_brute_force_on_random_days():
+    rng = random.Random(7)
+    for _ in range(200):
+        busy = []
+        for _ in range(rng.randint(0, 12)):
+            start = at(7) + timedelta(minutes=5 * rng.randint(0, 150))
+            busy.append((start, start + timedelta(minutes=5 * rng.randint(1, 24))))
+        duration = timedelta(minutes=15 * rng.randint(1, 8))
+        step = timedelta(minutes=rng.choice([10, 15, 30]))
+        expected = brute_force_slots(at(9), at(18), busy, duration, step)
+        assert generate_slots(at(9), at(18), busy, duration, step) == expected
+
+
+def test_find_overlaps_within_batch_and_against_busy():
+    busy = [(at(9), at(10)), (at(13), at(14))]
+    candidates = [
+        (at(11), at(12), "b"),
+        (at(9, 30), at(10, 30), "a"),
+        (at(11, 30), at(12, 30), "c"),
+        (at(12, 30), at(13), "d"),
+        (at(12, 45), at(13, 15), "e"),
+        (at(14), at(15), "f"),
+    ]
+    assert find_overlaps(candidates, busy) == {"a": None, "c": "b", "e": "d"}
+
+
+def test_find_overlaps_matches_pairwise_check():
+    rng = random.Random(7)
+    for _ in range(200):
+        busy = [(at(8) + timedelta(minutes=m), at(8) + timedelta(minutes=m) + timedelta(minutes=rng.choice([15, 30, 60])))
+                for m in rng.sample(range(0, 600, 15), 5)]
+        candidates = [(at(8) + timedelta(minutes=m), at(8) + timedelta(minutes=m) + timedelta(minutes=rng.choice([15, 30, 45])), i)
+                      for i, m in enumerate(rng.sample(range(0, 600, 15), 12))]
+        accepted = []
+        expected = set()
+        for start, end, key in sorted(candidates, key=lambda c: c[0]):
+            if any(start < stop and end > begin for begin, stop in busy + accepted):
+                expected.add(key)
+            else:
+                accepted.append((start, end))
+        assert set(find_overlaps(candidates, busy)) == expected
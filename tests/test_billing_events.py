@@ -0,0 +1,113 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from billing_events import GRACE_PERIOD, LEASE, claim_batch, enqueue_event, process_batch
+
+RECEIVED = datetime(2030, 2, 1, 0, 0, tzinfo=timezone.utc)
+
+
+def payment_event(event_id, event, subscription="sub_1"):
+    return {"id": event_id, "event": event, "payment": {"id": "pay_1", "customer": "cus_1", "subscription": subscription}}
+
+
+async def billing_doc(db):
+    return await db.billing.find_one({"user_id": "user_1"}, {"_id": 0})
+
+
+@pytest.mark.anyio
+async def test_redelivered_events_are_dropped(db):
+    assert await enqueue_event(db, payment_event("evt_1", "PAYMENT_CONFIRMED"))
+    assert not await enqueue_event(db, payment_event("evt_1", "PAYMENT_CONFIRMED"))
+    assert await db.billing_events.count_documents({}) == 1
+
+
+@pytest.mark.anyio
+async def test_batch_applies_latest_transition(db):
+    await db.billing.insert_one({"user_id": "user_1", "status": "active", "asaas_subscription_id": "sub_1"})
+    await enqueue_event(db, payment_event("evt_1", "PAYMENT_CONFIRMED"), now=RECEIVED)
+    await enqueue_event(db, payment_event("evt_2", "PAYMENT_OVERDUE"), now=RECEIVED + timedelta(seconds=1))
+    await enqueue_event(db, payment_event("evt_3", "PAYMENT_CREATED"), now=RECEIVED + timedelta(seconds=2))
+
+    assert await process_batch(db) == 3
+    billing = await billing_doc(db)
+    assert billing["status"] == "past_due"
+    assert billing["grace_period_end"].replace(tzinfo=timezone.utc) == RECEIVED + timedelta(seconds=1) + GRACE_PERIOD
+
+    statuses = {event["event_id"]: event["status"] async for event in db.billing_events.find()}
+    assert statuses == {"evt_1": "processed", "evt_2": "processed", "evt_3": "ignored"}
+    assert await process_batch(db) == 0
+
+
+@pytest.mark.anyio
+async def test_older_event_does_not_roll_back(db):
+    await db.billing.insert_one({"user_id": "user_1", "status": "trialing", "asaas_subscription_id": "sub_1"})
+    await enqueue_event(db, payment_event("evt_2", "PAYMENT_CONFIRMED"), now=RECEIVED + timedelta(hours=1))
+    await process_batch(db)
+    # Delivered late, but received before the confirmation
+    await enqueue_event(db, payment_event("evt_1", "PAYMENT_OVERDUE"), now=RECEIVED)
+    await process_batch(db)
+
+    assert (await billing_doc(db))["status"] == "active"
+
+
+@pytest.mark.anyio
+async def test_expired_lease_is_claimed_again(db):
+    await enqueue_event(db, payment_event("evt_1", "PAYMENT_CONFIRMED"), now=RECEIVED)
+
+    first = await claim_batch(db, now=RECEIVED)
+    assert [event["event_id"] for event in first] == ["evt_1"]
+    assert await claim_batch(db, now=RECEIVED + timedelta(minutes=1)) == []
+
+    again = await claim_batch(db, now=RECEIVED + LEASE + timedelta(seconds=1))
+    assert [event["event_id"] for event in again] == ["evt_1"]
+    assert again[0]["batch_id"] != first[0]["batch_id"]
+
+
+def test_webhook_queues_events_for_the_processor(api):
+    db = api.app.state.db
+    api.portal.call(db.billing.insert_one, {"user_id": "user_test", "status": "trialing", "asaas_subscription_id": "sub_1"})
+
+    response = api.post("/api/billing/webhook", json=payment_event("evt_1", "PAYMENT_CONFIRMED"))
+    assert response.status_code == 202
+    assert response.json() == {"received": True, "duplicate": False}
+    assert api.post("/api/billing/webhook", json=payment_event("evt_1", "PAYMENT_CONFIRMED")).json()["duplicate"]
+    assert api.post("/api/billing/webhook", json={"event": "PAYMENT_CONFIRMED"}).status_code == 422
+
+    # Applied in the background by the processor the webhook notified
+    deadline = time.monotonic() + 5
+    while api.portal.call(db.billing.find_one, {"user_id": "user_test"})["status"] != "active":
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    assert api.portal.call(db.billing_events.count_documents, {"status": "processed"}) == 1
+
+
+class FakeAsaas:
+    async def find_customer(self, external_reference):
+        return None
+
+    async def create_customer(self, account):
+        self.account = account
+        return {"id": "cus_1"}
+
+    async def create_subscription(self, customer_id, plan):
+        self.plan = plan
+        return {"id": "sub_1", "customer": customer_id, "status": "ACTIVE"}
+
+
+def test_subscribe_records_gateway_ids(api):
+    api.app.state.asaas = asaas = FakeAsaas()
+
+    assert api.post("/api/billing/subscribe", params={"plan": "gold"}).status_code == 400
+    response = api.post("/api/billing/subscribe", params={"plan": "pro"})
+    assert response.status_code == 200
+    assert asaas.account.id == "user_test" and asaas.plan.price == 19
+
+    billing = api.portal.call(db_billing, api.app.state.db)
+    assert billing["plan_id"] == "pro" and billing["status"] == "pending"
+    assert (billing["asaas_customer_id"], billing["asaas_subscription_id"]) == ("cus_1", "sub_1")
+
+
+async def db_billing(db):
+    return await db.billing.find_one({"user_id": "user_test"}, {"_id": 0})
@@ -0,0 +1,48 @@
+import time
+
+from cache import TTLCache
+
+
+def test_get_counts_hits_and_misses():
+    cache = TTLCache(maxsize=4, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_expire(monkeypatch):
+    cache = TTLCache(maxsize=2, ttl=60)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache.set("a", 1, ttl=5)
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cannot_exceed_default():
+    cache = TTLCache(maxsize=2, ttl=1)
+    cache.set("a", 1, ttl=3600)
+    assert cache._data["a"][1] <= time.monotonic() + 1
+
+
+def test_discard_where():
+    cache = TTLCache()
+    cache.set("t1", {"user_id": "u1"})
+    cache.set("t2", {"user_id": "u2"})
+    assert cache.discard_where(lambda key, value: value["user_id"] == "u1") == 1
+    assert cache.get("t1") is None
+    assert cache.get("t2") == {"user_id": "u2"}
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from counters import (
+    claim_created, load_counters, rebuild_counters, record_appointment_change, release_created, sum_counters
+)
+
+START = datetime(2030, 1, 7, 10, 0, tzinfo=timezone.utc)
+CREATED = datetime(2029, 12, 20, tzinfo=timezone.utc)
+
+
+async def snapshot(db):
+    buckets = await load_counters(db, "biz", "0000-00-00", "0000-00")
+    return {
+        (bucket["period"], bucket["key"]): {
+            field: value for field, value in bucket.items()
+            if field not in ("business_id", "period", "key") and value
+        }
+        for bucket in buckets
+    }
+
+
+@pytest.mark.anyio
+async def test_transitions_move_counts_between_buckets(db):
+    await record_appointment_change(db, "biz", after=(START, "scheduled"), created_at=CREATED)
+    await record_appointment_change(db, "biz", after=(START, "scheduled"), created_at=CREATED)
+    await record_appointment_change(db, "biz", before=(START, "scheduled"), after=(START, "canceled"))
+    moved = START + timedelta(days=31)
+    await record_appointment_change(db, "biz", before=(START, "scheduled"), after=(moved, "scheduled"))
+
+    assert await snapshot(db) == {
+        ("day", "2030-01-07"): {"canceled": 1},
+        ("month", "2030-01"): {"canceled": 1},
+        ("day", "2030-02-07"): {"scheduled": 1},
+        ("month", "2030-02"): {"scheduled": 1},
+        ("month", "2029-12"): {"created": 2},
+    }
+
+
+def test_sum_counters_filters_period_and_keys():
+    buckets = [
+        {"period": "day", "key": "2030-01-06", "scheduled": 5},
+        {"period": "day", "key": "2030-01-07", "scheduled": 2, "completed": 1},
+        {"period": "day", "key": "2030-01-08", "scheduled": 3},
+        {"period": "month", "key": "2030-01", "scheduled": 10},
+    ]
+    assert sum_counters(buckets, "day", ("scheduled", "completed"), "2030-01-07") == 6
+    assert sum_counters(buckets, "day", ("scheduled",), "2030-01-07", "2030-01-07") == 2
+    assert sum_counters(buckets, "month", ("scheduled",), "2030-01") == 10
+
+
+@pytest.mark.anyio
+async def test_rebuild_matches_incremental_counts(db):
+    appointments = [
+        (START, "scheduled"),
+        (START + timedelta(hours=2), "completed"),
+        (START + timedelta(days=40), "canceled"),
+    ]
+    for i, (start, status) in enumerate(appointments):
+        await db.appointments.insert_one({
+            "appointment_id": f"apt_{i}", "business_id": "biz",
+            "start_time": start, "status": status, "created_at": CREATED
+        })
+        await record_appointment_change(db, "biz", after=(start, status), created_at=CREATED)
+
+    incremental = await snapshot(db)
+    await db.business_counters.update_many({}, {"$inc": {"scheduled": 7}})
+    assert await rebuild_counters(db, "biz") == len(incremental)
+    assert await snapshot(db) == incremental
+
+
+@pytest.mark.anyio
+async def test_rebuild_replaces_buckets_in_place(db):
+    await db.appointments.insert_one({
+        "appointment_id": "apt_0", "business_id": "biz",
+        "start_time": START, "status": "scheduled", "created_at": CREATED
+    })
+    # A bucket that no longer has appointments, and one of another business
+    await record_appointment_change(db, "biz", after=(START + timedelta(days=400), "scheduled"))
+    await record_appointment_change(db, "other", after=(START, "completed"))
+    await record_appointment_change(db, "biz", after=(START, "canceled"))
+
+    assert await rebuild_counters(db, "biz") == 3
+    assert await snapshot(db) == {
+        ("day", "2030-01-07"): {"scheduled": 1},
+        ("month", "2030-01"): {"scheduled": 1},
+        ("month", "2029-12"): {"created": 1},
+    }
+    other = await load_counters(db, "other", "0000-00-00", "0000-00")
+    assert len(other) == 2
+
+
+@pytest.mark.anyio
+async def test_parallel_quota_claims_stop_at_the_limit(db):
+    # The month bucket may already exist without a "created" count
+    await record_appointment_change(db, "biz", after=(datetime.now(timezone.utc), "scheduled"))
+    results = await asyncio.gather(*[claim_created(db, "biz", limit=10) for _ in range(25)])
+    assert sorted(result for result in results if result) == list(range(1, 11))
+    assert await claim_created(db, "biz", count=3, limit=12) is None
+
+    await release_created(db, "biz", count=2)
+    assert await claim_created(db, "biz", count=2, limit=10) == 10
+    assert await claim_created(db, "other", count=5) == 5
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from exports import chunked, csv_stream, join_appointments, merge_sorted
+
+
+async def collect(stream):
+    return [item async for item in stream]
+
+
+async def from_list(documents):
+    for document in documents:
+        yield document
+
+
+@pytest.mark.anyio
+async def test_csv_stream_encodes_chunks_and_neutralizes_formulas():
+    rows = [
+        {"name": "=HYPERLINK(\"x\")", "phone": "+1 (555) 123-4567", "when": datetime(2030, 1, 7, tzinfo=timezone.utc)},
+        {"name": "Ann, Jr.", "phone": None},
+    ]
+
+    chunks = await collect(csv_stream(chunked(from_list(rows), size=1), ["name", "phone", "when"]))
+    assert chunks == [
+        "name,phone,when\r\n",
+        "\"'=HYPERLINK(\"\"x\"\")\",+1 (555) 123-4567,2030-01-07T00:00:00+00:00\r\n",
+        "\"Ann, Jr.\",,\r\n",
+    ]
+
+
+@pytest.mark.anyio
+async def test_join_appointments_joins_names_within_the_business(db):
+    await db.services.insert_one({"business_id": "biz", "service_id": "svc", "name": "Cut", "price": 30})
+    await db.clients.insert_many([
+        {"business_id": "biz", "client_id": "c1", "name": "Ann"},
+        {"business_id": "other", "client_id": "c2", "name": "Not yours"},
+    ])
+    appointments = [
+        {"appointment_id": f"a{i}", "client_id": "c1" if i % 2 else "c2", "service_id": "svc"}
+        for i in range(5)
+    ]
+    chunks = await collect(join_appointments(db, "biz", chunked(from_list(appointments), size=2)))
+    rows = [apt for chunk in chunks for apt in chunk]
+    assert [(row["client_name"], row["service_name"], row["service_price"]) for row in rows[:2]] == [
+        (None, "Cut", 30), ("Ann", "Cut", 30)
+    ]
+
+
+@pytest.mark.anyio
+async def test_merge_sorted_interleaves_documents_into_chunks():
+    stored = [{"n": 1}, {"n": 4}, {"n": 5}]
+    expanded = [{"n": 0}, {"n": 2}, {"n": 3}, {"n": 6}]
+
+    chunks = await collect(merge_sorted(chunked(from_list(stored), size=2), expanded, key=lambda doc: doc["n"]))
+    assert [[doc["n"] for doc in chunk] for chunk in chunks] == [[0, 1, 2, 3, 4], [5], [6]]
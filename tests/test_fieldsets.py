@@ -0,0 +1,28 @@
+import pytest
+
+from fieldsets import fields_projection, parse_fields, pick
+
+ALLOWED = {"appointment_id", "start_time", "status", "notes"}
+
+
+def test_requested_fields_follow_the_required_ones_once():
+    fields = parse_fields("status, start_time,status", ALLOWED, ["appointment_id", "start_time"])
+    assert fields == ["appointment_id", "start_time", "status"]
+    assert fields_projection(fields, {"_id": 0}) == {"_id": 0, "appointment_id": 1, "start_time": 1, "status": 1}
+
+
+def test_missing_or_empty_fields_keep_the_default_projection():
+    assert parse_fields(None, ALLOWED) is None
+    assert parse_fields(" , ", ALLOWED) is None
+    assert fields_projection(None, {"_id": 0, "search_keys": 0}) == {"_id": 0, "search_keys": 0}
+
+
+def test_fields_outside_the_whitelist_are_rejected():
+    with pytest.raises(ValueError, match="search_keys"):
+        parse_fields("status,search_keys", ALLOWED)
+
+
+def test_pick_narrows_expanded_documents():
+    document = {"appointment_id": "a", "start_time": 1, "notes": "long text"}
+    assert pick(document, ["appointment_id", "status"]) == {"appointment_id": "a"}
+    assert pick(document, None) is document
@@ -0,0 +1,76 @@
+import io
+
+import pytest
+
+from imports import import_clients, read_csv_rows
+
+CSV = (
+    "﻿Name , EMAIL,Phone,Ignored\n"
+    "Zoé,zoe@mail.com,555 1234,x\n"
+    ",nobody@mail.com,,\n"
+    "Zoe again,ZOE@mail.com,,\n"
+    "\n"
+    "Existing,old@mail.com,,\n"
+    "No Email,,,\n"
+    "\"Multi\nLine\",multi@mail.com,,\n"
+)
+
+
+def test_read_csv_rows_normalizes_headers_and_skips_blank_lines():
+    rows = list(read_csv_rows(io.BytesIO(CSV.encode())))
+    assert [number for number, _ in rows] == [2, 3, 4, 6, 7, 9]
+    assert rows[0][1] == {"name": "Zoé", "email": "zoe@mail.com", "phone": "555 1234", "ignored": "x"}
+    assert rows[-1][1]["name"] == "Multi\nLine"
+
+
+@pytest.mark.anyio
+async def test_import_clients_dedupes_within_file_and_against_db(db):
+    await db.clients.insert_one({"client_id": "c0", "business_id": "biz", "email": "old@mail.com"})
+    results = [
+        result async for result in
+        import_clients(db, "biz", read_csv_rows(io.BytesIO(CSV.encode())), batch_size=2)
+    ]
+    assert results == [
+        {"row": 3, "status": "error", "error": "name is required"},
+        {"row": 4, "status": "duplicate"},
+        {"row": 6, "status": "duplicate"},
+        {"status": "done", "created": 3, "duplicates": 2, "errors": 1},
+    ]
+    zoe = await db.clients.find_one({"email": "zoe@mail.com"})
+    assert zoe["business_id"] == "biz"
+    assert "5551234" in zoe["search_keys"]
+
+
+@pytest.mark.anyio
+async def test_import_clients_matches_emails_case_insensitively(db):
+    await db.clients.insert_one({"client_id": "c0", "business_id": "biz", "email": "old@mail.com"})
+    rows = [(2, {"name": "Old", "email": " OLD@Mail.com "}), (3, {"name": "New", "email": "New@Mail.com"})]
+    results = [result async for result in import_clients(db, "biz", iter(rows))]
+    assert results == [
+        {"row": 2, "status": "duplicate"},
+        {"status": "done", "created": 1, "duplicates": 1, "errors": 0},
+    ]
+    assert await db.clients.count_documents({"email": "new@mail.com"}) == 1
+
+
+@pytest.mark.anyio
+async def test_import_clients_reports_what_was_written_when_reading_fails(db):
+    def rows():
+        yield 2, {"name": "Ana", "email": "ana@mail.com"}
+        yield 3, {"name": "Bia", "email": "bia@mail.com"}
+        raise ValueError("File is not a valid workbook")
+
+    results = [result async for result in import_clients(db, "biz", rows(), batch_size=2)]
+    assert results == [{
+        "status": "failed", "error": "File is not a valid workbook", "created": 2, "duplicates": 0, "errors": 0
+    }]
+    assert await db.clients.count_documents({"business_id": "biz"}) == 2
+
+
+@pytest.mark.anyio
+async def test_malformed_csv_ends_with_a_failed_summary(db):
+    oversized = "Name,Notes\nAna,ok\nBia," + "x" * 200_000 + "\n"
+
+    results = [result async for result in import_clients(db, "biz", read_csv_rows(io.BytesIO(oversized.encode())))]
+    assert results[-1]["status"] == "failed"
+    assert results[-1]["error"].startswith("Invalid CSV at line 3")
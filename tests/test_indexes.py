@@ -0,0 +1,28 @@
+from indexes import INDEXES, QUERY_PROBES, _has_collscan
+
+
+def test_detects_nested_collscan():
+    plan = {
+        "stage": "SUBPLAN",
+        "inputStage": {"stage": "OR", "inputStages": [
+            {"stage": "IXSCAN"},
+            {"stage": "COLLSCAN"},
+        ]},
+    }
+    assert _has_collscan(plan)
+
+
+def test_index_scan_is_not_flagged():
+    plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "slug_unique"}}
+    assert not _has_collscan(plan)
+
+
+def test_probes_target_indexed_collections():
+    for label, collection, query, sort in QUERY_PROBES:
+        assert collection in INDEXES, label
+
+
+def test_index_names_are_unique_per_collection():
+    for collection, models in INDEXES.items():
+        names = [model.document["name"] for model in models]
+        assert len(names) == len(set(names)), collection
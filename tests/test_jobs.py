@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from jobs import JobWorker, complete_job, enqueue_job, fail_job, lease_job
+
+NOW = datetime(2030, 1, 7, 10, 0, tzinfo=timezone.utc)
+LEASE = timedelta(seconds=30)
+
+
+@pytest.mark.anyio
+async def test_job_is_leased_by_one_worker(db):
+    job_id = await enqueue_job(db, "send", {"to": "a"}, run_at=NOW)
+    assert await enqueue_job(db, "send", {"to": "b"}, run_at=NOW, job_id=job_id) == job_id
+    assert await db.jobs.count_documents({}) == 1
+
+    assert await lease_job(db, "w1", ["other"], LEASE, now=NOW) is None
+    assert await lease_job(db, "w1", ["send"], LEASE, now=NOW - timedelta(seconds=1)) is None
+    job = await lease_job(db, "w1", ["send"], LEASE, now=NOW)
+    assert job["payload"] == {"to": "a"} and job["attempts"] == 1
+    assert await lease_job(db, "w2", ["send"], LEASE, now=NOW) is None
+
+    assert await complete_job(db, job)
+    assert (await db.jobs.find_one({"job_id": job_id}))["status"] == "done"
+
+
+@pytest.mark.anyio
+async def test_expired_lease_moves_to_another_worker(db):
+    await enqueue_job(db, "send", run_at=NOW)
+    stale = await lease_job(db, "w1", ["send"], LEASE, now=NOW)
+
+    job = await lease_job(db, "w2", ["send"], LEASE, now=NOW + LEASE + timedelta(seconds=1))
+    assert job["worker_id"] == "w2" and job["attempts"] == 2
+    # The first worker lost the job and cannot record an outcome for it
+    assert not await complete_job(db, stale)
+    assert await complete_job(db, job)
+
+
+@pytest.mark.anyio
+async def test_failures_back_off_then_fail(db):
+    job_id = await enqueue_job(db, "send", run_at=NOW, max_attempts=2)
+
+    job = await lease_job(db, "w1", ["send"], LEASE, now=NOW)
+    assert await fail_job(db, job, "boom", now=NOW)
+    stored = await db.jobs.find_one({"job_id": job_id})
+    assert stored["status"] == "queued" and stored["last_error"] == "boom"
+    run_at = stored["run_at"].replace(tzinfo=timezone.utc)
+    assert NOW <= run_at
+
+    job = await lease_job(db, "w1", ["send"], LEASE, now=run_at)
+    assert await fail_job(db, job, "boom again", now=run_at)
+    assert (await db.jobs.find_one({"job_id": job_id}))["status"] == "failed"
+    assert await lease_job(db, "w1", ["send"], LEASE, now=run_at + timedelta(days=1)) is None
+
+
+@pytest.mark.anyio
+async def test_worker_runs_handlers_and_drains_on_stop(db):
+    done = []
+
+    async def handler(db, payload):
+        await asyncio.sleep(0.05)
+        done.append(payload["n"])
+
+    for n in range(3):
+        await enqueue_job(db, "send", {"n": n})
+    worker = JobWorker(db, {"send": handler}, concurrency=2, poll_interval=0.01)
+    worker.start()
+    while await db.jobs.count_documents({"status": "queued"}):
+        await asyncio.sleep(0.01)
+    await worker.stop()
+
+    assert sorted(done) == [0, 1, 2]
+    assert await db.jobs.count_documents({"status": "done"}) == 3
@@ -0,0 +1,16 @@
+from types import SimpleNamespace
+
+
+def test_http_client_metrics_need_a_session(api):
+    from http_client import create_pooled_client
+
+    api.app.state.http = create_pooled_client("http")
+    api.app.state.asaas = SimpleNamespace(client=create_pooled_client("asaas"))
+    try:
+        assert api.get("/api/metrics/http-clients", headers={"Authorization": ""}).status_code == 401
+        response = api.get("/api/metrics/http-clients")
+        assert response.status_code == 200
+        assert set(response.json()) == {"http", "asaas"}
+    finally:
+        api.portal.call(api.app.state.http.aclose)
+        api.portal.call(api.app.state.asaas.client.aclose)
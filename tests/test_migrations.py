@@ -0,0 +1,26 @@
+import pytest
+
+from migrations import MIGRATIONS, queue_migrations
+
+
+@pytest.mark.anyio
+async def test_migrations_are_queued_once(db):
+    queued = await queue_migrations(db)
+    assert queued == [migration_id for migration_id, _, _ in MIGRATIONS]
+    assert await queue_migrations(db) == []
+
+    jobs = await db.jobs.find({}, {"_id": 0, "job_id": 1, "kind": 1}).to_list(None)
+    assert jobs == [
+        {"job_id": f"migration_{migration_id}", "kind": kind} for migration_id, kind, _ in MIGRATIONS
+    ]
+
+    # Even once the finished job has expired from the queue
+    await db.jobs.delete_many({})
+    assert await queue_migrations(db) == []
+    assert await db.jobs.count_documents({}) == 0
+
+
+def test_every_migration_has_a_job_handler(api):
+    from server import JOB_HANDLERS
+
+    assert {kind for _, kind, _ in MIGRATIONS} <= JOB_HANDLERS.keys()
@@ -0,0 +1,21 @@
+import pytest
+
+from pagination import decode_cursor, encode_cursor, keyset_filter
+
+
+def test_cursor_round_trip():
+    values = ["Zoé Ångström", "client_123"]
+    assert decode_cursor(encode_cursor(values), 2) == values
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor(["only one"]), encode_cursor({"a": 1})])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
+
+
+def test_keyset_filter():
+    assert keyset_filter(["name", "client_id"], ["Ann", "c1"]) == {"$or": [
+        {"name": {"$gt": "Ann"}},
+        {"name": "Ann", "client_id": {"$gt": "c1"}},
+    ]}
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+from recurrence import (
+    expand_series, is_occurrence, occurrence_bounds, occurrence_key, original_starts, split_occurrence_id
+)
+
+START = datetime(2030, 1, 7, 10, 0, tzinfo=timezone.utc)
+
+
+def series(**fields):
+    return {
+        "series_id": "series_abc", "business_id": "biz", "client_id": "c", "service_id": "svc",
+        "staff_id": "staff", "start_time": START, "duration": 60, "frequency": "weekly",
+        "created_at": START, **fields
+    }
+
+
+def days(starts):
+    return [start.strftime("%Y-%m-%d") for start in starts]
+
+
+def test_weekly_jumps_to_the_range():
+    far = START + timedelta(weeks=520)
+    assert list(original_starts(series(), far - timedelta(minutes=30), far + timedelta(weeks=2))) == [
+        far, far + timedelta(weeks=1)
+    ]
+
+
+def test_count_and_until_end_the_series():
+    assert days(original_starts(series(frequency="biweekly", count=3), START, START + timedelta(days=365))) == [
+        "2030-01-07", "2030-01-21", "2030-02-04"
+    ]
+    until = START + timedelta(weeks=2)
+    assert len(list(original_starts(series(until=until), START, START + timedelta(days=365)))) == 3
+
+
+def test_monthly_skips_missing_days_and_counts_real_occurrences():
+    monthly = series(frequency="monthly", start_time=START.replace(day=31), count=4)
+    assert days(original_starts(monthly, START, START + timedelta(days=400))) == [
+        "2030-01-31", "2030-03-31", "2030-05-31", "2030-07-31"
+    ]
+    assert occurrence_bounds(monthly) == (START.replace(day=31), START.replace(month=7, day=31, hour=11))
+
+
+def test_overrides_move_and_skip_occurrences():
+    second, third = START + timedelta(weeks=1), START + timedelta(weeks=2)
+    moved = START + timedelta(weeks=5)
+    recurring = series(count=3, overrides={
+        occurrence_key(second): {"status": "canceled"},
+        occurrence_key(third): {"start_time": moved},
+    })
+    occurrences = expand_series(recurring, START, START + timedelta(weeks=3))
+    assert [(o["start_time"], o["status"]) for o in occurrences] == [(START, "scheduled"), (second, "canceled")]
+
+    # The moved occurrence shows up where it was moved to, under its original id
+    (occurrence,) = expand_series(recurring, moved, moved + timedelta(hours=1))
+    assert occurrence["appointment_id"] == "series_abc_" + occurrence_key(third)
+    assert occurrence_bounds(recurring)[1] == moved + timedelta(hours=1)
+
+
+def test_occurrence_ids_round_trip():
+    assert split_occurrence_id("series_abc_20300107T100000Z") == ("series_abc", "20300107T100000Z")
+    assert split_occurrence_id("apt_123") is None
+    assert is_occurrence(series(), START + timedelta(weeks=3))
+    assert not is_occurrence(series(), START + timedelta(days=3))
+
+
+def test_occurrences_keep_local_time_across_dst():
+    # 10:00 in New York: EST (UTC-5) in early March, EDT (UTC-4) from March 10, 2030
+    first = datetime(2030, 3, 4, 15, 0, tzinfo=timezone.utc)
+    weekly = series(start_time=first, timezone="America/New_York")
+    assert [start.hour for start in original_starts(weekly, first, first + timedelta(weeks=3))] == [15, 14, 14, 14]
+    # Jumping into the range still finds the first occurrence after the change
+    assert list(original_starts(weekly, first + timedelta(weeks=1, hours=-2), first + timedelta(weeks=2)))[0] == (
+        datetime(2030, 3, 11, 14, 0, tzinfo=timezone.utc)
+    )
+    monthly = series(start_time=first, timezone="America/New_York", frequency="monthly", count=2)
+    assert [start.hour for start in original_starts(monthly, first, first + timedelta(days=62))] == [15, 14]
+    # Series stored without a timezone repeat in UTC
+    assert {start.hour for start in original_starts(series(start_time=first), first, first + timedelta(weeks=3))} == {15}
@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from reminders import (
+    REMINDER_LEAD, FileSender, ReminderScheduler, claim_due_reminders, reminder_fields, reminder_update,
+    send_reminders
+)
+
+NOW = datetime(2030, 1, 7, 10, 0, tzinfo=timezone.utc)
+
+
+def test_reminder_time_follows_the_booking():
+    start = NOW + timedelta(days=3)
+    assert reminder_fields(start, "scheduled", NOW) == {"remind_at": start - REMINDER_LEAD}
+    # Booked inside the lead time, or not scheduled: nothing to remind of
+    assert reminder_fields(NOW + REMINDER_LEAD / 2, "scheduled", NOW) == {}
+    assert reminder_fields(start, "canceled", NOW) == {}
+
+    moved = reminder_update(start + timedelta(days=1), "scheduled", NOW)
+    assert moved == {"$set": {"remind_at": start + timedelta(days=1) - REMINDER_LEAD}, "$unset": {"reminder_batch": ""}}
+    assert reminder_update(start, "canceled", NOW) == {"$unset": {"reminder_batch": "", "remind_at": ""}}
+
+
+async def seed(db, count):
+    await db.businesses.insert_one({"business_id": "biz", "name": "Studio", "timezone": "America/Sao_Paulo"})
+    await db.services.insert_one({"service_id": "svc", "business_id": "biz", "name": "Haircut"})
+    for n in range(count):
+        await db.clients.insert_one(
+            {"business_id": "biz", "client_id": f"c{n}", "name": f"Client {n}", "email": f"c{n}@example.com"}
+        )
+        start = NOW + timedelta(hours=n)
+        await db.appointments.insert_one({
+            "appointment_id": f"apt{n}", "business_id": "biz", "client_id": f"c{n}", "service_id": "svc",
+            "staff_id": "s", "start_time": start, "status": "scheduled", "remind_at": start - REMINDER_LEAD
+        })
+
+
+@pytest.mark.anyio
+async def test_due_reminders_are_claimed_once(db):
+    await seed(db, 3)
+
+    batch_id = await claim_due_reminders(db, limit=10, now=NOW - REMINDER_LEAD + timedelta(minutes=90))
+    assert {apt["appointment_id"] async for apt in db.appointments.find({"reminder_batch": batch_id})} == {"apt0", "apt1"}
+    assert await claim_due_reminders(db, limit=10, now=NOW - REMINDER_LEAD + timedelta(minutes=90)) is None
+    assert await db.appointments.count_documents({"remind_at": {"$exists": True}}) == 1
+
+
+@pytest.mark.anyio
+async def test_batch_is_sent_without_rescheduled_appointments(db, tmp_path):
+    await seed(db, 2)
+    batch_id = await claim_due_reminders(db, limit=10, now=NOW)
+    # Rescheduled after the batch was claimed
+    await db.appointments.update_one(
+        {"appointment_id": "apt1"}, reminder_update(NOW + timedelta(days=5), "scheduled", NOW)
+    )
+
+    sink = tmp_path / "reminders.jsonl"
+    await send_reminders(db, {"batch_id": batch_id}, FileSender(sink))
+
+    sent = [json.loads(line) for line in sink.read_text().splitlines()]
+    assert [reminder["appointment_id"] for reminder in sent] == ["apt0"]
+    assert sent[0]["to"] == "c0@example.com" and sent[0]["service_name"] == "Haircut"
+    assert sent[0]["start_time"].endswith("-03:00")
+    assert await db.appointments.count_documents({"reminder_batch": {"$exists": True}}) == 0
+    assert (await db.appointments.find_one({"appointment_id": "apt1"}))["remind_at"]
+
+
+@pytest.mark.anyio
+async def test_scheduler_queues_one_job_per_batch(db):
+    await seed(db, 5)
+    await db.appointments.update_many({}, {"$set": {"remind_at": NOW - timedelta(days=1)}})
+
+    assert await ReminderScheduler(db, batch_size=2).schedule_due(now=NOW) == 3
+    jobs = await db.jobs.find({"kind": "send_reminders"}).to_list(None)
+    assert len(jobs) == 3
+    assert len({job["payload"]["batch_id"] for job in jobs}) == 3
+
+
+@pytest.mark.anyio
+async def test_scheduler_queues_batches_left_without_a_job(db):
+    await seed(db, 2)
+    # Claimed by a process that stopped before queueing the job
+    batch_id = await claim_due_reminders(db, limit=10, now=NOW)
+
+    scheduler = ReminderScheduler(db)
+    assert await scheduler.schedule_due(now=NOW) == 1
+    jobs = await db.jobs.find({}, {"_id": 0, "job_id": 1, "payload": 1}).to_list(None)
+    assert jobs == [{"job_id": f"job_{batch_id}", "payload": {"batch_id": batch_id}}]
+    assert await scheduler.schedule_due(now=NOW) == 0
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from reservations import _backfill_batch, backfill_reservations, release_slot, reservation_days, reserve_many, reserve_slot
+
+START = datetime(2030, 1, 7, 10, 0, tzinfo=timezone.utc)
+
+
+def minutes(value):
+    return timedelta(minutes=value)
+
+
+def test_reservation_days_spans_midnight():
+    assert reservation_days(START, START + minutes(30)) == ["2030-01-07"]
+    late = START.replace(hour=23, minute=30)
+    assert reservation_days(late, late + minutes(60)) == ["2030-01-07", "2030-01-08"]
+    assert reservation_days(late, late + minutes(30)) == ["2030-01-07"]
+
+
+@pytest.mark.anyio
+async def test_parallel_bookings_of_one_slot_admit_exactly_one(db):
+    # 50 overlapping requests for the same staff member, all in flight at once
+    results = await asyncio.gather(*[
+        reserve_slot(db, "biz", "staff_1", f"apt_{i}", START + minutes(i % 3 * 10), START + minutes(60))
+        for i in range(50)
+    ])
+    assert sum(results) == 1
+
+    # Other staff members are not serialized behind staff_1
+    results = await asyncio.gather(*[
+        reserve_slot(db, "biz", f"staff_{i}", f"other_{i}", START, START + minutes(60))
+        for i in range(2, 52)
+    ])
+    assert all(results)
+
+
+@pytest.mark.anyio
+async def test_back_to_back_bookings_do_not_conflict(db):
+    assert await reserve_slot(db, "biz", "staff", "a", START, START + minutes(30))
+    assert await reserve_slot(db, "biz", "staff", "b", START + minutes(30), START + minutes(60))
+    assert not await reserve_slot(db, "biz", "staff", "c", START + minutes(15), START + minutes(45))
+
+
+@pytest.mark.anyio
+async def test_release_frees_the_interval(db):
+    assert await reserve_slot(db, "biz", "staff", "a", START, START + minutes(30))
+    await release_slot(db, "biz", "staff", "a", START, START + minutes(30))
+    assert await reserve_slot(db, "biz", "staff", "b", START, START + minutes(30))
+
+
+@pytest.mark.anyio
+async def test_rescheduling_ignores_own_interval(db):
+    assert await reserve_slot(db, "biz", "staff", "a", START, START + minutes(60))
+    assert await reserve_slot(db, "biz", "staff", "a", START + minutes(30), START + minutes(90))
+    await release_slot(db, "biz", "staff", "a", START, START + minutes(60))
+    assert await reserve_slot(db, "biz", "staff", "b", START, START + minutes(30))
+    assert not await reserve_slot(db, "biz", "staff", "c", START + minutes(60), START + minutes(75))
+
+
+@pytest.mark.anyio
+async def test_failed_multi_day_claim_rolls_back(db):
+    next_day = START.replace(day=8, hour=0)
+    assert await reserve_slot(db, "biz", "staff", "a", next_day, next_day + minutes(30))
+    late = START.replace(hour=23, minute=30)
+    assert not await reserve_slot(db, "biz", "staff", "b", late, late + minutes(60))
+    # The first day's claim was released
+    assert await reserve_slot(db, "biz", "staff", "c", late, late + minutes(30))
+
+
+@pytest.mark.anyio
+async def test_reserve_many_falls_back_to_single_claims(db):
+    # Booked by someone else after the importer read the day
+    assert await reserve_slot(db, "biz", "staff", "taken", START, START + minutes(30))
+
+    def apt(appointment_id, staff_id, start, length):
+        return {"appointment_id": appointment_id, "staff_id": staff_id,
+                "start_time": start, "end_time": start + minutes(length)}
+
+    late = START.replace(hour=23, minute=45)
+    rejected = await reserve_many(db, "biz", [
+        apt("a", "staff", START, 30),
+        apt("b", "staff", START + minutes(60), 30),
+        apt("c", "other", START, 30),
+        apt("d", "other", late, 30),
+    ])
+    assert rejected == {"a"}
+    assert not await reserve_slot(db, "biz", "staff", "x", START + minutes(60), START + minutes(90))
+    assert not await reserve_slot(db, "biz", "other", "y", START.replace(day=8, hour=0), START.replace(day=8, hour=0) + minutes(10))
+
+
+@pytest.mark.anyio
+async def test_backfill_releases_appointments_changed_while_it_ran(db):
+    for staff_id in ["a", "b", "c"]:
+        await db.appointments.insert_one({
+            "appointment_id": f"apt_{staff_id}", "business_id": "biz", "staff_id": staff_id, "status": "scheduled",
+            "start_time": START, "end_time": START + minutes(30)
+        })
+    assert await backfill_reservations(db) == 3
+    assert not await reserve_slot(db, "biz", "a", "other", START, START + minutes(30))
+
+    # Read as scheduled, then canceled (b) and moved (c) before the guards are written
+    snapshot = await db.appointments.find({"staff_id": {"$in": ["b", "c"]}}, {"_id": 0}).to_list(None)
+    await db.slot_reservations.delete_many({})
+    await db.appointments.update_one({"appointment_id": "apt_b"}, {"$set": {"status": "canceled"}})
+    await db.appointments.update_one(
+        {"appointment_id": "apt_c"}, {"$set": {"start_time": START + minutes(60), "end_time": START + minutes(90)}}
+    )
+    await _backfill_batch(db, snapshot)
+    assert await reserve_slot(db, "biz", "b", "other", START, START + minutes(30))
+    assert await reserve_slot(db, "biz", "c", "other", START, START + minutes(30))
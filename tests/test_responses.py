@@ -0,0 +1,30 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+from responses import FastJSONResponse, model_response
+
+
+class Item(BaseModel):
+    name: str
+    when: datetime
+    tag: str = "none"
+
+
+def test_renders_datetimes_like_isoformat():
+    aware = datetime(2030, 1, 7, 10, 0, 0, 123456, tzinfo=timezone.utc)
+    naive = datetime(2030, 1, 7, 10, 0)
+    content = [{"start": aware, "naive": naive, "day": date(2030, 1, 7), "price": Decimal("9.5"), "id": object}]
+    body = json.loads(FastJSONResponse(content).body)
+    assert body == [{
+        "start": aware.isoformat(), "naive": naive.isoformat(), "day": "2030-01-07", "price": 9.5, "id": str(object)
+    }]
+
+
+def test_model_response_drops_extra_fields_without_validating():
+    when = datetime(2030, 1, 7, tzinfo=timezone.utc)
+    response = model_response(Item, {"_id": "mongo", "name": "x", "when": when}, status_code=201)
+    assert response.status_code == 201
+    assert json.loads(response.body) == {"name": "x", "when": when.isoformat(), "tag": "none"}
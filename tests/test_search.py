@@ -0,0 +1,36 @@
+from search import client_search_keys, fold, normalize_email, query_terms, rank
+
+
+def test_fold_strips_accents_and_case():
+    assert fold("  Zoé   ÁVILA ") == "zoe avila"
+    assert fold(None) == ""
+
+
+def test_client_search_keys():
+    assert client_search_keys("Zoë Ávila", "Zoe.Avila@Mail.com", "+1 (555) 123-4567") == [
+        "15551234567", "avila", "zoe", "zoe avila", "zoe.avila", "zoe.avila@mail.com",
+    ]
+    assert client_search_keys("Ann", None, None) == ["ann"]
+
+
+def test_query_terms():
+    assert query_terms("ZO  Áv") == ["zo", "av"]
+    assert query_terms("555-12") == ["55512"]
+    assert query_terms("   ") == []
+
+
+def test_rank_prefers_name_matches():
+    clients = [
+        {"client_id": "c1", "name": "Avi Zoeller"},
+        {"client_id": "c2", "name": "Bea", "email": "zoe@mail.com"},
+        {"client_id": "c3", "name": "Zoé"},
+        {"client_id": "c4", "name": "Zoë Ávila"},
+    ]
+    clients.sort(key=lambda client: rank(client, ["zoe"]))
+    assert [client["client_id"] for client in clients] == ["c3", "c4", "c1", "c2"]
+
+
+def test_normalize_email():
+    assert normalize_email("  Ana@Mail.COM ") == "ana@mail.com"
+    assert normalize_email("  ") is None
+    assert normalize_email(None) is None